@@ -4,6 +4,7 @@ Grid actions.
 Should be used in replay and undo features.
 """
 
+import sys
 from dataclasses import dataclass, field
 from layer_util import Layer
 from grid import Grid
@@ -45,3 +46,127 @@ class PaintAction:
 
     def add_step(self, step: PaintStep):
         self.steps.append(step)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by this action, layers excluded since they are shared."""
+        step_size = sys.getsizeof(PaintStep((0, 0), None)) + sys.getsizeof((0, 0))
+        return sys.getsizeof(self) + sys.getsizeof(self.steps) + len(self.steps) * step_size
+
+
+_stencils = {} #brush size --> offsets of the diamond, see stencil
+
+def stencil(brush_size: int) -> tuple[tuple[int, int], ...]:
+    """
+    Returns the offsets (dx, dy) of every square within manhattan distance brush_size of the centre,
+    ordered by dx and then dy. Computed once per brush size.
+
+    Big-O notation: O(1) when cached, O(brush_size^2) otherwise
+    """
+    if brush_size not in _stencils:
+        _stencils[brush_size] = tuple(
+            (dx, dy)
+            for dx in range(-brush_size, brush_size + 1)
+            for dy in range(-brush_size, brush_size + 1)
+            if abs(dx) + abs(dy) <= brush_size
+        )
+    return _stencils[brush_size]
+
+
+@dataclass
+class StampAction:
+    """
+    A single dab of the brush, stored as its centre, brush size and layer,
+    plus a bitmask of which squares of the stencil it changed (bit i for stencil(brush_size)[i]).
+    Behaves like the PaintAction of the same steps, which are only built when asked for.
+    """
+
+    centre: tuple[int, int]
+    brush_size: int
+    layer: Layer
+    mask: int = 0
+    is_special = False
+
+    def squares(self):
+        """
+        Yields the squares this dab changed, in stencil order.
+
+        Big-O notation: O(brush_size^2)
+        """
+        cx, cy = self.centre
+        mask = self.mask
+        for dx, dy in stencil(self.brush_size):
+            if mask == 0:
+                return
+            if mask & 1:
+                yield (cx + dx, cy + dy)
+            mask >>= 1
+
+    @property
+    def steps(self) -> list[PaintStep]:
+        """
+        Big-O notation: O(brush_size^2)
+        """
+        return [PaintStep(square, self.layer) for square in self.squares()]
+
+    def undo_apply(self, grid: Grid):
+        for x, y in self.squares():
+            grid[x][y].erase(self.layer)
+
+    def redo_apply(self, grid: Grid):
+        for x, y in self.squares():
+            grid[x][y].add(self.layer)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by this action, layers and the shared stencil excluded."""
+        return sys.getsizeof(self) + sys.getsizeof(self.centre) + sys.getsizeof(self.mask)
+
+
+@dataclass
+class BatchAction:
+    """
+    Several actions, in the order they were first applied, undone or redone as one.
+    Their steps are grouped by square, and each square's final store is worked out on a single copy
+    and written to the grid once between specials, which act as breaks since they touch every square.
+    """
+
+    actions: list = field(default_factory=list)
+    is_special = False
+
+    @property
+    def steps(self) -> list[PaintStep]:
+        """
+        The steps of every action in order, specials excluded.
+
+        Big-O notation: O(s) where s is the total number of steps
+        """
+        return [step for action in self.actions if not action.is_special for step in action.steps]
+
+    def _apply(self, grid: Grid, undo: bool) -> None:
+        """
+        Big-O notation: O(s + c * (copy + log(xy)) * specials) where s is the total number of steps, c the squares touched
+        """
+        pending = {} #square --> layers to add or erase there, in order
+        for action in (reversed(self.actions) if undo else self.actions):
+            if action.is_special:
+                self._flush(grid, pending, undo)
+                grid.special()
+                continue
+            for step in action.steps:
+                pending.setdefault(tuple(step.affected_grid_square), []).append(step.affected_layer)
+        self._flush(grid, pending, undo)
+
+    @staticmethod
+    def _flush(grid: Grid, pending: dict, undo: bool) -> None:
+        for (x, y), layers in pending.items():
+            grid[x][y].apply_layers(layers, undo) #one copy and one write per square
+        pending.clear()
+
+    def undo_apply(self, grid: Grid):
+        self._apply(grid, True)
+
+    def redo_apply(self, grid: Grid):
+        self._apply(grid, False)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by this batch and its actions."""
+        return sys.getsizeof(self) + sys.getsizeof(self.actions) + sum(action.nbytes() for action in self.actions)
@@ -0,0 +1,316 @@
+from __future__ import annotations
+"""
+Autosave and crash recovery.
+
+An Autosave is handed every action as it is recorded, see ReplayTracker's journal,
+and a background thread appends them to a journal in its directory. Every snapshot_interval
+actions, a compressed snapshot of the grid is written next to it, remembering how far into
+the journal it was taken. recover rebuilds the grid from the latest snapshot and the
+journal records after it.
+
+The drawing thread never waits on the disk: it only appends to a deque, which is safe to share
+between threads without a lock, and signals the writer with an Event. Grid snapshots are O(1),
+and the writer encodes them in the background since they never change.
+"""
+
+import mmap
+import os
+import warnings
+import zlib
+from collections import deque
+from threading import Event, Thread
+from action import PaintAction
+from grid import Grid
+from journal import JournalWriter, records, read_varint, write_varint
+from layer_store import AdditiveLayerStore, SequenceLayerStore, SetLayerState, SetLayerStore
+from layer_util import get_layers
+from data_structures.quadtree import PersistentQuadTree
+
+JOURNAL_NAME = "session.journal"
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_MAGIC = b"PSNP\x01"
+
+
+def _layer(index: int):
+    """Inverse of layer.index + 1, with 0 for no layer."""
+    return None if index == 0 else get_layers()[index - 1]
+
+def _layer_index(layer) -> int:
+    return 0 if layer is None else layer.index + 1
+
+def encode_snapshot(tree: PersistentQuadTree, draw_style: str, x: int, y: int, flyweight: bool, count: int, offset: int) -> bytes:
+    """
+    Returns the compressed contents of a grid snapshot, taken after count journal records ending at offset.
+
+    Each square is stored as varints:
+        - SET: layer index + 1 (0 for none), then whether it is inverted
+        - ADD: number of layers, then their indices + 1, oldest first
+        - SEQUENCE: the set of layers as a bit mask
+
+    Big-O notation: O(xy * (log(xy) + l)) where l is the number of layers in a square
+    """
+    out = bytearray(SNAPSHOT_MAGIC)
+    for value in (Grid.DRAW_STYLE_OPTIONS.index(draw_style), x, y, int(flyweight), count, offset):
+        write_varint(out, value)
+    for i in range(x):
+        for j in range(y):
+            square = tree.get(i, j)
+            if isinstance(square, SetLayerState):
+                write_varint(out, _layer_index(square.layer))
+                write_varint(out, int(square.invert))
+            elif isinstance(square, SetLayerStore):
+                write_varint(out, _layer_index(square.color))
+                write_varint(out, int(square.invert))
+            elif isinstance(square, AdditiveLayerStore):
+                layers = square.layers()
+                write_varint(out, len(layers))
+                for layer in layers:
+                    write_varint(out, _layer_index(layer))
+            elif isinstance(square, SequenceLayerStore):
+                write_varint(out, square.bset.elems)
+            else:
+                raise ValueError(f"Cannot save {type(square).__name__}")
+    return zlib.compress(bytes(out))
+
+def decode_snapshot(data: bytes) -> tuple[Grid, int, int]:
+    """
+    Inverse of encode_snapshot.
+
+    :return: (grid, count, offset)
+    :raises ValueError: if data is not a snapshot.
+
+    Big-O notation: O(xy * (log(xy) + l)) where l is the number of layers in a square
+    """
+    try:
+        data = zlib.decompress(data)
+    except zlib.error as error:
+        raise ValueError("Not a snapshot") from error
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("Not a snapshot")
+    offset = len(SNAPSHOT_MAGIC)
+    header = []
+    for _ in range(6):
+        value, offset = read_varint(data, offset)
+        header.append(value)
+    style, x, y, flyweight, count, journal_offset = header
+    grid = Grid(Grid.DRAW_STYLE_OPTIONS[style], x, y, bool(flyweight))
+    for i in range(x):
+        row = grid[i]
+        for j in range(y):
+            if grid.flyweight or grid.draw_style == Grid.DRAW_STYLE_SET:
+                index, offset = read_varint(data, offset)
+                invert, offset = read_varint(data, offset)
+                if grid.flyweight:
+                    square = SetLayerState.get(_layer(index), bool(invert))
+                else:
+                    square = SetLayerStore()
+                    if index != 0:
+                        square.add(_layer(index))
+                    if invert:
+                        square.special()
+            elif grid.draw_style == Grid.DRAW_STYLE_ADD:
+                square = AdditiveLayerStore()
+                length, offset = read_varint(data, offset)
+                for _ in range(length):
+                    index, offset = read_varint(data, offset)
+                    square.add(_layer(index))
+            else:
+                square = SequenceLayerStore()
+                elems, offset = read_varint(data, offset)
+                for layer in get_layers():
+                    if layer is not None and elems >> layer.index & 1:
+                        square.add(layer)
+            row.set(j, square)
+    return grid, count, journal_offset
+
+def _snapshots(directory: str) -> list[tuple[int, str]]:
+    """
+    Returns (count, path) of every snapshot file in directory, latest first.
+    """
+    found = []
+    for name in os.listdir(directory):
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(".bin"):
+            try:
+                found.append((int(name[len(SNAPSHOT_PREFIX):-len(".bin")]), os.path.join(directory, name)))
+            except ValueError:
+                continue
+    found.sort(reverse=True)
+    return found
+
+def recover(directory: str) -> tuple[Grid, int, int]|None:
+    """
+    Rebuilds the grid of the session saved in directory from its latest readable snapshot,
+    then plays the journal records written after it.
+
+    :return: (grid, number of journal records, offset just after the last complete record), or None if nothing was saved.
+
+    Big-O notation: O(snapshot + t * apply) where t is the number of records after the snapshot
+    """
+    if not os.path.isdir(directory):
+        return None
+    for _, path in _snapshots(directory):
+        try:
+            with open(path, "rb") as file:
+                grid, count, offset = decode_snapshot(file.read())
+            break
+        except (OSError, ValueError, IndexError): #written partially, try the one before
+            continue
+    else:
+        return None
+
+    journal = os.path.join(directory, JOURNAL_NAME)
+    if not os.path.exists(journal) or os.path.getsize(journal) <= offset:
+        return grid, count, offset
+    with open(journal, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for action, is_undo, offset in records(data, offset):
+            if is_undo:
+                action.undo_apply(grid)
+            else:
+                action.redo_apply(grid)
+            count += 1
+    return grid, count, offset
+
+
+class Autosave:
+    """
+    Saves a session to a directory as it happens, from a background thread.
+    Has the same append method as JournalWriter, so it can be given to a ReplayTracker as its journal.
+    grid is the grid snapshots are taken from: point it at the new grid whenever the window starts drawing on another one.
+    If the writer fails, it warns once and autosave stops: later actions are no longer saved,
+    but drawing carries on.
+    """
+    SNAPSHOT_INTERVAL = 500
+    KEEP_SNAPSHOTS = 2
+
+    def __init__(self, directory: str, grid: Grid, snapshot_interval: int = SNAPSHOT_INTERVAL, resume: tuple[int, int]|None = None) -> None:
+        """
+        Starts saving the session on grid to directory.
+        - resume: (count, offset) returned by recover to carry on the saved session, otherwise it is replaced.
+          A session whose journal is gone or shorter than offset is started again from the grid instead.
+
+        Big-O notation: O(1) on the calling thread
+        """
+        journal = os.path.join(directory, JOURNAL_NAME)
+        if resume is not None and (not os.path.exists(journal) or os.path.getsize(journal) < resume[1]):
+            resume = None
+        self.directory = directory
+        self.grid = grid
+        self.snapshot_interval = snapshot_interval
+        self.queue = deque() #commands for the writer, appended and popped atomically
+        self.wake = Event()
+        self.count = 0 if resume is None else resume[0] #actions handed over so far
+        self.error: Exception|None = None #why the writer stopped, if it failed, after which nothing more is saved
+        os.makedirs(directory, exist_ok=True)
+        self.queue.append(("start", grid.snapshot(), self._describe(grid), resume))
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.wake.set()
+
+    @staticmethod
+    def _describe(grid: Grid) -> tuple[str, int, int, bool]:
+        return grid.draw_style, grid.x, grid.y, grid.flyweight
+
+    def append(self, action: PaintAction, is_undo: bool = False) -> None:
+        """
+        Hands an action over to be saved, with a snapshot of the grid every snapshot_interval actions.
+        The action should already be applied to the grid. Does nothing once the writer has failed.
+
+        Big-O notation: O(1)
+        """
+        if self.error is not None:
+            return
+        self.queue.append(("action", action, is_undo))
+        self.count += 1
+        if self.count % self.snapshot_interval == 0:
+            self.queue.append(("snapshot", self.grid.snapshot(), self._describe(self.grid)))
+        self.wake.set()
+
+    def reset(self, grid: Grid) -> None:
+        """
+        Forgets the saved session and starts saving a new one on grid.
+
+        Big-O notation: O(1)
+        """
+        if self.error is not None:
+            return
+        self.grid = grid
+        self.count = 0
+        self.queue.append(("start", grid.snapshot(), self._describe(grid), None))
+        self.wake.set()
+
+    def close(self) -> None:
+        """
+        Saves everything handed over so far and stops the writer.
+        """
+        self.queue.append(("close",))
+        self.wake.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        """
+        The writer thread. If it fails, keeps the error in error and warns about it, once.
+        """
+        try:
+            self._drain()
+        except Exception as error:
+            self.error = error
+            warnings.warn(f"Autosave to {self.directory} stopped: {error!r}", RuntimeWarning)
+
+    def _drain(self) -> None:
+        """
+        Drains the queue whenever woken, until closed.
+        """
+        writer = None
+        written = 0 #records in the journal
+        while True:
+            self.wake.wait()
+            self.wake.clear() #before draining, so a command appended meanwhile wakes us again
+            while len(self.queue) > 0:
+                command = self.queue.popleft()
+                if command[0] == "action":
+                    writer.append(command[1], command[2])
+                    written += 1
+                elif command[0] == "snapshot":
+                    writer.flush()
+                    self._write_snapshot(command[1], command[2], written, writer.offset)
+                elif command[0] == "start":
+                    if writer != None:
+                        writer.close()
+                    writer, written = self._start(command[1], command[2], command[3])
+                else:
+                    writer.flush()
+                    writer.close()
+                    return
+            writer.file.flush()
+
+    def _start(self, tree: PersistentQuadTree, description: tuple, resume: tuple[int, int]|None) -> tuple[JournalWriter, int]:
+        """
+        Opens the journal, emptied unless resuming, and writes a snapshot of the starting grid.
+        """
+        path = os.path.join(self.directory, JOURNAL_NAME)
+        if resume is None:
+            for _, snapshot in _snapshots(self.directory):
+                os.remove(snapshot)
+            if os.path.exists(path):
+                os.remove(path)
+            count = 0
+        else:
+            count, offset = resume
+            os.truncate(path, offset) #drop a record cut short by the crash
+        writer = JournalWriter(path)
+        self._write_snapshot(tree, description, count, writer.offset)
+        return writer, count
+
+    def _write_snapshot(self, tree: PersistentQuadTree, description: tuple, count: int, offset: int) -> None:
+        """
+        Writes the snapshot atomically, then removes all but the KEEP_SNAPSHOTS latest.
+        """
+        draw_style, x, y, flyweight = description
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{count:012d}.bin")
+        with open(path + ".tmp", "wb") as file:
+            file.write(encode_snapshot(tree, draw_style, x, y, flyweight, count, offset))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+        for _, old in _snapshots(self.directory)[self.KEEP_SNAPSHOTS:]:
+            os.remove(old)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+"""
+Micro-benchmarks of the core containers in data_structures.
+
+Each case times one operation done n times on a container of size n, with the closest
+standard library structure alongside it as a reference:
+    - ArrayR against list
+    - ArrayStack against list append/pop
+    - CircularQueue, fixed and growable, against collections.deque
+    - ArraySortedList against a list kept sorted with bisect
+    - BSet against a set of ints
+
+Only the standard library is used. Every case is run repeat times and the fastest run is kept,
+as the others only measure interference. Results are printed as a table and can be written as
+JSON; given an earlier JSON file as a baseline, the run fails if any case got slower than
+tolerance times its baseline, so regressions in the containers are caught before release.
+
+    python -m benchmarks.ds_bench --sizes 100 1000 10000 --output ds.json
+    python -m benchmarks.ds_bench --baseline ds.json --tolerance 1.5
+"""
+
+import argparse
+import bisect
+import json
+import platform
+import random
+import sys
+import timeit
+from collections import deque
+from data_structures.array_sorted_list import ArraySortedList
+from data_structures.bset import BSet
+from data_structures.queue_adt import CircularQueue
+from data_structures.referential_array import ArrayR
+from data_structures.sorted_list_adt import ListItem
+from data_structures.stack_adt import ArrayStack
+
+SIZES = (100, 1000, 10000)
+REPEAT = 5
+SEED = 1054
+
+
+def _array_set(impl: str, n: int):
+    array = ArrayR(n) if impl == "ArrayR" else [None] * n
+    def run():
+        for i in range(n):
+            array[i] = i
+    return run
+
+def _array_get(impl: str, n: int):
+    array = ArrayR(n) if impl == "ArrayR" else [None] * n
+    def run():
+        for i in range(n):
+            array[i]
+    return run
+
+def _array_iter(impl: str, n: int):
+    array = ArrayR(n) if impl == "ArrayR" else [None] * n
+    def run():
+        for _ in array:
+            pass
+    return run
+
+def _stack_push_pop(impl: str, n: int):
+    if impl == "list":
+        stack = []
+        def run():
+            for i in range(n):
+                stack.append(i)
+            for _ in range(n):
+                stack.pop()
+    else:
+        stack = ArrayStack(n)
+        def run():
+            for i in range(n):
+                stack.push(i)
+            for _ in range(n):
+                stack.pop()
+    return run
+
+def _queue_append_serve(impl: str, n: int):
+    if impl == "deque":
+        queue = deque()
+        def run():
+            for i in range(n):
+                queue.append(i)
+            for _ in range(n):
+                queue.popleft()
+    else:
+        queue = CircularQueue(n, growable=impl == "CircularQueue(growable)")
+        def run():
+            for i in range(n):
+                queue.append(i)
+            for _ in range(n):
+                queue.serve()
+    return run
+
+def _keys(n: int) -> list[int]:
+    return random.Random(SEED + n).sample(range(10 * n), n)
+
+def _sorted_add(impl: str, n: int):
+    keys = _keys(n)
+    if impl == "bisect":
+        def run():
+            items = []
+            for key in keys:
+                bisect.insort(items, key)
+    else:
+        items = [ListItem(key, key) for key in keys]
+        def run():
+            sorted_list = ArraySortedList(1)
+            for item in items:
+                sorted_list.add(item)
+    return run
+
+def _sorted_bulk_add(impl: str, n: int):
+    keys = _keys(n)
+    if impl == "bisect":
+        def run():
+            sorted(keys)
+    else:
+        items = [ListItem(key, key) for key in keys]
+        def run():
+            ArraySortedList(1).bulk_add(items)
+    return run
+
+def _sorted_search(impl: str, n: int):
+    keys = _keys(n)
+    if impl == "bisect":
+        items = sorted(keys)
+        def run():
+            for key in keys:
+                bisect.bisect_left(items, key)
+    else:
+        sorted_list = ArraySortedList(1)
+        sorted_list.bulk_add([ListItem(key, key) for key in keys])
+        def run():
+            for key in keys:
+                sorted_list.bisect_left(key)
+    return run
+
+def _set_add(impl: str, n: int):
+    if impl == "set":
+        def run():
+            items = set()
+            for i in range(1, n + 1):
+                items.add(i)
+    else:
+        def run():
+            items = BSet()
+            for i in range(1, n + 1):
+                items.add(i)
+    return run
+
+def _set_contains(impl: str, n: int):
+    items = set(range(1, n + 1, 2)) if impl == "set" else BSet()
+    if impl == "BSet":
+        for i in range(1, n + 1, 2):
+            items.add(i)
+    def run():
+        for i in range(1, n + 1):
+            i in items
+    return run
+
+def _set_union(impl: str, n: int):
+    if impl == "set":
+        odd, even = set(range(1, n + 1, 2)), set(range(2, n + 1, 2))
+    else:
+        odd, even = BSet(), BSet()
+        for i in range(1, n + 1):
+            (odd if i % 2 else even).add(i)
+    def run():
+        for _ in range(n):
+            odd.union(even)
+    return run
+
+# structure, operation, setup(impl, n) returning the timed function, implementations
+CASES = (
+    ("ArrayR", "setitem", _array_set, ("ArrayR", "list")),
+    ("ArrayR", "getitem", _array_get, ("ArrayR", "list")),
+    ("ArrayR", "iter", _array_iter, ("ArrayR", "list")),
+    ("ArrayStack", "push+pop", _stack_push_pop, ("ArrayStack", "list")),
+    ("CircularQueue", "append+serve", _queue_append_serve, ("CircularQueue", "CircularQueue(growable)", "deque")),
+    ("ArraySortedList", "add", _sorted_add, ("ArraySortedList", "bisect")),
+    ("ArraySortedList", "bulk_add", _sorted_bulk_add, ("ArraySortedList", "bisect")),
+    ("ArraySortedList", "bisect_left", _sorted_search, ("ArraySortedList", "bisect")),
+    ("BSet", "add", _set_add, ("BSet", "set")),
+    ("BSet", "contains", _set_contains, ("BSet", "set")),
+    ("BSet", "union", _set_union, ("BSet", "set")),
+)
+
+
+def run_cases(sizes=SIZES, repeat: int = REPEAT) -> list[dict]:
+    """
+    Times every case at every size.
+
+    :return: one result per case, implementation and size, with the time per operation in nanoseconds.
+    """
+    results = []
+    for structure, operation, setup, impls in CASES:
+        for n in sizes:
+            for impl in impls:
+                seconds = min(timeit.Timer(setup(impl, n)).repeat(repeat, number=1))
+                results.append({
+                    "structure": structure,
+                    "operation": operation,
+                    "impl": impl,
+                    "size": n,
+                    "ns_per_op": seconds / n * 1e9,
+                })
+    return results
+
+def _key(result: dict) -> tuple:
+    return result["structure"], result["operation"], result["impl"], result["size"]
+
+def regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[tuple[dict, float]]:
+    """
+    Returns (result, baseline time) for every result slower than tolerance times the same case in baseline.
+    """
+    before = {_key(result): result["ns_per_op"] for result in baseline}
+    return [
+        (result, before[_key(result)])
+        for result in results
+        if _key(result) in before and result["ns_per_op"] > tolerance * before[_key(result)]
+    ]
+
+def format_table(results: list[dict]) -> str:
+    """
+    Returns the results as a table, with each time relative to the first implementation of its case.
+    """
+    lines = [f"{'structure':<16}{'operation':<14}{'impl':<25}{'size':>7}{'ns/op':>11}{'ratio':>8}"]
+    reference = {}
+    for result in results:
+        case = (result["structure"], result["operation"], result["size"])
+        reference.setdefault(case, result["ns_per_op"])
+        lines.append(
+            f"{result['structure']:<16}{result['operation']:<14}{result['impl']:<25}{result['size']:>7}"
+            f"{result['ns_per_op']:>11.1f}{result['ns_per_op'] / reference[case]:>8.2f}"
+        )
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the containers in data_structures.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="slowdown over the baseline counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_cases(args.sizes, args.repeat)
+    print(format_table(results))
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "results": results,
+            }, file, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            slower = regressions(results, json.load(file)["results"], args.tolerance)
+        for result, before in slower:
+            print(f"REGRESSION {result['structure']}.{result['operation']} [{result['impl']}, n={result['size']}]: "
+                  f"{before:.1f} -> {result['ns_per_op']:.1f} ns/op")
+        if len(slower) > 0:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
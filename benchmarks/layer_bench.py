@@ -0,0 +1,187 @@
+from __future__ import annotations
+"""
+Benchmark of layer composition, get_color, for each draw style.
+
+Builds layer stores from a seeded random sequence of depth layers drawn from a mix, then times
+    - cell: get_color of one store, once per frame over CELL_FRAMES frames
+    - grid: get_color of every square of a GRID_SIZE x GRID_SIZE grid, as on_draw does each frame
+with the timestamp advancing by one frame each time, so dynamic layers are recomputed the way they
+are when the window is open. No window is needed.
+
+Mixes:
+    - constant: layers that ignore the colour below, so only the topmost one counts
+    - pointwise: layers that map each colour on its own
+    - dynamic: rainbow and sparkle, which change with time and position, with pointwise layers
+    - all: every registered layer
+
+Results are printed as a table and can be written as JSON, where each case also gets a threshold
+of tolerance times its time. Given such a file as a baseline, the run fails if any case is slower
+than the threshold recorded there.
+
+    python -m benchmarks.layer_bench --depths 1 4 16 64 --output layers.json
+    python -m benchmarks.layer_bench --baseline layers.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import layers
+from grid import Grid
+from layer_util import get_layers
+
+MIXES = {
+    "constant": (layers.red, layers.green, layers.blue, layers.black),
+    "pointwise": (layers.lighten, layers.invert, layers.darken),
+    "dynamic": (layers.rainbow, layers.sparkle, layers.lighten, layers.invert, layers.darken),
+    "all": tuple(layer for layer in get_layers() if layer is not None),
+}
+DEPTHS = (1, 4, 16, 64)
+GRID_SIZE = 32
+FRAMES = 5
+CELL_FRAMES = 200
+FRAME_TIME = 1 / 60
+BG = (255, 255, 255)
+SEED = 1054
+
+
+def build_grid(draw_style: str, mix: str, depth: int, size: int = GRID_SIZE, seed: int = SEED) -> Grid:
+    """
+    Returns a size x size grid where every square was given depth layers drawn at random from the mix.
+
+    Big-O notation: O(size^2 * depth * add)
+    """
+    rng = random.Random(f"{seed}/{draw_style}/{mix}/{depth}")
+    choices = MIXES[mix]
+    grid = Grid(draw_style, size, size)
+    for x in range(size):
+        for y in range(size):
+            square = grid[x][y]
+            for _ in range(depth):
+                square.add(rng.choice(choices))
+    return grid
+
+def time_cell(grid: Grid, frames: int = FRAMES) -> float:
+    """
+    Returns the mean time in seconds of get_color on the square in the middle of grid,
+    over CELL_FRAMES consecutive frames, the fastest of frames runs.
+    A single call is too short to time on its own.
+    """
+    x, y = grid.x // 2, grid.y // 2
+    square = grid[x][y]
+    best = float("inf")
+    for _ in range(frames):
+        start = time.perf_counter()
+        for frame in range(CELL_FRAMES):
+            square.get_color(BG, frame * FRAME_TIME, x, y)
+        best = min(best, (time.perf_counter() - start) / CELL_FRAMES)
+    return best
+
+def time_grid(grid: Grid, frames: int = FRAMES) -> float:
+    """
+    Returns the fastest time in seconds of composing every square of grid, over frames frames.
+    """
+    best = float("inf")
+    for frame in range(frames):
+        timestamp = frame * FRAME_TIME
+        start = time.perf_counter()
+        for x in range(grid.x):
+            row = grid[x]
+            for y in range(grid.y):
+                row[y].get_color(BG, timestamp, x, y)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_cases(depths=DEPTHS, mixes=tuple(MIXES), frames: int = FRAMES, size: int = GRID_SIZE) -> list[dict]:
+    """
+    Times composition of every draw style, mix and depth.
+
+    :return: one result per case and kind, cell or grid, with the time in microseconds.
+    """
+    results = []
+    for draw_style in Grid.DRAW_STYLE_OPTIONS:
+        for mix in mixes:
+            for depth in depths:
+                grid = build_grid(draw_style, mix, depth, size)
+                for kind, seconds in (("cell", time_cell(grid, frames)), ("grid", time_grid(grid, frames))):
+                    results.append({
+                        "draw_style": draw_style,
+                        "mix": mix,
+                        "depth": depth,
+                        "kind": kind,
+                        "us": seconds * 1e6,
+                    })
+    return results
+
+def _key(result: dict) -> tuple:
+    return result["draw_style"], result["mix"], result["depth"], result["kind"]
+
+def add_thresholds(results: list[dict], tolerance: float) -> None:
+    """
+    Records in every result the time, tolerance times its own, that later runs should stay under.
+    """
+    for result in results:
+        result["threshold_us"] = result["us"] * tolerance
+
+def regressions(results: list[dict], baseline: list[dict]) -> list[tuple[dict, float]]:
+    """
+    Returns (result, threshold) for every result slower than the threshold of the same case in baseline.
+    """
+    thresholds = {_key(result): result["threshold_us"] for result in baseline}
+    return [
+        (result, thresholds[_key(result)])
+        for result in results
+        if _key(result) in thresholds and result["us"] > thresholds[_key(result)]
+    ]
+
+def format_table(results: list[dict]) -> str:
+    """
+    Returns the results as a table with one row per case and a column per draw style.
+    """
+    styles = Grid.DRAW_STYLE_OPTIONS
+    table = {}
+    for result in results:
+        table.setdefault((result["kind"], result["mix"], result["depth"]), {})[result["draw_style"]] = result["us"]
+    lines = [f"{'kind':<6}{'mix':<11}{'depth':>6}" + "".join(f"{style + ' us':>16}" for style in styles)]
+    for (kind, mix, depth), times in table.items():
+        lines.append(f"{kind:<6}{mix:<11}{depth:>6}" + "".join(f"{times.get(style, float('nan')):>16.2f}" for style in styles))
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark layer composition for each draw style.")
+    parser.add_argument("--depths", type=int, nargs="+", default=list(DEPTHS))
+    parser.add_argument("--mixes", nargs="+", choices=list(MIXES), default=list(MIXES))
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--size", type=int, default=GRID_SIZE, help="width and height of the grid")
+    parser.add_argument("--output", help="file to write the results and their thresholds to as JSON")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="threshold written for each case, relative to its time")
+    parser.add_argument("--baseline", help="JSON results of an earlier run whose thresholds to check")
+    args = parser.parse_args(argv)
+
+    results = run_cases(args.depths, args.mixes, args.frames, args.size)
+    add_thresholds(results, args.tolerance)
+    print(format_table(results))
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "grid_size": args.size,
+                "frames": args.frames,
+                "results": results,
+            }, file, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            slower = regressions(results, json.load(file)["results"])
+        for result, threshold in slower:
+            print(f"REGRESSION {result['draw_style']} {result['mix']} depth {result['depth']} {result['kind']}: "
+                  f"{result['us']:.2f} us over {threshold:.2f} us")
+        if len(slower) > 0:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
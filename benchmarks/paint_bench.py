@@ -0,0 +1,144 @@
+from __future__ import annotations
+"""
+Painting throughput benchmark.
+
+Plays a seeded synthetic session, see workload, on the painting logic of the window for each draw
+style, as fast as it can and without a window, and reports:
+    - dabs/s: brush dabs, calls of on_paint, per second of stroke handling
+    - cells/s: squares under those dabs per second
+    - history: approximate memory held by the undo and replay histories at the end, in bytes
+    - p50 and p99 latency of each kind of event, in microseconds
+
+    python -m benchmarks.paint_bench --seed 1 --strokes 500 --output paint.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+from time import perf_counter_ns
+from action import stencil
+from grid import Grid
+from painter import Painter
+from benchmarks import workload
+
+GRID_SIZE = 32
+CANVAS = 700 #pixels, the height of the window's drawing panel
+STROKES = 300
+SEED = 1054
+
+
+class BenchPainter(Painter):
+    """
+    The painting logic with the stroke state MyWindow keeps, counting dabs.
+    """
+    GRID_SIZE_X = GRID_SIZE
+    GRID_SIZE_Y = GRID_SIZE
+    GRID_SQ_WIDTH = CANVAS / GRID_SIZE
+    GRID_SQ_HEIGHT = CANVAS / GRID_SIZE
+
+    def __init__(self, draw_style: str) -> None:
+        self.grid = Grid(draw_style, self.GRID_SIZE_X, self.GRID_SIZE_Y)
+        self.selected_layer_index = -1
+        self.prev_drawn = None
+        self.prev_pos = None
+        self.dabs = 0
+        self.cells = 0
+        self.on_init()
+        self.on_reset()
+
+    def on_paint(self, layer, px, py):
+        self.dabs += 1
+        self.cells += len(stencil(self.grid.brush_size))
+        Painter.on_paint(self, layer, px, py)
+
+    def history_bytes(self) -> int:
+        """
+        Approximate memory held by the actions in the undo and replay histories.
+        """
+        undo = self.undo_action
+        total = 0
+        for stack in (undo.stack_undo, undo.stack_redo):
+            total += sum(stack[i].nbytes() for i in range(len(stack)))
+        actions = self.replay_action.actions
+        total += sum(actions[i][0].nbytes() for i in range(len(actions)))
+        return total
+
+
+def _percentile(sorted_times: list[int], fraction: float) -> float:
+    return sorted_times[min(len(sorted_times) - 1, int(fraction * len(sorted_times)))]
+
+def run(draw_style: str, events: list[tuple]) -> dict:
+    """
+    Plays events on a new BenchPainter for draw_style, timing every event.
+
+    :return: the throughput, history size and latencies of the session.
+    """
+    painter = BenchPainter(draw_style)
+    times = {kind: [] for kind in workload.KINDS}
+    for event in events:
+        start = perf_counter_ns()
+        workload.apply(painter, event)
+        times[event[0]].append(perf_counter_ns() - start)
+
+    stroke_seconds = (sum(times[workload.PRESS]) + sum(times[workload.DRAG])) / 1e9
+    latency = {}
+    for kind, kind_times in times.items():
+        if len(kind_times) == 0:
+            continue
+        kind_times.sort()
+        latency[kind] = {
+            "count": len(kind_times),
+            "p50_us": _percentile(kind_times, 0.5) / 1e3,
+            "p99_us": _percentile(kind_times, 0.99) / 1e3,
+            "mean_us": statistics.fmean(kind_times) / 1e3,
+        }
+    return {
+        "draw_style": draw_style,
+        "events": len(events),
+        "dabs": painter.dabs,
+        "cells": painter.cells,
+        "dabs_per_s": painter.dabs / stroke_seconds if stroke_seconds > 0 else 0.0,
+        "cells_per_s": painter.cells / stroke_seconds if stroke_seconds > 0 else 0.0,
+        "history_bytes": painter.history_bytes(),
+        "latency": latency,
+    }
+
+def format_report(results: list[dict]) -> str:
+    lines = [f"{'style':<10}{'dabs':>8}{'dabs/s':>11}{'cells/s':>12}{'history B':>12}"]
+    for result in results:
+        lines.append(f"{result['draw_style']:<10}{result['dabs']:>8}{result['dabs_per_s']:>11.0f}"
+                     f"{result['cells_per_s']:>12.0f}{result['history_bytes']:>12}")
+    lines.append("")
+    lines.append(f"{'style':<10}{'event':<9}{'count':>7}{'p50 us':>10}{'p99 us':>10}")
+    for result in results:
+        for kind, stats in result["latency"].items():
+            lines.append(f"{result['draw_style']:<10}{kind:<9}{stats['count']:>7}{stats['p50_us']:>10.1f}{stats['p99_us']:>10.1f}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark painting throughput for each draw style.")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--strokes", type=int, default=STROKES)
+    parser.add_argument("--styles", nargs="+", choices=list(Grid.DRAW_STYLE_OPTIONS), default=list(Grid.DRAW_STYLE_OPTIONS))
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    args = parser.parse_args(argv)
+
+    events = workload.generate(args.seed, args.strokes, CANVAS, CANVAS)
+    results = [run(draw_style, events) for draw_style in args.styles]
+    print(format_report(results))
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "strokes": args.strokes,
+                "results": results,
+            }, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+from __future__ import annotations
+"""
+Seeded synthetic painting sessions.
+
+generate returns a list of events that look like someone using the window: strokes dragged across
+the canvas with a wandering direction and speed, layer and brush size changes between strokes,
+bursts of undos from holding ctrl+z, sometimes followed by redos, and the odd special. The same seed
+always gives the same session.
+
+Events are tuples whose first item is their kind:
+    - (PRESS, x, y), (DRAG, x, y), (RELEASE,): a stroke, in pixels
+    - (LAYER, index): select the layer at index of get_layers()
+    - (BRUSH, +1 or -1): increase or decrease the brush size
+    - (UNDO, n), (REDO, n): n undos or redos in one frame
+    - (SPECIAL,)
+
+apply plays one event on a Painter, the way MyWindow's input handlers do.
+"""
+
+import math
+import random
+from layer_util import get_layers
+
+PRESS = "press"
+DRAG = "drag"
+RELEASE = "release"
+LAYER = "layer"
+BRUSH = "brush"
+UNDO = "undo"
+REDO = "redo"
+SPECIAL = "special"
+
+KINDS = (PRESS, DRAG, RELEASE, LAYER, BRUSH, UNDO, REDO, SPECIAL)
+
+
+def generate(seed: int, strokes: int, width: float, height: float,
+             mean_stroke: int = 30, undo_chance: float = 0.15, special_chance: float = 0.03) -> list[tuple]:
+    """
+    Returns the events of a session of strokes strokes on a canvas of width x height pixels.
+
+    - mean_stroke: the mean number of mouse motions in a stroke
+    - undo_chance: the chance of a burst of undos after a stroke
+    - special_chance: the chance of a special after a stroke
+
+    Big-O notation: O(strokes * mean_stroke)
+    """
+    rng = random.Random(seed)
+    layer_count = len([layer for layer in get_layers() if layer is not None])
+    events = [(LAYER, rng.randrange(layer_count))]
+    for _ in range(strokes):
+        if rng.random() < 0.2:
+            events.append((LAYER, rng.randrange(layer_count)))
+        if rng.random() < 0.1:
+            events.append((BRUSH, rng.choice((-1, 1))))
+
+        x, y = rng.uniform(0, width), rng.uniform(0, height)
+        heading = rng.uniform(0, 2 * math.pi)
+        speed = rng.uniform(4, 20) #pixels per mouse motion
+        events.append((PRESS, x, y))
+        for _ in range(1 + int(rng.expovariate(1 / mean_stroke))):
+            heading += rng.gauss(0, 0.3)
+            speed = min(40, max(1, speed * rng.uniform(0.8, 1.25)))
+            x += speed * math.cos(heading)
+            y += speed * math.sin(heading)
+            if not 0 <= x < width: #bounce off the edges, as people rarely drag off the canvas
+                heading = math.pi - heading
+                x = min(max(x, 0), width - 1)
+            if not 0 <= y < height:
+                heading = -heading
+                y = min(max(y, 0), height - 1)
+            events.append((DRAG, x, y))
+        events.append((RELEASE,))
+
+        if rng.random() < undo_chance:
+            undos = 1 + int(rng.expovariate(1 / 3))
+            events.extend([(UNDO, 1)] * undos)
+            if rng.random() < 0.5:
+                events.extend([(REDO, 1)] * rng.randint(1, undos))
+        if rng.random() < special_chance:
+            events.append((SPECIAL,))
+    return events
+
+def apply(painter, event: tuple) -> None:
+    """
+    Plays event on painter, a Painter with its stroke state.
+
+    Big-O notation: O(the painting method called)
+    """
+    kind = event[0]
+    if kind == PRESS:
+        painter.prev_drawn = None
+        painter.prev_pos = None
+        painter.try_draw(event[1], event[2])
+    elif kind == DRAG:
+        painter.try_draw(event[1], event[2])
+    elif kind == RELEASE:
+        painter.prev_drawn = None
+        painter.prev_pos = None
+    elif kind == LAYER:
+        painter.selected_layer_index = event[1]
+    elif kind == BRUSH:
+        if event[1] > 0:
+            painter.on_increase_brush_size()
+        else:
+            painter.on_decrease_brush_size()
+    elif kind == UNDO:
+        painter.on_undo(event[1])
+    elif kind == REDO:
+        painter.on_redo(event[1])
+    elif kind == SPECIAL:
+        painter.on_special()
+    else:
+        raise ValueError(f"Unknown event {kind}")
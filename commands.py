@@ -0,0 +1,89 @@
+from __future__ import annotations
+"""
+Commands sent to the window from another thread.
+
+run_with_func drives the window from a second thread while arcade draws it from its own. Rather than
+changing the grid under on_draw's feet, the second thread is given a WindowProxy: calling one of its
+COMMANDS only queues the call on a CommandChannel, and the window applies everything queued at the start
+of its next on_update, on the arcade thread. The channel is a single producer, single consumer queue,
+so neither thread ever waits on a lock, and the producer only waits when the queue is full.
+
+Queued undos and redos in a row are applied as one batched undo or redo.
+"""
+
+import time
+from functools import partial
+from data_structures.spsc_queue import SPSCQueue
+
+COMMANDS = frozenset((
+    "on_paint", "on_undo", "on_redo", "on_special",
+    "on_increase_brush_size", "on_decrease_brush_size",
+    "change_draw_mode", "start_replay",
+))
+BATCHED = frozenset(("on_undo", "on_redo"))
+
+
+class CommandChannel:
+    """
+    Queues window method calls from one thread, to be applied by another.
+    """
+    CAPACITY = 1024
+    RETRY_DELAY = 0.001 # seconds the producer sleeps while the queue is full
+
+    def __init__(self, capacity: int = CAPACITY) -> None:
+        """
+        Big-O notation: O(capacity)
+        """
+        self.queue = SPSCQueue(capacity)
+
+    def send(self, name: str, *args) -> None:
+        """
+        Queues a call of the window method name with args, from the producer thread.
+        Waits while the queue is full.
+
+        Big-O notation: O(1) while the queue is not full
+        """
+        if name not in COMMANDS:
+            raise ValueError(f"{name} is not a window command")
+        command = (name, args)
+        while not self.queue.try_append(command):
+            time.sleep(self.RETRY_DELAY)
+
+    def drain(self, window, max_commands: int|None = None) -> int:
+        """
+        Applies up to max_commands queued calls to window in order, all of them by default,
+        from the consumer thread. Undos or redos in a row become a single call with their total.
+
+        :return: the number of commands applied.
+
+        Big-O notation: O(k * command) where k is the number of commands applied
+        """
+        commands = self.queue.serve_many(max_commands)
+        i = 0
+        while i < len(commands):
+            name, args = commands[i]
+            i += 1
+            if name in BATCHED:
+                n = args[0] if len(args) > 0 else 1
+                while i < len(commands) and commands[i][0] == name:
+                    n += commands[i][1][0] if len(commands[i][1]) > 0 else 1
+                    i += 1
+                args = (n,)
+            getattr(window, name)(*args)
+        return len(commands)
+
+
+class WindowProxy:
+    """
+    Stands in for a window on another thread: its COMMANDS are sent through the channel,
+    anything else is read from the window itself.
+    """
+
+    def __init__(self, window, channel: CommandChannel) -> None:
+        self._window = window
+        self._channel = channel
+
+    def __getattr__(self, name: str):
+        if name in COMMANDS:
+            return partial(self._channel.send, name)
+        return getattr(self._window, name)
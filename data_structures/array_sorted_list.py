@@ -3,6 +3,7 @@
     Items to store should be of time ListItem.
 """
 
+from heapq import merge
 from data_structures.referential_array import ArrayR
 from data_structures.sorted_list_adt import *
 
@@ -51,29 +52,23 @@ class ArraySortedList(SortedList[T]):
 
     def __contains__(self, item: ListItem):
         """ Checks if value is in the list. """
-        for i in range(len(self)):
-            if self.array[i] == item:
-                return True
-        return False
+        return item in self.array[:len(self)]
 
     def _shuffle_right(self, index: int) -> None:
         """ Shuffle items to the right up to a given position. """
-        for i in range(len(self), index, -1):
-            self.array[i] = self.array[i - 1]
+        self.array.copy_from(self.array, index, index + 1, len(self) - index)
 
     def _shuffle_left(self, index: int) -> None:
         """ Shuffle items starting at a given position to the left. """
-        for i in range(index, len(self)):
-            self.array[i] = self.array[i + 1]
+        self.array.copy_from(self.array, index + 1, index, len(self) - index)
 
     def _resize(self) -> None:
         """ Resize the list. """
         # doubling the size of our list
         new_array = ArrayR(2 * len(self.array))
 
-        # copying the contents
-        for i in range(self.length):
-            new_array[i] = self.array[i]
+        # copying the contents in one block
+        new_array.copy_from(self.array, 0, 0, self.length)
 
         # referring to the new array
         self.array = new_array
@@ -88,10 +83,10 @@ class ArraySortedList(SortedList[T]):
         return item
 
     def index(self, item: ListItem) -> int:
-        """ Find the position of a given item in the list. """
-        pos = self._index_to_add(item)
-        if pos < len(self) and self[pos] == item:
-            return pos
+        """ Find the position of a given item in the list, among the items with the same key. """
+        for pos in range(self.bisect_left(item.key), self.bisect_right(item.key)):
+            if self[pos] == item:
+                return pos
         raise ValueError('item not in list')
 
     def is_full(self):
@@ -109,18 +104,52 @@ class ArraySortedList(SortedList[T]):
         self[position] = item
         self.length += 1
 
-    def _index_to_add(self, item: ListItem) -> int:
-        """ Find the position where the new item should be placed. """
-        low = 0
-        high = len(self) - 1
+    def bulk_add(self, items) -> None:
+        """ Add many elements at once: sorts them, then merges them with the list in one pass.
+        Items with the same key keep their order, after those already in the list.
+        :complexity: O(n + k log k) where n is the length of the list and k the number of items
+        """
+        items = sorted(items, key=_key)
+        if len(items) == 0:
+            return
+        total = len(self) + len(items)
+        new_array = ArrayR(max(len(self.array), total))
+        new_array[:total] = list(merge(self.array[:len(self)], items, key=_key))
+        self.array = new_array
+        self.length = total
 
-        while low <= high:
+    def bisect_left(self, key) -> int:
+        """ Position of the first item whose key is not less than key.
+        :complexity: O(log n)
+        """
+        low = 0
+        high = len(self)
+        while low < high:
             mid = (low + high) // 2
-            if self[mid].key < item.key:
+            if self.array[mid].key < key:
                 low = mid + 1
-            elif self[mid].key > item.key:
-                high = mid - 1
             else:
-                return mid
+                high = mid
+        return low
 
+    def bisect_right(self, key) -> int:
+        """ Position just after the last item whose key is not greater than key.
+        :complexity: O(log n)
+        """
+        low = 0
+        high = len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if key < self.array[mid].key:
+                high = mid
+            else:
+                low = mid + 1
         return low
+
+    def _index_to_add(self, item: ListItem) -> int:
+        """ Find the position where the new item should be placed, after any with the same key. """
+        return self.bisect_right(item.key)
+
+
+def _key(item: ListItem):
+    return item.key
@@ -0,0 +1,279 @@
+""" Order statistic tree: a persistent balanced search tree indexed by position.
+
+Implements the SortedList ADT with an AVL tree whose nodes also count the
+items below them, so the item at any position (select) and the position
+of any key (rank) are found in O(log n) by walking down from the root.
+Nodes are never changed once built: an update copies the O(log n) nodes
+on its path and shares the rest, so copy() is O(1) and copies never see
+each other's changes.
+Also defines UnitTests for the class.
+"""
+from __future__ import annotations
+__author__ = "XXXXX student"
+__docformat__ = 'reStructuredText'
+
+import unittest
+from data_structures.sorted_list_adt import SortedList, ListItem, T
+
+class _Node:
+    """ An immutable tree node. size is the number of items in the subtree. """
+    __slots__ = ('item', 'left', 'right', 'height', 'size')
+
+    def __init__(self, item: ListItem, left: _Node|None, right: _Node|None) -> None:
+        self.item = item
+        self.left = left
+        self.right = right
+        self.height = 1 + max(_height(left), _height(right))
+        self.size = 1 + _size(left) + _size(right)
+
+def _height(node: _Node|None) -> int:
+    return 0 if node is None else node.height
+
+def _size(node: _Node|None) -> int:
+    return 0 if node is None else node.size
+
+def _balance(item: ListItem, left: _Node|None, right: _Node|None) -> _Node:
+    """ Builds a node from item and two subtrees whose heights differ by at most 2,
+    rotating so that they differ by at most 1.
+    :complexity: O(1)
+    """
+    if _height(left) > _height(right) + 1:
+        if _height(left.left) < _height(left.right): #left-right case
+            left = _Node(left.right.item, _Node(left.item, left.left, left.right.left), left.right.right)
+        return _Node(left.item, left.left, _Node(item, left.right, right))
+    if _height(right) > _height(left) + 1:
+        if _height(right.right) < _height(right.left): #right-left case
+            right = _Node(right.left.item, right.left.left, _Node(right.item, right.left.right, right.right))
+        return _Node(right.item, _Node(item, left, right.left), right.right)
+    return _Node(item, left, right)
+
+def _insert_at(node: _Node|None, index: int, item: ListItem) -> _Node:
+    """ Returns a copy of the subtree with item inserted at position index.
+    :complexity: O(log n)
+    """
+    if node is None:
+        return _Node(item, None, None)
+    if index <= _size(node.left):
+        return _balance(node.item, _insert_at(node.left, index, item), node.right)
+    return _balance(node.item, node.left, _insert_at(node.right, index - _size(node.left) - 1, item))
+
+def _delete_at(node: _Node, index: int) -> tuple[_Node|None, ListItem]:
+    """ Returns a copy of the subtree without the item at position index, and that item.
+    :complexity: O(log n)
+    """
+    here = _size(node.left)
+    if index < here:
+        left, item = _delete_at(node.left, index)
+        return _balance(node.item, left, node.right), item
+    if index > here:
+        right, item = _delete_at(node.right, index - here - 1)
+        return _balance(node.item, node.left, right), item
+    if node.left is None:
+        return node.right, node.item
+    if node.right is None:
+        return node.left, node.item
+    right, successor = _delete_at(node.right, 0)
+    return _balance(successor, node.left, right), node.item
+
+
+class OrderStatisticTree(SortedList[T]):
+    """ SortedList ADT implemented with a persistent AVL tree.
+
+    Attributes:
+         length (int): number of items (inherited)
+         root (_Node): the root of the tree, None if empty
+    """
+
+    def __init__(self, root: _Node|None = None) -> None:
+        """ Creates a list holding the items of root, empty by default.
+        :complexity: O(1)
+        """
+        SortedList.__init__(self)
+        self.root = root
+        self.length = _size(root)
+
+    def _set_root(self, root: _Node|None) -> None:
+        self.root = root
+        self.length = _size(root)
+
+    def copy(self) -> OrderStatisticTree[T]:
+        """ Returns an independent list with the same items, sharing every node.
+        :complexity: O(1)
+        """
+        return OrderStatisticTree(self.root)
+
+    def select(self, k: int) -> ListItem:
+        """ Returns the item at position k, 0 being the smallest key.
+        :raises IndexError: if there is no such position
+        :complexity: O(log n)
+        """
+        if not 0 <= k < len(self):
+            raise IndexError('No such index in the list')
+        node = self.root
+        while True:
+            here = _size(node.left)
+            if k < here:
+                node = node.left
+            elif k > here:
+                k -= here + 1
+                node = node.right
+            else:
+                return node.item
+
+    def rank(self, key) -> int:
+        """ Returns the number of items whose key is less than key,
+        i.e. the position of the first item with key if any.
+        :complexity: O(log n)
+        """
+        return self.bisect_left(key)
+
+    def bisect_left(self, key) -> int:
+        """ Position of the first item whose key is not less than key.
+        :complexity: O(log n)
+        """
+        position = 0
+        node = self.root
+        while node is not None:
+            if node.item.key < key:
+                position += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return position
+
+    def bisect_right(self, key) -> int:
+        """ Position just after the last item whose key is not greater than key.
+        :complexity: O(log n)
+        """
+        position = 0
+        node = self.root
+        while node is not None:
+            if node.item.key <= key:
+                position += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return position
+
+    def __getitem__(self, index: int) -> ListItem:
+        """ Magic method. Return the element at a given position.
+        :complexity: O(log n)
+        """
+        return self.select(index)
+
+    def __setitem__(self, index: int, item: ListItem) -> None:
+        """ Magic method. Insert the item at a given position,
+            if possible (!). Shift the following elements to the right.
+        :raises IndexError: if the item does not belong at that position
+        :complexity: O(log n)
+        """
+        if not 0 <= index <= len(self) or \
+                (index > 0 and self[index - 1].key > item.key) or \
+                (index < len(self) and item.key > self[index].key):
+            raise IndexError('Element should be inserted in sorted order')
+        self._set_root(_insert_at(self.root, index, item))
+
+    def __iter__(self):
+        """ Iterates over the items in order of key.
+        :complexity: O(n) in total, O(log n) memory
+        """
+        stack = []
+        node = self.root
+        while len(stack) > 0 or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield node.item
+                node = node.right
+
+    def add(self, item: ListItem) -> None:
+        """ Add new element to the list, after any with the same key.
+        :complexity: O(log n)
+        """
+        self._set_root(_insert_at(self.root, self.bisect_right(item.key), item))
+
+    def delete_at_index(self, index: int) -> ListItem:
+        """ Delete item at a given position.
+        :raises IndexError: if there is no such position
+        :complexity: O(log n)
+        """
+        if not 0 <= index < len(self):
+            raise IndexError('No such index in the list')
+        root, item = _delete_at(self.root, index)
+        self._set_root(root)
+        return item
+
+    def index(self, item: ListItem) -> int:
+        """ Find the position of a given item in the list, among the items with the same key.
+        :raises ValueError: if the item is not in the list
+        :complexity: O(log n * d) where d is the number of items with the same key
+        """
+        for position in range(self.bisect_left(item.key), self.bisect_right(item.key)):
+            if self[position] == item:
+                return position
+        raise ValueError('item not in list')
+
+    def clear(self) -> None:
+        """ Clear the list.
+        :complexity: O(1)
+        """
+        self._set_root(None)
+
+
+class TestOrderStatisticTree(unittest.TestCase):
+    """ Tests for the above class."""
+
+    def check(self, tree: OrderStatisticTree, keys: list) -> None:
+        self.assertEqual(len(tree), len(keys))
+        self.assertEqual([item.key for item in tree], keys)
+        self.assertEqual([tree.select(k).key for k in range(len(keys))], keys)
+        self.assertLessEqual(_height(tree.root), 1.45 * len(keys).bit_length() + 1)
+
+    def test_add_select_rank(self):
+        tree = OrderStatisticTree()
+        keys = [(i * 37) % 101 for i in range(101)]
+        for key in keys:
+            tree.add(ListItem(str(key), key))
+        self.check(tree, sorted(keys))
+        self.assertEqual(tree.rank(50), 50)
+        self.assertEqual(tree.rank(1000), 101)
+        self.assertRaises(IndexError, tree.select, 101)
+
+    def test_delete(self):
+        tree = OrderStatisticTree()
+        items = [ListItem(i, i % 10) for i in range(60)]
+        for item in items:
+            tree.add(item)
+        keys = sorted(item.key for item in items)
+        for item in items[::3]:
+            tree.remove(item)
+            keys.remove(item.key)
+            self.check(tree, keys)
+        self.assertEqual(tree.delete_at_index(0).key, keys.pop(0))
+        self.check(tree, keys)
+        self.assertRaises(ValueError, tree.index, items[0])
+
+    def test_setitem(self):
+        tree = OrderStatisticTree()
+        tree[0] = ListItem('b', 2)
+        tree[0] = ListItem('a', 1)
+        tree[2] = ListItem('c', 3)
+        self.check(tree, [1, 2, 3])
+        self.assertRaises(IndexError, tree.__setitem__, 0, ListItem('d', 4))
+
+    def test_copy(self):
+        tree = OrderStatisticTree()
+        for key in range(10):
+            tree.add(ListItem(key, key))
+        copy = tree.copy()
+        tree.delete_at_index(3)
+        copy.add(ListItem(20, 20))
+        self.check(tree, [0, 1, 2, 4, 5, 6, 7, 8, 9])
+        self.check(copy, list(range(10)) + [20])
+
+if __name__ == '__main__':
+    testtorun = TestOrderStatisticTree()
+    suite = unittest.TestLoader().loadTestsFromModule(testtorun)
+    unittest.TextTestRunner().run(suite)
@@ -0,0 +1,136 @@
+""" Persistent quadtree: an immutable two-dimensional array with structure sharing.
+
+Every internal node is a tuple of four children and the leaves are the
+values. Setting a value never changes a node: it copies the nodes on the
+path from the root down to that leaf and shares every other node with the
+previous version. Both versions stay valid, so keeping an old version
+around (a snapshot) is O(1) and costs memory only for what changes after.
+Also defines UnitTests for the class.
+"""
+__author__ = "XXXXX student"
+__docformat__ = 'reStructuredText'
+
+import unittest
+from typing import Callable, Generic
+from data_structures.referential_array import T
+
+class PersistentQuadTree(Generic[T]):
+    """ Immutable square array of values, indexed by (x, y).
+
+    Attributes:
+         size (int): side of the square, a power of two
+         root: the root node, a tuple of four children or a value if size is 1
+
+    A child is picked by the next bit of x and y, from the most significant one.
+    """
+
+    def __init__(self, size: int, fill: T = None, root = None) -> None:
+        """ Creates a tree at least size wide, with every position holding fill.
+        Every node of a level is the same shared node, so this only builds log(size) nodes.
+        :complexity: O(log size)
+        :pre: size > 0
+        """
+        if size <= 0:
+            raise ValueError("Tree size should be larger than 0.")
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        if root is None:
+            root = fill
+            width = 1
+            while width < self.size:
+                root = (root, root, root, root)
+                width *= 2
+        self.root = root
+
+    def get(self, x: int, y: int) -> T:
+        """ Returns the value at position (x, y).
+        :complexity: O(log size)
+        :pre: 0 <= x, y < size
+        """
+        node = self.root
+        half = self.size >> 1
+        while half:
+            node = node[(bool(x & half) << 1) | bool(y & half)]
+            half >>= 1
+        return node
+
+    def set(self, x: int, y: int, value: T) -> 'PersistentQuadTree[T]':
+        """ Returns a new version of the tree with value at position (x, y).
+        This version is left unchanged.
+        :complexity: O(log size) for best/worst case, log size new nodes
+        :pre: 0 <= x, y < size
+        """
+        path = []
+        node = self.root
+        half = self.size >> 1
+        while half:
+            child = (bool(x & half) << 1) | bool(y & half)
+            path.append((node, child))
+            node = node[child]
+            half >>= 1
+        node = value
+        for parent, child in reversed(path):
+            node = parent[:child] + (node,) + parent[child + 1:]
+        return PersistentQuadTree(self.size, root=node)
+
+    def map(self, func: Callable[[T], T]) -> 'PersistentQuadTree[T]':
+        """ Returns a new version of the tree with func applied to every value.
+        A node shared several times is only mapped once, and the results stay shared.
+        :complexity: O(d) where d is the number of distinct nodes
+        """
+        mapped = {}
+        def visit(node, width):
+            key = id(node)
+            if key not in mapped:
+                if width == 1:
+                    mapped[key] = func(node)
+                else:
+                    mapped[key] = tuple(visit(child, width // 2) for child in node)
+            return mapped[key]
+        return PersistentQuadTree(self.size, root=visit(self.root, self.size))
+
+
+class TestPersistentQuadTree(unittest.TestCase):
+    """ Tests for the above class."""
+
+    def test_fill(self):
+        tree = PersistentQuadTree(5, 0)
+        self.assertEqual(tree.size, 8)
+        for x in range(8):
+            for y in range(8):
+                self.assertEqual(tree.get(x, y), 0)
+
+    def test_set_is_persistent(self):
+        empty = PersistentQuadTree(8, 0)
+        tree = empty
+        for x in range(8):
+            for y in range(8):
+                tree = tree.set(x, y, x * 8 + y)
+        snapshot = tree
+        tree = tree.set(3, 5, -1)
+        self.assertEqual(tree.get(3, 5), -1)
+        self.assertEqual(snapshot.get(3, 5), 29)
+        self.assertEqual(empty.get(3, 5), 0)
+        for x in range(8):
+            for y in range(8):
+                if (x, y) != (3, 5):
+                    self.assertEqual(tree.get(x, y), x * 8 + y)
+        # Only the path to (3, 5) was copied.
+        self.assertIs(tree.root[0], snapshot.root[0])
+        self.assertIsNot(tree.root[1], snapshot.root[1])
+
+    def test_map(self):
+        calls = []
+        def double(v):
+            calls.append(v)
+            return 2 * v
+        tree = PersistentQuadTree(16, 1).set(2, 2, 5).map(double)
+        self.assertEqual(tree.get(2, 2), 10)
+        self.assertEqual(tree.get(15, 0), 2)
+        self.assertEqual(sorted(calls), [1, 5])
+
+if __name__ == '__main__':
+    testtorun = TestPersistentQuadTree()
+    suite = unittest.TestLoader().loadTestsFromModule(testtorun)
+    unittest.TextTestRunner().run(suite)
@@ -10,6 +10,7 @@ import unittest
 from abc import ABC, abstractmethod
 from typing import Generic
 from data_structures.referential_array import ArrayR, T
+from data_structures.typed_array import ArrayT
 
 class Queue(ABC, Generic[T]):
     """ Abstract class for a generic Queue. """
@@ -51,26 +52,49 @@ class CircularQueue(Queue[T]):
          length (int): number of elements in the stack (inherited)
          front (int): index of the element at the front of the queue
          rear (int): index of the first empty space at the back of the queue
-         array (ArrayR[T]): array storing the elements of the queue
+         array (ArrayR[T] or ArrayT): array storing the elements of the queue
+         max_capacity (int): maximum number of elements
 
     ArrayR cannot create empty arrays. So MIN_CAPACITY used to avoid this.
+    A growable queue starts with INITIAL_CAPACITY and doubles its array when it fills up,
+    up to max_capacity. With shrink, it also halves its array when it is a quarter full.
     """
     MIN_CAPACITY = 1
+    INITIAL_CAPACITY = 16
 
-    def __init__(self,max_capacity:int) -> None:
+    def __init__(self,max_capacity:int, typecode: str|None = None, growable: bool = False, shrink: bool = False) -> None:
+        """ Initialises an empty queue with the given capacity.
+            With a typecode, the elements are numbers stored unboxed in an ArrayT.
+            With growable, the array grows on demand instead of being allocated up front,
+            and with shrink it also shrinks as the queue drains.
+        """
         Queue.__init__(self)
         self.front = 0
         self.rear = 0
-        self.array = ArrayR(max(self.MIN_CAPACITY,max_capacity))
+        self.typecode = typecode
+        self.max_capacity = max(self.MIN_CAPACITY,max_capacity)
+        self.growable = growable
+        self.shrink = growable and shrink
+        self.array = self._new_array(self._initial_capacity())
+
+    def _initial_capacity(self) -> int:
+        return min(self.INITIAL_CAPACITY, self.max_capacity) if self.growable else self.max_capacity
 
+    def _new_array(self, capacity: int):
+        if self.typecode is None:
+            return ArrayR(capacity)
+        return ArrayT(capacity, self.typecode)
 
     def append(self, item: T) -> None:
         """ Adds an element to the rear of the queue.
         :pre: queue is not full
         :raises Exception: if the queue is full
+        :complexity: O(1), amortised when growable
         """
         if self.is_full():
             raise Exception("Queue is full")
+        if len(self) == len(self.array):
+            self._resize(min(2 * len(self.array), self.max_capacity))
 
         self.array[self.rear] = item
         self.length += 1
@@ -80,6 +104,7 @@ class CircularQueue(Queue[T]):
         """ Deletes and returns the element at the queue's front.
         :pre: queue is not empty
         :raises Exception: if the queue is empty
+        :complexity: O(1), amortised when shrinking
         """
         if self.is_empty():
             raise Exception("Queue is empty")
@@ -87,17 +112,40 @@ class CircularQueue(Queue[T]):
         self.length -= 1
         item = self.array[self.front]
         self.front = (self.front+1) % len(self.array)
+        self._maybe_shrink()
         return item
 
     def is_full(self) -> bool:
         """ True if the queue is full and no element can be appended. """
-        return len(self) == len(self.array)
+        return len(self) == self.max_capacity
 
     def clear(self) -> None:
-        """ Clears all elements from the queue. """
+        """ Clears all elements from the queue, releasing a grown array. """
         Queue.__init__(self)
         self.front = 0
         self.rear = 0
+        if self.growable:
+            self.array = self._new_array(self._initial_capacity())
+
+    def _maybe_shrink(self) -> None:
+        """ Halves the array once it is no more than a quarter full, with shrink.
+        Growing back takes as many operations as it took to get here, so both stay amortised O(1).
+        """
+        capacity = len(self.array)
+        if self.shrink and capacity > self.INITIAL_CAPACITY and len(self) <= capacity // 4:
+            self._resize(max(capacity // 2, self.INITIAL_CAPACITY))
+
+    def _resize(self, capacity: int) -> None:
+        """ Moves the elements to a new array of the given capacity, front first.
+        :complexity: O(n) where n is the number of elements
+        """
+        new_array = self._new_array(capacity)
+        first = min(len(self), len(self.array) - self.front) #the elements before the array wraps around
+        new_array.copy_from(self.array, self.front, 0, first)
+        new_array.copy_from(self.array, 0, first, len(self) - first)
+        self.array = new_array
+        self.front = 0
+        self.rear = len(self) % capacity
 
 
 class TestQueue(unittest.TestCase):
@@ -184,6 +232,32 @@ class TestQueue(unittest.TestCase):
             self.assertEqual(len(queue), 0)
             self.assertTrue(queue.is_empty())
 
+    def test_growable(self):
+        queue = CircularQueue(100, growable=True, shrink=True)
+        self.assertEqual(len(queue.array), CircularQueue.INITIAL_CAPACITY)
+        for i in range(100):
+            queue.append(i)
+        self.assertTrue(queue.is_full())
+        self.assertEqual(len(queue.array), 100)
+        self.assertRaises(Exception, queue.append, 100)
+        for i in range(95):
+            self.assertEqual(queue.serve(), i)
+        self.assertLess(len(queue.array), 100)
+        for i in range(100, 130):
+            queue.append(i)
+        self.assertEqual([queue.serve() for _ in range(len(queue))], list(range(95, 130)))
+        self.assertEqual(len(queue.array), CircularQueue.INITIAL_CAPACITY)
+
+    def test_typed(self):
+        queue = CircularQueue(self.ROOMY, 'd')
+        for i in range(3 * self.ROOMY):
+            queue.append(i / 2)
+            self.assertEqual(queue.serve(), i / 2)
+        for i in range(self.ROOMY):
+            queue.append(i)
+        self.assertTrue(queue.is_full())
+        self.assertEqual([queue.serve() for _ in range(self.ROOMY)], list(range(self.ROOMY)))
+
 if __name__ == '__main__':
     testtorun = TestQueue()
     suite = unittest.TestLoader().loadTestsFromModule(testtorun)
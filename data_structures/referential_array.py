@@ -12,12 +12,18 @@ space to hold the references.
 Note that while I do check the precondition in __init__ (noone else
 would), I do not check that of getitem or setitem, since that is already
 checked by self.array[index].
+
+Bulk operations (iteration, slices, fill and copy_from) go through ctypes
+slice assignment, so elements are moved in C rather than one at a time.
+Also defines UnitTests for the class.
 """
+from __future__ import annotations
 __author__ = "Julian Garcia for the __init__ code, Maria Garcia de la Banda for the rest"
 __docformat__ = 'reStructuredText'
 
+import unittest
 from ctypes import py_object
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Iterator
 
 T = TypeVar('T')
 
@@ -30,7 +36,7 @@ class ArrayR(Generic[T]):
         if length <= 0:
             raise ValueError("Array length should be larger than 0.")
         self.array = (length * py_object)() # initialises the space
-        self.array[:] =  [None for _ in range(length)]
+        self.array[:] = [None] * length
 
     def __len__(self) -> int:
         """ Returns the length of the array
@@ -38,16 +44,105 @@ class ArrayR(Generic[T]):
         """
         return len(self.array)
 
-    def __getitem__(self, index: int) -> T:
-        """ Returns the object in position index.
-        :complexity: O(1)
+    def __getitem__(self, index: int|slice) -> T|list[T]:
+        """ Returns the object in position index, or a list of the objects in a slice.
+        :complexity: O(1), O(k) for a slice of k elements
         :pre: index in between 0 and length - self.array[] checks it
         """
         return self.array[index]
 
-    def __setitem__(self, index: int, value: T) -> None:
-        """ Sets the object in position index to value
-        :complexity: O(1)
+    def __setitem__(self, index: int|slice, value: T) -> None:
+        """ Sets the object in position index to value,
+        or the objects in a slice to those of a sequence of the same length.
+        :complexity: O(1), O(k) for a slice of k elements
         :pre: index in between 0 and length - self.array[] checks it
         """
         self.array[index] = value
+
+    def __iter__(self) -> Iterator[T]:
+        """ Iterates over the objects, as they were when iteration started.
+        :complexity: O(length) to start, O(1) per element
+        """
+        return iter(self.array[:])
+
+    def fill(self, value: T, start: int = 0, stop: int|None = None) -> None:
+        """ Sets every position from start up to stop (the end by default) to value.
+        :complexity: O(stop - start)
+        """
+        stop = len(self) if stop is None else stop
+        if start < stop:
+            self.array[start:stop] = [value] * (stop - start)
+
+    def copy_from(self, source: ArrayR[T], source_start: int, start: int, count: int) -> None:
+        """ Copies count objects of source from position source_start to this array from position start.
+        source can be this array: the ranges may overlap, as with memmove.
+        :complexity: O(count)
+        :pre: both ranges are within their arrays
+        """
+        if count <= 0:
+            return
+        if not (0 <= source_start and source_start + count <= len(source) and 0 <= start and start + count <= len(self)):
+            raise IndexError('Copy out of the arrays bounds')
+        self.array[start:start + count] = source.array[source_start:source_start + count]
+
+
+class TestArrayR(unittest.TestCase):
+    """ Tests for the above class."""
+    LENGTH = 10
+
+    def setUp(self):
+        self.array = ArrayR(self.LENGTH)
+        for i in range(self.LENGTH):
+            self.array[i] = i
+
+    def test_init(self):
+        self.assertRaises(ValueError, ArrayR, 0)
+        self.assertEqual(list(ArrayR(3)), [None, None, None])
+
+    def test_iter(self):
+        self.assertEqual(list(self.array), list(range(self.LENGTH)))
+        items = []
+        for item in self.array: #sees the array as it was when iteration started
+            self.array[self.LENGTH - 1] = -1
+            items.append(item)
+        self.assertEqual(items, list(range(self.LENGTH)))
+
+    def test_slices(self):
+        self.assertEqual(self.array[2:5], [2, 3, 4])
+        self.assertEqual(self.array[::3], [0, 3, 6, 9])
+        self.assertEqual(self.array[7:3], [])
+        self.array[2:5] = ["a", "b", "c"]
+        self.assertEqual(self.array[:], [0, 1, "a", "b", "c", 5, 6, 7, 8, 9])
+        self.assertRaises(ValueError, self.array.__setitem__, slice(0, 2), [1, 2, 3])
+
+    def test_fill(self):
+        self.array.fill(None, 7)
+        self.assertEqual(list(self.array), [0, 1, 2, 3, 4, 5, 6, None, None, None])
+        self.array.fill("x", 2, 4)
+        self.assertEqual(list(self.array), [0, 1, "x", "x", 4, 5, 6, None, None, None])
+        self.array.fill("y", 5, 5) #empty ranges change nothing
+        self.array.fill("y", 6, 3)
+        self.assertEqual(list(self.array), [0, 1, "x", "x", 4, 5, 6, None, None, None])
+        self.array.fill(0)
+        self.assertEqual(list(self.array), [0] * self.LENGTH)
+
+    def test_copy_from(self):
+        other = ArrayR(4)
+        other.copy_from(self.array, 3, 1, 3)
+        self.assertEqual(list(other), [None, 3, 4, 5])
+        self.assertRaises(IndexError, other.copy_from, self.array, 8, 0, 3)
+        self.assertRaises(IndexError, other.copy_from, self.array, 0, 2, 3)
+        other.copy_from(self.array, 0, 0, 0)
+        self.assertEqual(list(other), [None, 3, 4, 5])
+
+    def test_copy_from_overlapping(self):
+        self.array.copy_from(self.array, 0, 3, 6) #forwards, the source is read before it is overwritten
+        self.assertEqual(list(self.array), [0, 1, 2, 0, 1, 2, 3, 4, 5, 9])
+        self.setUp()
+        self.array.copy_from(self.array, 3, 0, 6) #backwards
+        self.assertEqual(list(self.array), [3, 4, 5, 6, 7, 8, 6, 7, 8, 9])
+
+if __name__ == '__main__':
+    testtorun = TestArrayR()
+    suite = unittest.TestLoader().loadTestsFromModule(testtorun)
+    unittest.TextTestRunner().run(suite)
@@ -0,0 +1,157 @@
+""" Ring buffer: a bounded double-ended circular queue that evicts.
+
+Extends the circular queue with access to both ends and by position.
+Instead of refusing new items once full, appending evicts the item at
+the front, so the buffer always keeps the most recent max_capacity items.
+It is a growable circular queue: the array starts small and doubles on
+demand up to max_capacity, so a large bound does not cost a large
+allocation up front.
+Also defines UnitTests for the class.
+"""
+__author__ = "XXXXX student"
+__docformat__ = 'reStructuredText'
+
+import unittest
+from data_structures.referential_array import T
+from data_structures.queue_adt import CircularQueue
+
+class RingBuffer(CircularQueue[T]):
+    """ Circular implementation of a bounded, evicting double-ended queue.
+
+    Attributes:
+         length (int): number of elements in the buffer (inherited)
+         front (int): index of the element at the front of the buffer (inherited)
+         rear (int): index of the first empty space at the back of the buffer (inherited)
+         array (ArrayR[T]): array storing the elements, grown on demand (inherited)
+         max_capacity (int): maximum number of elements kept
+    """
+
+    def __init__(self, max_capacity: int) -> None:
+        """ Initialises an empty buffer keeping at most max_capacity elements.
+        :complexity: O(1)
+        """
+        CircularQueue.__init__(self, max_capacity, growable=True)
+
+    def append(self, item: T) -> T|None:
+        """ Adds an element to the rear of the buffer.
+        :return: the element evicted from the front to make room, or None.
+        :complexity: O(1) amortised
+        """
+        evicted = None
+        if self.is_full():
+            evicted = self.serve()
+        CircularQueue.append(self, item) #grows the array if needed
+        return evicted
+
+    def append_left(self, item: T) -> None:
+        """ Adds an element to the front of the buffer.
+        :pre: buffer is not full
+        :raises Exception: if the buffer is full
+        :complexity: O(1) amortised
+        """
+        if self.is_full():
+            raise Exception("Buffer is full")
+        if len(self) == len(self.array):
+            self._resize(min(2 * len(self.array), self.max_capacity))
+        self.front = (self.front - 1) % len(self.array)
+        self.array[self.front] = item
+        self.length += 1
+
+    def pop(self) -> T:
+        """ Deletes and returns the element at the rear of the buffer.
+        :pre: buffer is not empty
+        :raises Exception: if the buffer is empty
+        :complexity: O(1)
+        """
+        if self.is_empty():
+            raise Exception("Buffer is empty")
+        self.length -= 1
+        self.rear = (self.rear - 1) % len(self.array)
+        item = self.array[self.rear]
+        self.array[self.rear] = None
+        return item
+
+    def serve(self) -> T:
+        """ Deletes and returns the element at the front of the buffer.
+        :pre: buffer is not empty
+        :raises Exception: if the buffer is empty
+        :complexity: O(1)
+        """
+        item = CircularQueue.serve(self)
+        self.array[(self.front - 1) % len(self.array)] = None
+        return item
+
+    def peek(self) -> T:
+        """ Returns the element at the rear, without removing it.
+        :pre: buffer is not empty
+        :raises Exception: if the buffer is empty
+        """
+        if self.is_empty():
+            raise Exception("Buffer is empty")
+        return self.array[(self.rear - 1) % len(self.array)]
+
+    def __getitem__(self, index: int) -> T:
+        """ Returns the element at position index, 0 being the front.
+        :raises IndexError: if there is no such position
+        :complexity: O(1)
+        """
+        if not 0 <= index < len(self):
+            raise IndexError('No such index in the buffer')
+        return self.array[(self.front + index) % len(self.array)]
+
+
+
+class TestRingBuffer(unittest.TestCase):
+    """ Tests for the above class."""
+    CAPACITY = 20
+
+    def setUp(self):
+        self.buffer = RingBuffer(self.CAPACITY)
+
+    def test_grows_on_demand(self):
+        self.assertLess(len(self.buffer.array), self.CAPACITY)
+        for i in range(self.CAPACITY):
+            self.assertIsNone(self.buffer.append(i))
+        self.assertTrue(self.buffer.is_full())
+        self.assertEqual(len(self.buffer.array), self.CAPACITY)
+        self.assertEqual([self.buffer[i] for i in range(len(self.buffer))], list(range(self.CAPACITY)))
+
+    def test_evicts_oldest(self):
+        for i in range(self.CAPACITY + 5):
+            evicted = self.buffer.append(i)
+            self.assertEqual(evicted, i - self.CAPACITY if i >= self.CAPACITY else None)
+        self.assertEqual(len(self.buffer), self.CAPACITY)
+        self.assertEqual(self.buffer[0], 5)
+        self.assertEqual(self.buffer.peek(), self.CAPACITY + 4)
+
+    def test_both_ends(self):
+        for i in range(5):
+            self.buffer.append(i)
+        self.buffer.append_left(-1)
+        self.assertEqual(self.buffer.pop(), 4)
+        self.assertEqual(self.buffer.serve(), -1)
+        self.assertEqual(len(self.buffer), 4)
+        self.assertRaises(IndexError, self.buffer.__getitem__, 4)
+
+    def test_grows_wrapped(self):
+        for i in range(RingBuffer.INITIAL_CAPACITY):
+            self.buffer.append(i)
+        for i in range(5):
+            self.buffer.serve()
+            self.buffer.append(RingBuffer.INITIAL_CAPACITY + i)
+        self.buffer.append_left(4)
+        self.assertEqual(len(self.buffer.array), self.CAPACITY)
+        expected = list(range(4, RingBuffer.INITIAL_CAPACITY + 5))
+        self.assertEqual([self.buffer[i] for i in range(len(self.buffer))], expected)
+
+    def test_clear(self):
+        for i in range(self.CAPACITY):
+            self.buffer.append(i)
+        self.buffer.clear()
+        self.assertTrue(self.buffer.is_empty())
+        self.assertRaises(Exception, self.buffer.pop)
+
+if __name__ == '__main__':
+    testtorun = TestRingBuffer()
+    suite = unittest.TestLoader().loadTestsFromModule(testtorun)
+    unittest.TextTestRunner().run(suite)
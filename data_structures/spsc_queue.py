@@ -0,0 +1,159 @@
+""" Single producer, single consumer queue: a bounded circular queue shared by two threads.
+
+One thread appends and another serves, without a lock. Each index has a
+single writer: only the producer moves tail and only the consumer moves
+head. The producer writes the slot before publishing it by moving tail,
+and the consumer clears the slot before handing it back by moving head,
+so neither ever sees a half written slot. This relies on attribute
+assignment being atomic, as it is in CPython.
+The indices count every item ever appended and served, so they never
+wrap around and len is simply tail - head.
+Also defines UnitTests for the class.
+"""
+__author__ = "XXXXX student"
+__docformat__ = 'reStructuredText'
+
+import time
+import unittest
+from threading import Thread
+from typing import Generic
+from data_structures.referential_array import ArrayR, T
+
+class SPSCQueue(Generic[T]):
+    """ Lock-free bounded queue for one producer thread and one consumer thread.
+
+    Attributes:
+         array (ArrayR[T]): array storing the elements of the queue
+         head (int): number of elements served, written by the consumer only
+         tail (int): number of elements appended, written by the producer only
+
+    ArrayR cannot create empty arrays. So MIN_CAPACITY used to avoid this.
+    """
+    MIN_CAPACITY = 1
+
+    def __init__(self, max_capacity: int) -> None:
+        """ Initialises an empty queue with the given capacity.
+        :complexity: O(max_capacity)
+        """
+        self.array = ArrayR(max(self.MIN_CAPACITY, max_capacity))
+        self.head = 0
+        self.tail = 0
+
+    def __len__(self) -> int:
+        """ Returns the number of elements in the queue, which the other thread may be changing. """
+        return self.tail - self.head
+
+    def is_empty(self) -> bool:
+        """ True if the queue is empty. Only certain for the consumer. """
+        return len(self) == 0
+
+    def is_full(self) -> bool:
+        """ True if no element can be appended. Only certain for the producer. """
+        return len(self) == len(self.array)
+
+    def try_append(self, item: T) -> bool:
+        """ Adds an element to the rear of the queue, from the producer thread.
+        :return: whether there was room for it.
+        :complexity: O(1)
+        """
+        tail = self.tail
+        if tail - self.head == len(self.array):
+            return False
+        self.array[tail % len(self.array)] = item
+        self.tail = tail + 1 #publishes the slot
+        return True
+
+    def append(self, item: T) -> None:
+        """ Adds an element to the rear of the queue, from the producer thread.
+        :pre: queue is not full
+        :raises Exception: if the queue is full
+        :complexity: O(1)
+        """
+        if not self.try_append(item):
+            raise Exception("Queue is full")
+
+    def serve(self) -> T:
+        """ Deletes and returns the element at the queue's front, from the consumer thread.
+        :pre: queue is not empty
+        :raises Exception: if the queue is empty
+        :complexity: O(1)
+        """
+        head = self.head
+        if head == self.tail:
+            raise Exception("Queue is empty")
+        index = head % len(self.array)
+        item = self.array[index]
+        self.array[index] = None
+        self.head = head + 1 #hands the slot back
+        return item
+
+    def serve_many(self, max_items: int|None = None) -> list[T]:
+        """ Deletes and returns up to max_items elements from the front, all of them by default,
+        from the consumer thread. The slots are handed back all at once.
+        :complexity: O(k) where k is the number of elements served
+        """
+        head = self.head
+        count = self.tail - head
+        if max_items is not None:
+            count = min(count, max_items)
+        items = []
+        for position in range(head, head + count):
+            index = position % len(self.array)
+            items.append(self.array[index])
+            self.array[index] = None
+        self.head = head + count
+        return items
+
+
+class TestSPSCQueue(unittest.TestCase):
+    """ Tests for the above class."""
+    CAPACITY = 8
+
+    def setUp(self):
+        self.queue = SPSCQueue(self.CAPACITY)
+
+    def test_append_serve(self):
+        self.assertTrue(self.queue.is_empty())
+        self.assertRaises(Exception, self.queue.serve)
+        for i in range(self.CAPACITY):
+            self.queue.append(i)
+        self.assertTrue(self.queue.is_full())
+        self.assertFalse(self.queue.try_append(self.CAPACITY))
+        self.assertRaises(Exception, self.queue.append, self.CAPACITY)
+        self.assertEqual(self.queue.serve(), 0)
+        self.queue.append(self.CAPACITY)
+        self.assertEqual([self.queue.serve() for _ in range(len(self.queue))], list(range(1, self.CAPACITY + 1)))
+
+    def test_serve_many(self):
+        for i in range(5):
+            self.queue.append(i)
+        self.assertEqual(self.queue.serve_many(3), [0, 1, 2])
+        for i in range(5, 10):
+            self.queue.append(i)
+        self.assertEqual(self.queue.serve_many(), list(range(3, 10)))
+        self.assertEqual(self.queue.serve_many(), [])
+
+    def test_threads(self):
+        total = 20000
+
+        def produce():
+            for i in range(total):
+                while not self.queue.try_append(i):
+                    time.sleep(0) #let the consumer run rather than wait out the switch interval
+
+        producer = Thread(target=produce)
+        producer.start()
+        received = []
+        while len(received) < total:
+            items = self.queue.serve_many()
+            if len(items) == 0:
+                time.sleep(0)
+            received.extend(items)
+        producer.join()
+        self.assertEqual(received, list(range(total)))
+        self.assertTrue(self.queue.is_empty())
+
+if __name__ == '__main__':
+    testtorun = TestSPSCQueue()
+    suite = unittest.TestLoader().loadTestsFromModule(testtorun)
+    unittest.TextTestRunner().run(suite)
@@ -10,6 +10,7 @@ import unittest
 from abc import ABC, abstractmethod
 from typing import TypeVar, Generic
 from data_structures.referential_array import ArrayR, T
+from data_structures.typed_array import ArrayT
 
 class Stack(ABC, Generic[T]):
     def __init__(self) -> None:
@@ -53,30 +54,66 @@ class ArrayStack(Stack[T]):
 
     Attributes:
          length (int): number of elements in the stack (inherited)
-         array (ArrayR[T]): array storing the elements of the queue
+         array (ArrayR[T] or ArrayT): array storing the elements of the queue
+         max_capacity (int): maximum number of elements
 
     ArrayR cannot create empty arrays. So MIN_CAPACITY used to avoid this.
+    A growable stack starts with INITIAL_CAPACITY and doubles its array when it fills up,
+    up to max_capacity. With shrink, it also halves its array when it is a quarter full.
     """
     MIN_CAPACITY = 1
+    INITIAL_CAPACITY = 16
 
-    def __init__(self, max_capacity: int) -> None:
+    def __init__(self, max_capacity: int, typecode: str|None = None, growable: bool = False, shrink: bool = False) -> None:
         """ Initialises the length and the array with the given capacity.
             If max_capacity is 0, the array is created with MIN_CAPACITY.
+            With a typecode, the elements are numbers stored unboxed in an ArrayT.
+            With growable, the array grows on demand instead of being allocated up front,
+            and with shrink it also shrinks as the stack drains.
         """
         Stack.__init__(self)
-        self.array = ArrayR(max(self.MIN_CAPACITY, max_capacity))
+        self.typecode = typecode
+        self.max_capacity = max(self.MIN_CAPACITY, max_capacity)
+        self.growable = growable
+        self.shrink = growable and shrink
+        self.array = self._new_array(self._initial_capacity())
+
+    def _initial_capacity(self) -> int:
+        return min(self.INITIAL_CAPACITY, self.max_capacity) if self.growable else self.max_capacity
+
+    def _new_array(self, capacity: int):
+        if self.typecode is None:
+            return ArrayR(capacity)
+        return ArrayT(capacity, self.typecode)
 
     def is_full(self) -> bool:
         """ True if the stack is full and no element can be pushed. """
-        return len(self) == len(self.array)
+        return len(self) == self.max_capacity
+
+    def clear(self) -> None:
+        """ Clears all elements from the stack, releasing a grown array. """
+        Stack.clear(self)
+        if self.growable:
+            self.array = self._new_array(self._initial_capacity())
+
+    def _resize(self, capacity: int) -> None:
+        """ Moves the elements to a new array of the given capacity.
+        :complexity: O(n) where n is the number of elements
+        """
+        new_array = self._new_array(capacity)
+        new_array.copy_from(self.array, 0, 0, len(self))
+        self.array = new_array
 
     def push(self, item: T) -> None:
         """ Pushes an element to the top of the stack.
         :pre: stack is not full
         :raises Exception: if the stack is full
+        :complexity: O(1), amortised when growable
         """
         if self.is_full():
             raise Exception("Stack is full")
+        if len(self) == len(self.array):
+            self._resize(min(2 * len(self.array), self.max_capacity))
         self.array[len(self)] = item
         self.length += 1
 
@@ -84,11 +121,16 @@ class ArrayStack(Stack[T]):
         """ Pops the element at the top of the stack.
         :pre: stack is not empty
         :raises Exception: if the stack is empty
+        :complexity: O(1), amortised when shrinking
         """
         if self.is_empty():
             raise Exception("Stack is empty")
         self.length -= 1
-        return self.array[self.length]
+        item = self.array[self.length]
+        capacity = len(self.array)
+        if self.shrink and capacity > self.INITIAL_CAPACITY and len(self) <= capacity // 4:
+            self._resize(max(capacity // 2, self.INITIAL_CAPACITY))
+        return item
 
     def peek(self) -> T:
         """ Returns the element at the top, without popping it from stack.
@@ -183,6 +225,29 @@ class TestStack(unittest.TestCase):
             self.assertEqual(len(stack), 0)
             self.assertTrue(stack.is_empty())
 
+    def test_growable(self):
+        stack = ArrayStack(100, growable=True, shrink=True)
+        self.assertEqual(len(stack.array), ArrayStack.INITIAL_CAPACITY)
+        for i in range(100):
+            stack.push(i)
+        self.assertTrue(stack.is_full())
+        self.assertEqual(len(stack.array), 100)
+        self.assertRaises(Exception, stack.push, 100)
+        for i in range(99, 4, -1):
+            self.assertEqual(stack.pop(), i)
+        self.assertEqual(len(stack.array), ArrayStack.INITIAL_CAPACITY)
+        self.assertEqual([stack.pop() for _ in range(len(stack))], [4, 3, 2, 1, 0])
+
+    def test_typed(self):
+        stack = ArrayStack(self.CAPACITY, 'i')
+        for i in range(self.CAPACITY):
+            stack.push(-i)
+        self.assertTrue(stack.is_full())
+        self.assertEqual(stack.peek(), 1 - self.CAPACITY)
+        for i in range(self.CAPACITY - 1, -1, -1):
+            self.assertEqual(stack.pop(), -i)
+        self.assertTrue(stack.is_empty())
+
 if __name__ == '__main__':
     testtorun = TestStack()
     suite = unittest.TestLoader().loadTestsFromModule(testtorun)
@@ -0,0 +1,137 @@
+""" Typed array: a fixed length array of numbers stored contiguously.
+
+A sibling of ArrayR for numeric data. Instead of a reference to a Python
+object per position, the values are kept unboxed in an array.array of the
+given typecode (see the array module), e.g. 'B' for bytes 0-255, 'i' for
+ints, 'd' for floats. Each position can also hold a fixed width tuple of
+numbers, such as width 3 for an (r, g, b) colour with typecode 'B', which
+takes 3 bytes instead of a tuple and three int objects.
+
+The storage supports the buffer protocol, so view() shares it without
+copying with memoryview, struct, files or NumPy.
+Also defines UnitTests for the class.
+"""
+__author__ = "XXXXX student"
+__docformat__ = 'reStructuredText'
+
+import unittest
+from array import array
+
+class ArrayT:
+    def __init__(self, length: int, typecode: str = 'q', width: int = 1) -> None:
+        """ Creates an array of length positions holding numbers of the given typecode,
+        or tuples of width numbers, all set to 0.
+        :complexity: O(length * width), done in C
+        :pre: length > 0 and width > 0
+        """
+        if length <= 0:
+            raise ValueError("Array length should be larger than 0.")
+        if width <= 0:
+            raise ValueError("Array width should be larger than 0.")
+        self.typecode = typecode
+        self.width = width
+        self.array = array(typecode, bytes(length * width * array(typecode).itemsize))
+
+    def __len__(self) -> int:
+        """ Returns the length of the array
+        :complexity: O(1)
+        """
+        return len(self.array) // self.width
+
+    def __getitem__(self, index: int):
+        """ Returns the number, or tuple of width numbers, in position index.
+        :complexity: O(width)
+        :raises IndexError: if index is not between 0 and length
+        """
+        if not 0 <= index < len(self):
+            raise IndexError('array index out of range')
+        if self.width == 1:
+            return self.array[index]
+        return tuple(self.array[index * self.width:(index + 1) * self.width])
+
+    def __setitem__(self, index: int, value) -> None:
+        """ Sets position index to value, a number or a tuple of width numbers.
+        :complexity: O(width)
+        :raises IndexError: if index is not between 0 and length
+        :raises OverflowError: if value does not fit the typecode
+        """
+        if not 0 <= index < len(self):
+            raise IndexError('array index out of range')
+        if self.width == 1:
+            self.array[index] = value
+        else:
+            if len(value) != self.width:
+                raise ValueError(f"Expected {self.width} numbers")
+            self.array[index * self.width:(index + 1) * self.width] = array(self.typecode, value)
+
+    def copy_from(self, source: "ArrayT", source_start: int, start: int, count: int) -> None:
+        """ Copies count positions of source from source_start to this array from start, as ArrayR.copy_from.
+        :complexity: O(count * width), done in C
+        :pre: both ranges are within their arrays, and both arrays have the same typecode and width
+        """
+        if count <= 0:
+            return
+        if not (0 <= source_start and source_start + count <= len(source) and 0 <= start and start + count <= len(self)):
+            raise IndexError('Copy out of the arrays bounds')
+        w = self.width
+        self.array[start * w:(start + count) * w] = source.array[source_start * w:(source_start + count) * w]
+
+    def view(self) -> memoryview:
+        """ Returns a view of the underlying storage, without copying it.
+        Writing to the view changes the array. The array should not be resized while a view exists.
+        :complexity: O(1)
+        """
+        return memoryview(self.array)
+
+    def nbytes(self) -> int:
+        """ Returns the number of bytes used by the values.
+        :complexity: O(1)
+        """
+        return len(self.array) * self.array.itemsize
+
+
+class TestArrayT(unittest.TestCase):
+    """ Tests for the above class."""
+
+    def test_numbers(self):
+        numbers = ArrayT(10, 'i')
+        self.assertEqual(len(numbers), 10)
+        self.assertEqual([numbers[i] for i in range(10)], [0] * 10)
+        numbers[3] = -7
+        numbers[9] = 12
+        self.assertEqual((numbers[3], numbers[9]), (-7, 12))
+        self.assertRaises(IndexError, numbers.__getitem__, 10)
+        self.assertRaises(IndexError, numbers.__setitem__, -1, 0)
+        self.assertRaises(ValueError, ArrayT, 0)
+
+    def test_colours(self):
+        colours = ArrayT(4, 'B', 3)
+        self.assertEqual(len(colours), 4)
+        colours[1] = (255, 128, 0)
+        self.assertEqual(colours[1], (255, 128, 0))
+        self.assertEqual(colours[2], (0, 0, 0))
+        self.assertEqual(colours.nbytes(), 12)
+        self.assertRaises(OverflowError, colours.__setitem__, 0, (256, 0, 0))
+        self.assertRaises(ValueError, colours.__setitem__, 0, (1, 2))
+
+    def test_copy_from(self):
+        numbers = ArrayT(6, 'i')
+        for i in range(6):
+            numbers[i] = i
+        numbers.copy_from(numbers, 0, 2, 4)
+        self.assertEqual([numbers[i] for i in range(6)], [0, 1, 0, 1, 2, 3])
+
+    def test_view(self):
+        numbers = ArrayT(5, 'q')
+        view = numbers.view()
+        self.assertEqual(view.nbytes, numbers.nbytes())
+        view[2] = 42
+        self.assertEqual(numbers[2], 42)
+        numbers[4] = 5
+        self.assertEqual(view[4], 5)
+        view.release()
+
+if __name__ == '__main__':
+    testtorun = TestArrayT()
+    suite = unittest.TestLoader().loadTestsFromModule(testtorun)
+    unittest.TextTestRunner().run(suite)
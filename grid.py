@@ -1,5 +1,6 @@
 from __future__ import annotations
 from data_structures.referential_array import ArrayR
+from data_structures.quadtree import PersistentQuadTree
 from layer_store import *
 from layers import *
 
@@ -17,7 +18,7 @@ class Grid:
     MAX_BRUSH = 5
     MIN_BRUSH = 0
 
-    def __init__(self, draw_style, x, y) -> None:
+    def __init__(self, draw_style, x, y, flyweight = True) -> None:
         """
         Initialise the grid object.
         - draw_style:
@@ -25,38 +26,44 @@ class Grid:
             Should be one of DRAW_STYLE_OPTIONS
             This draw style determines the LayerStore used on each grid square.
         - x, y: The dimensions of the grid.
+        - flyweight:
+            For DRAW_STYLE_SET only. Each square keeps a shared SetLayerState
+            instead of its own SetLayerStore.
 
         Should also intialise the brush size to the DEFAULT provided as a class variable.
 
-        Big-O notation: O(n + nm) where n is the range of grid of x, and m is the range of y
+        The squares live in a PersistentQuadTree. Every square starts out sharing a single empty store,
+        and grid[x][y] hands out a view of the square: changing it copies that square's store
+        and the O(log(nm)) tree nodes above it, so snapshot() is O(1).
+
+        Big-O notation: O(n + log(nm)) where n is the range of grid of x, and m is the range of y
         """
 
         self.x = x
         self.y = y
         self.draw_style = draw_style
-
-        #set the grid
-        self.grid = ArrayR(x) # O(n)
-
-        for i in range(len(self.grid)): #O(n) --> O(nm)
-            self.grid[i] = ArrayR(y) # O(m)
+        self.flyweight = flyweight and draw_style == self.DRAW_STYLE_SET
 
         #set draw_style
-        if (draw_style in self.DRAW_STYLE_OPTIONS):
-            
-            #Loop through in each and every grid to instantiate an object of DRAW_STYLE_OPTION
-            for i in range(x): #O(n) --> O(nm) for both loop.
-                for j in range(y): # O(m)
-                    if (self.draw_style == self.DRAW_STYLE_SET):
-                        self.grid[i][j] = SetLayerStore()
-                    elif (self.draw_style == self.DRAW_STYLE_ADD):
-                        self.grid[i][j] = AdditiveLayerStore()
-                    elif (self.draw_style == self.DRAW_STYLE_SEQUENCE):
-                        self.grid[i][j] = SequenceLayerStore()
-            
+        if (self.flyweight):
+            empty = SetLayerState.get(None, False)
+        elif (self.draw_style == self.DRAW_STYLE_SET):
+            empty = SetLayerStore()
+        elif (self.draw_style == self.DRAW_STYLE_ADD):
+            empty = AdditiveLayerStore()
+        elif (self.draw_style == self.DRAW_STYLE_SEQUENCE):
+            empty = SequenceLayerStore()
         else:
             raise Exception(".") #irrelevant, not part of Big-O    
 
+        self.tree = PersistentQuadTree(max(x, y), empty) #O(log(nm))
+        self.empty_tree = self.tree
+
+        #set the grid, views of each row of squares
+        self.grid = ArrayR(x) # O(n)
+        for i in range(len(self.grid)): #O(n)
+            self.grid[i] = GridRow(self, i)
+
         self.brush_size = self.DEFAULT_BRUSH_SIZE #initialize the brush size as default size
 
     def increase_brush_size(self):
@@ -86,13 +93,90 @@ class Grid:
         """
         Activate the special affect on all grid squares.
 
-        Big-O notation: O(nm)
+        Big-O notation: O(d) where d is the number of distinct squares and tree nodes, at most O(nm)
+        """
+        if self.flyweight:
+            self.tree = self.tree.map(lambda state: state.special()) #squares in the same state share the result
+        else:
+            self.tree = self.tree.map(_special_copy)
+
+    def snapshot(self) -> PersistentQuadTree:
+        """
+        Returns the current version of every grid square, unaffected by later changes to the grid.
+
+        Big-O notation: O(1)
+        """
+        return self.tree
+
+    def restore(self, snapshot: PersistentQuadTree) -> None:
+        """
+        Puts every grid square back as it was when the snapshot was taken.
+        The snapshot stays usable afterwards.
+
+        Big-O notation: O(1)
+        """
+        self.tree = snapshot
+
+    def clear(self) -> None:
+        """
+        Empties every grid square.
+
+        Big-O notation: O(1)
         """
-        #O(nm)
-        for i in range (self.x): #(O(n))
-            for j in range (self.y): #(O(m))
-                self.grid[i][j].special() #applying the special in each grid
+        self.tree = self.empty_tree
 
     def __getitem__(self,idx): # magic method to access the grid index --> grid[x][y]
         return self.grid[idx]
 
+
+def _special_copy(store: LayerStore) -> LayerStore:
+    """
+    Big-O notation: O(special)
+    """
+    store = store.copy()
+    store.special()
+    return store
+
+
+class GridRow:
+    """
+    Row x of a grid, i.e. grid[x]. Reads and writes the squares in the grid's tree,
+    and indexing it hands out a view of square (x, y) behaving like its LayerStore.
+    """
+
+    def __init__(self, grid: Grid, x: int) -> None:
+        """
+        Big-O notation: O(1)
+        """
+        self.grid = grid
+        self.x = x
+
+    def __len__(self) -> int:
+        """
+        Big-O notation: O(1)
+        """
+        return self.grid.y
+
+    def __getitem__(self, idx: int) -> LayerStore:
+        """
+        Big-O notation: O(1)
+        """
+        if not 0 <= idx < self.grid.y:
+            raise IndexError(idx)
+        if self.grid.flyweight:
+            return SetLayerCell(self, idx)
+        return CopyOnWriteCell(self, idx)
+
+    def get(self, idx: int):
+        """
+        Returns what square (x, idx) holds: its store, or its SetLayerState for flyweight grids.
+
+        Big-O notation: O(log(nm))
+        """
+        return self.grid.tree.get(self.x, idx)
+
+    def set(self, idx: int, value) -> None:
+        """
+        Big-O notation: O(log(nm))
+        """
+        self.grid.tree = self.grid.tree.set(self.x, idx, value)
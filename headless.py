@@ -0,0 +1,108 @@
+from __future__ import annotations
+"""
+Running the window without a window.
+
+HeadlessWindow is MyWindow with drawing stubbed out: the same WindowLogic and Painter, no arcade. Time
+only passes when a VirtualClock advances it, one frame of on_update and on_draw at a time, so runs are
+deterministic and go as fast as the logic allows.
+
+run_headless runs a scenario written for run_with_func, such as those in visuals, this way: while it
+runs, time.sleep advances the virtual clock instead of waiting, so a scenario that takes tens of seconds
+on screen takes milliseconds.
+
+    python headless.py visuals.complex test_styles
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from importlib import import_module
+from unittest import mock
+from window_logic import WindowLogic
+
+FRAME_TIME = 1 / 60
+
+
+class HeadlessWindow(WindowLogic):
+    """
+    The window's logic with rendering stubbed out.
+    With render, on_draw still composes the colour of every square into frame, as drawing the grid would.
+    """
+
+    def __init__(self, render: bool = False) -> None:
+        self.render = render
+        self.frame = None # colour of every square at the last on_draw, by [x][y]
+        self.frames = 0 # number of on_draw calls
+        WindowLogic.__init__(self)
+
+    def on_draw(self) -> None:
+        """Composes the grid's colours instead of drawing them, with render."""
+        self.frames += 1
+        if self.render:
+            self.frame = [
+                [self.grid[x][y].get_color(self.BG[:], self.timestamp, x, y) for y in range(self.GRID_SIZE_Y)]
+                for x in range(self.GRID_SIZE_X)
+            ]
+
+
+class VirtualClock:
+    """
+    Advances a window's time in steps of frame_time, calling on_update and on_draw for each frame like arcade would.
+    """
+
+    def __init__(self, window: WindowLogic, frame_time: float = FRAME_TIME) -> None:
+        self.window = window
+        self.frame_time = frame_time
+        self.now = 0.0 # seconds asked for so far
+        self.ticks = 0 # frames played so far
+
+    def advance(self, seconds: float) -> int:
+        """
+        Plays every frame due in the next seconds.
+
+        :return: the number of frames played.
+
+        Big-O notation: O(seconds / frame_time * (on_update + on_draw))
+        """
+        self.now += seconds
+        due = int(self.now / self.frame_time + 1e-9) # frames are counted from the start, so rounding never drifts
+        played = due - self.ticks
+        for _ in range(played):
+            self.window.on_update(self.frame_time)
+            self.window.on_draw()
+        self.ticks = due
+        return played
+
+    def sleep(self, seconds: float) -> None:
+        """Stands in for time.sleep."""
+        self.advance(seconds)
+
+    @contextmanager
+    def patch_sleep(self):
+        """While in this context, time.sleep advances this clock instead of waiting."""
+        with mock.patch.object(time, "sleep", self.sleep):
+            yield self
+
+
+def run_headless(func, settle: float = 0.0, render: bool = False, frame_time: float = FRAME_TIME) -> HeadlessWindow:
+    """
+    Runs func(window) on a new HeadlessWindow, with time.sleep advancing a virtual clock,
+    then lets settle more seconds pass.
+
+    :return: the window, with its clock as window.clock.
+    """
+    window = HeadlessWindow(render)
+    window.setup()
+    window.clock = VirtualClock(window, frame_time)
+    with window.clock.patch_sleep():
+        func(window)
+    window.clock.advance(settle)
+    return window
+
+
+if __name__ == "__main__":
+    module, name = sys.argv[1], sys.argv[2]
+    start = time.perf_counter()
+    window = run_headless(getattr(import_module(module), name), settle=1.0)
+    print(f"{module}.{name}: {window.clock.now:.2f} s of virtual time, {window.clock.ticks} frames "
+          f"in {time.perf_counter() - start:.3f} s")
@@ -0,0 +1,333 @@
+from __future__ import annotations
+"""
+Compact binary journal of replay actions.
+
+The journal is an append-only file: a header followed by one record per
+(action, is_undo) pair, in the order they were recorded. Every number is
+a varint (7 bits per byte, least significant group first), so most take
+a single byte. A record is its length followed by:
+    - flags: IS_UNDO | SPECIAL | UNIFORM | STAMP | BATCH
+    - special actions: nothing else
+    - batches: number of actions, then each one as a record of its own, length included
+    - stamps: centre x, centre y, brush size, layer index and the mask of changed squares
+    - uniform paint actions, where every step has the same layer:
+        layer index, number of steps, then each square as the zigzag
+        encoded difference (dx, dy) from the previous square
+    - other paint actions: number of steps, then each step as
+        layer index and zigzag encoded (dx, dy)
+
+JournalReader maps the file in memory and decodes records on demand, so
+replaying a journal never holds more than a few actions at once.
+"""
+
+import mmap
+import os
+from action import BatchAction, PaintAction, PaintStep, StampAction
+from layer_util import get_layers
+
+MAGIC = b"PJNL\x01"
+
+IS_UNDO = 1
+SPECIAL = 2
+UNIFORM = 4
+STAMP = 8
+BATCH = 16
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    """
+    Appends a non-negative integer to out, 7 bits per byte.
+
+    Big-O notation: O(log value)
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, offset: int) -> tuple[int, int]:
+    """
+    Reads the integer starting at offset.
+
+    :return: (value, offset just after it)
+
+    Big-O notation: O(log value)
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def zigzag(value: int) -> int:
+    """Maps small signed integers to small non-negative ones: 0, -1, 1, -2, ... --> 0, 1, 2, 3, ..."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def unzigzag(value: int) -> int:
+    """Inverse of zigzag."""
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def encode(action: PaintAction, is_undo: bool = False) -> bytes:
+    """
+    Returns the record of this action, without its length.
+
+    Big-O notation: O(s) where s is the number of steps, O(1) for stamps
+    """
+    body = bytearray()
+    flags = IS_UNDO if is_undo else 0
+    if action.is_special:
+        write_varint(body, flags | SPECIAL)
+        return bytes(body)
+    if isinstance(action, BatchAction):
+        write_varint(body, flags | BATCH)
+        write_varint(body, len(action.actions))
+        for inner in action.actions:
+            record = encode(inner)
+            write_varint(body, len(record))
+            body += record
+        return bytes(body)
+    if isinstance(action, StampAction):
+        write_varint(body, flags | STAMP)
+        for value in (*action.centre, action.brush_size, action.layer.index, action.mask):
+            write_varint(body, value)
+        return bytes(body)
+
+    steps = action.steps
+    uniform = all(step.affected_layer is steps[0].affected_layer for step in steps)
+    if uniform and len(steps) > 0:
+        write_varint(body, flags | UNIFORM)
+        write_varint(body, steps[0].affected_layer.index)
+    else:
+        write_varint(body, flags)
+    write_varint(body, len(steps))
+    px, py = 0, 0
+    for step in steps:
+        x, y = step.affected_grid_square
+        if not uniform:
+            write_varint(body, step.affected_layer.index)
+        write_varint(body, zigzag(x - px))
+        write_varint(body, zigzag(y - py))
+        px, py = x, y
+    return bytes(body)
+
+def decode(data, offset: int = 0) -> tuple[PaintAction, bool]:
+    """
+    Decodes the record body starting at offset.
+
+    :return: (action, is_undo)
+
+    Big-O notation: O(s) where s is the number of steps
+    """
+    flags, offset = read_varint(data, offset)
+    is_undo = bool(flags & IS_UNDO)
+    if flags & SPECIAL:
+        return PaintAction(is_special=True), is_undo
+    if flags & BATCH:
+        count, offset = read_varint(data, offset)
+        actions = []
+        for _ in range(count):
+            size, offset = read_varint(data, offset)
+            actions.append(decode(data, offset)[0])
+            offset += size
+        return BatchAction(actions), is_undo
+    if flags & STAMP:
+        values = []
+        for _ in range(5):
+            value, offset = read_varint(data, offset)
+            values.append(value)
+        x, y, brush_size, index, mask = values
+        return StampAction((x, y), brush_size, get_layers()[index], mask), is_undo
+
+    layers = get_layers()
+    layer = None
+    if flags & UNIFORM:
+        index, offset = read_varint(data, offset)
+        layer = layers[index]
+    count, offset = read_varint(data, offset)
+    action = PaintAction()
+    x, y = 0, 0
+    for _ in range(count):
+        if not flags & UNIFORM:
+            index, offset = read_varint(data, offset)
+            layer = layers[index]
+        dx, offset = read_varint(data, offset)
+        dy, offset = read_varint(data, offset)
+        x, y = x + unzigzag(dx), y + unzigzag(dy)
+        action.add_step(PaintStep((x, y), layer))
+    return action, is_undo
+
+
+def records(data, offset: int = len(MAGIC)):
+    """
+    Decodes the records of journal data from offset on, lazily, stopping at the end or at a record cut short.
+
+    :yield: (action, is_undo, offset just after the record)
+
+    Big-O notation: O(s) per record where s is the number of steps
+    """
+    while offset < len(data):
+        try:
+            size, body = read_varint(data, offset)
+        except IndexError: #the length itself was cut short
+            return
+        if body + size > len(data):
+            return
+        action, is_undo = decode(data, body)
+        offset = body + size
+        yield action, is_undo, offset
+
+
+class JournalWriter:
+    """
+    Appends records to a journal file as actions happen.
+    Use as a context manager, or call close when done.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens the journal at path, creating it if needed. Records are appended after existing ones.
+
+        Big-O notation: O(1)
+        """
+        self.path = path
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.offset = self.file.tell() #offset just after the last record appended
+
+    def append(self, action: PaintAction, is_undo: bool = False) -> None:
+        """
+        Big-O notation: O(s) where s is the number of steps
+        """
+        body = encode(action, is_undo)
+        record = bytearray()
+        write_varint(record, len(body))
+        record += body
+        self.file.write(record)
+        self.offset += len(record)
+
+    def flush(self) -> None:
+        """
+        Pushes buffered records to the operating system, and to the disk if it supports it.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> JournalWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JournalReader:
+    """
+    Read-only view of a journal file as a sequence of (action, is_undo) tuples,
+    with the same len / indexing interface as the replay log, so a ReplayTracker can play it.
+
+    The file is memory mapped. Opening it skips through the record lengths once and
+    remembers the offset of every INDEX_INTERVAL-th record, so reading record i costs
+    at most INDEX_INTERVAL skips, and reading records in order costs O(1) each.
+    """
+    INDEX_INTERVAL = 64
+
+    def __init__(self, path: str) -> None:
+        """
+        Big-O notation: O(r) in time and O(r / INDEX_INTERVAL) in memory where r is the number of records
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        if os.fstat(self.file.fileno()).st_size == 0: #just created, nothing written yet: an empty journal
+            self.data = MAGIC #an empty file cannot be mapped
+        else:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a journal.")
+        self.index = [] #offset of records 0, INDEX_INTERVAL, 2 * INDEX_INTERVAL, ...
+        self.length = 0
+        offset = len(MAGIC)
+        while offset < len(self.data):
+            if self.length % self.INDEX_INTERVAL == 0:
+                self.index.append(offset)
+            try:
+                size, body = read_varint(self.data, offset)
+            except IndexError:
+                break
+            if body + size > len(self.data): #a record cut short by a crash, ignore it
+                break
+            offset = body + size
+            self.length += 1
+        self.end = offset #offset just after the last complete record
+        self._last = (0, len(MAGIC)) #(record number, offset) of the next record after the last one read
+
+    def __len__(self) -> int:
+        """
+        Big-O notation: O(1)
+        """
+        return self.length
+
+    def is_full(self) -> bool:
+        """
+        A journal cannot be appended to through its reader.
+        """
+        return True
+
+    def offset_of(self, index: int) -> int:
+        """
+        Returns the file offset of record index.
+
+        Big-O notation: O(INDEX_INTERVAL), O(1) when reading in order
+        """
+        if not 0 <= index <= self.length:
+            raise IndexError('No such index in the journal')
+        if index == self.length:
+            return self.end
+        number, offset = self._last
+        if not number <= index < number + self.INDEX_INTERVAL:
+            number = index - index % self.INDEX_INTERVAL
+            offset = self.index[number // self.INDEX_INTERVAL]
+        while number < index:
+            size, body = read_varint(self.data, offset)
+            offset = body + size
+            number += 1
+        return offset
+
+    def __getitem__(self, index: int) -> tuple[PaintAction, bool]:
+        """
+        Decodes record index.
+
+        Big-O notation: O(INDEX_INTERVAL + s), O(s) when reading in order, where s is the number of steps
+        """
+        if not 0 <= index < self.length:
+            raise IndexError('No such index in the journal')
+        offset = self.offset_of(index)
+        size, body = read_varint(self.data, offset)
+        self._last = (index + 1, body + size)
+        return decode(self.data, body)
+
+    def __iter__(self):
+        """
+        Decodes every record in order, lazily.
+        """
+        for index in range(self.length):
+            yield self[index]
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self) -> JournalReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,12 +1,11 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from weakref import WeakValueDictionary, ref
 from data_structures.sorted_list_adt import ListItem
-from layer_util import Layer, get_layers
+from layer_util import Layer, get_layers, simplify
 from layers import invert, black, red
 from data_structures.referential_array import ArrayR
-from data_structures.stack_adt import ArrayStack
-from data_structures.queue_adt import CircularQueue
-from data_structures.array_sorted_list import ArraySortedList
+from data_structures.order_statistic_tree import OrderStatisticTree
 from data_structures.bset import BSet
 
 class LayerStore(ABC):
@@ -14,6 +13,28 @@ class LayerStore(ABC):
 
     def __init__(self) -> None:
         self.color = None
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        """
+        Forget the cached composed colour and simplified program. Called whenever the stored layers change.
+
+        Big-O notation: O(1)
+        """
+        self._cached_start = None
+        self._cached_color = None
+        self._program = None
+
+    def _cache(self, start, color, dynamic: bool) -> None:
+        """
+        Remember the composed colour for this start colour,
+        unless a time / position dependent layer took part in the composition.
+
+        Big-O notation: O(1)
+        """
+        if not dynamic:
+            self._cached_start = tuple(start)
+            self._cached_color = color
 
     @abstractmethod
     def add(self, layer: Layer) -> bool:
@@ -45,6 +66,13 @@ class LayerStore(ABC):
         """
         pass
 
+    @abstractmethod
+    def copy(self) -> LayerStore:
+        """
+        Returns an independent store holding the same layers.
+        """
+        pass
+
 class SetLayerStore(LayerStore):
     """
     Set layer store. A single layer can be stored at a time (or nothing at all)
@@ -78,6 +106,7 @@ class SetLayerStore(LayerStore):
         """
         if self.color != layer: #to check whether the color is the same from previous.
             self.color = layer
+            self._invalidate()
             return True
         
         return False
@@ -99,22 +128,29 @@ class SetLayerStore(LayerStore):
             - invert.apply: a tuple of number for its colour (r,g,b).
             - start: a tuple of the original color
         
-        Big O-notation: O(apply())
+        Big O-notation: O(apply()), O(1) when the composed colour is cached (no time / position dependent layer).
         """
         
         # colors = self.color.apply(start, timestamp, x, y) ##.apply() to run the color, self.color --> i.e. black rainbow, etc.
 
+        if self.color == None and self.invert == False: #nothing to apply
+            return start
+
+        if self._cached_start == tuple(start): #O(1), nothing changed since the last static composition
+            return self._cached_color
+
         if self.invert == True: ##(O(1))
             if self.color != None: ##(O(1))
-                return invert.apply(self.color.apply(start, timestamp, x, y), timestamp, x, y) #apply the invert if the special is on and the current layer is None
+                color = invert.apply(self.color.apply(start, timestamp, x, y), timestamp, x, y) #apply the invert if the special is on and the current layer is None
                 
             else:
-                return invert.apply(start, timestamp, x, y) #apply the invert of the current layer / color
+                color = invert.apply(start, timestamp, x, y) #apply the invert of the current layer / color
                 
-        if self.color != None:
-            return self.color.apply(start,timestamp, x, y) #if the special is off, simply apply the color
-    
-        return start
+        else:
+            color = self.color.apply(start,timestamp, x, y) #if the special is off, simply apply the color
+
+        self._cache(start, color, self.color != None and self.color.dynamic)
+        return color
 
 
     def erase(self, layer: Layer) -> bool:
@@ -134,6 +170,7 @@ class SetLayerStore(LayerStore):
         
         if self.color != None: #O(1)
             self.color = None
+            self._invalidate()
             return True
         
         return False
@@ -147,14 +184,368 @@ class SetLayerStore(LayerStore):
         """
 
         self.invert = not self.invert 
+        self._invalidate()
+
+    def copy(self) -> SetLayerStore:
+        """
+        Returns an independent store holding the same layer and invert toggle.
+
+        Big-O notation: O(1)
+        """
+        store = SetLayerStore()
+        store.color = self.color
+        store.invert = self.invert
+        store._cached_start, store._cached_color = self._cached_start, self._cached_color
+        return store
         
    
+class SetLayerState:
+    """
+    Immutable, shared state of a set layer square: (layer or None, invert flag).
+    There are at most 2 * (layers + 1) of them, interned in STATES, so a grid of
+    set squares only needs one reference per square. Transitions are table lookups,
+    and the composed colour of a static state is cached on the state itself.
+    """
+    STATES = {}
+
+    def __init__(self, layer: Layer|None, invert: bool) -> None:
+        """
+        Use SetLayerState.get instead, states must be interned.
+
+        Big-O notation: O(1)
+        """
+        self.layer = layer
+        self.invert = invert
+        self._added = {}
+        self._erased = None
+        self._special = None
+        self.cached_start = None
+        self.cached_color = None
+
+    @classmethod
+    def get(cls, layer: Layer|None, invert: bool) -> SetLayerState:
+        """
+        Returns the interned state for this layer and invert flag.
+
+        Big-O notation: O(1)
+        """
+        key = (-1 if layer is None else layer.index, invert)
+        if key not in cls.STATES:
+            cls.STATES[key] = SetLayerState(layer, invert)
+        return cls.STATES[key]
+
+    def add(self, layer: Layer) -> SetLayerState:
+        """
+        Big-O notation: O(1)
+        """
+        if layer is None:
+            return self.erase()
+        if layer.index not in self._added:
+            self._added[layer.index] = SetLayerState.get(layer, self.invert)
+        return self._added[layer.index]
+
+    def erase(self) -> SetLayerState:
+        """
+        Big-O notation: O(1)
+        """
+        if self._erased is None:
+            self._erased = SetLayerState.get(None, self.invert)
+        return self._erased
+
+    def special(self) -> SetLayerState:
+        """
+        Big-O notation: O(1)
+        """
+        if self._special is None:
+            self._special = SetLayerState.get(self.layer, not self.invert)
+        return self._special
+
+    def get_color(self, start, timestamp, x, y) -> tuple[int, int, int]:
+        """
+        Returns the colour a square in this state should show. Same result as SetLayerStore.get_color.
+
+        Big O-notation: O(apply()), O(1) when the composed colour is cached (no time / position dependent layer).
+        """
+        if self.layer is None and not self.invert:
+            return start
+        if self.cached_start == tuple(start):
+            return self.cached_color
+        color = start
+        if self.layer is not None:
+            color = self.layer.apply(color, timestamp, x, y)
+        if self.invert:
+            color = invert.apply(color, timestamp, x, y)
+        if self.layer is None or not self.layer.dynamic:
+            self.cached_start = tuple(start)
+            self.cached_color = color
+        return color
+
+
+class SetLayerCell(LayerStore):
+    """
+    Flyweight set layer store. A view of one square of a grid that only keeps a
+    SetLayerState per square. Behaves exactly like SetLayerStore.
+    """
+
+    def __init__(self, row, index: int) -> None:
+        """
+        - row: the grid row holding the square, with get(index) / set(index, state).
+        - index: the square of the row this cell stands for.
+
+        Big-O notation: O(1)
+        """
+        self.row = row
+        self.index = index
+
+    def add(self, layer: Layer) -> bool:
+        """
+        Big-O notation: O(row.set)
+        """
+        state = self.row.get(self.index)
+        new_state = state.add(layer)
+        if new_state is state:
+            return False
+        self.row.set(self.index, new_state)
+        return True
+
+    def get_color(self, start, timestamp, x, y) -> tuple[int, int, int]:
+        """
+        Big O-notation: O(apply()), O(1) when the composed colour is cached (no time / position dependent layer).
+        """
+        return self.row.get(self.index).get_color(start, timestamp, x, y)
+
+    def erase(self, layer: Layer) -> bool:
+        """
+        Big-O notation: O(row.set)
+        """
+        self.row.set(self.index, self.row.get(self.index).erase())
+        return layer != None
+
+    def apply_layers(self, layers: list[Layer], erase: bool = False) -> bool:
+        """
+        Adds each layer in turn, or erases them, then writes the square back once if it changed.
+        Returns whether it changed.
+
+        Big-O notation: O(k + row.set) where k is the number of layers
+        """
+        old_state = self.row.get(self.index)
+        state = old_state
+        for layer in layers:
+            state = state.erase() if erase else state.add(layer)
+        if state is old_state:
+            return False
+        self.row.set(self.index, state)
+        return True
+
+    def special(self):
+        """
+        Big-O notation: O(row.set)
+        """
+        self.row.set(self.index, self.row.get(self.index).special())
+
+    def copy(self) -> SetLayerStore:
+        """
+        Returns a store detached from the grid, in the same state.
+
+        Big-O notation: O(1)
+        """
+        state = self.row.get(self.index)
+        store = SetLayerStore()
+        store.color = state.layer
+        store.invert = state.invert
+        return store
+
+
+class CopyOnWriteCell(LayerStore):
+    """
+    A view of one square of a grid whose stores are shared between versions of the grid.
+    Reads go to the square's store, changes are made to a copy of it which then replaces it,
+    so a store held by a snapshot never changes. Behaves exactly like the store itself.
+    """
+
+    def __init__(self, row, index: int) -> None:
+        """
+        - row: the grid row holding the square, with get(index) / set(index, store).
+        - index: the square of the row this cell stands for.
+
+        Big-O notation: O(1)
+        """
+        self.row = row
+        self.index = index
+
+    def add(self, layer: Layer) -> bool:
+        """
+        Big-O notation: O(copy + add + row.set)
+        """
+        store = self.row.get(self.index).copy()
+        if store.add(layer):
+            self.row.set(self.index, store)
+            return True
+        return False
+
+    def get_color(self, start, timestamp, x, y) -> tuple[int, int, int]:
+        """
+        Big-O notation: O(get_color)
+        """
+        return self.row.get(self.index).get_color(start, timestamp, x, y)
+
+    def erase(self, layer: Layer) -> bool:
+        """
+        Big-O notation: O(copy + erase + row.set)
+        """
+        store = self.row.get(self.index).copy()
+        if store.erase(layer):
+            self.row.set(self.index, store)
+            return True
+        return False
+
+    def apply_layers(self, layers: list[Layer], erase: bool = False) -> bool:
+        """
+        Adds each layer in turn, or erases them, on a single copy of the store,
+        then writes the square back once if it changed. Returns whether it changed.
+
+        Big-O notation: O(copy + k * add + row.set) where k is the number of layers
+        """
+        store = self.row.get(self.index).copy()
+        changed = False
+        for layer in layers:
+            changed = (store.erase(layer) if erase else store.add(layer)) or changed
+        if changed:
+            self.row.set(self.index, store)
+        return changed
+
+    def special(self):
+        """
+        Big-O notation: O(copy + special + row.set)
+        """
+        store = self.row.get(self.index).copy()
+        store.special()
+        self.row.set(self.index, store)
+
+    def copy(self) -> LayerStore:
+        """
+        Returns a store detached from the grid, with the same layers.
+
+        Big-O notation: O(copy)
+        """
+        return self.row.get(self.index).copy()
+
+
+class LayerNode:
+    """
+    A node of the shared, persistent trie of additive layer sequences.
+    Each node stands for the sequence of layers on the path from EMPTY_SEQUENCE down to it.
+
+    Nodes are interned by (parent, layer), so there is exactly one live node per distinct sequence
+    and every store holding that sequence points at it. The simplified program and the composed
+    colour are therefore computed once per sequence instead of once per grid square.
+    A store that erased its first layers keeps pointing at the same node and skips them, see AdditiveLayerStore.
+    Only stores and children hold a node strongly: the intern table and the remembered reversed
+    sequence hold it weakly, so a sequence no store uses anymore is freed at once,
+    without waiting for the garbage collector.
+    """
+    __slots__ = ("parent", "layer", "depth", "absorb", "program", "program_first", "cached_start", "cached_color",
+                 "_reversed", "__weakref__")
+
+    # (id of the parent, layer index) --> child, shared by every node. A parent outlives its
+    # children, so its id is not reused while any of its entries are alive.
+    _interned = WeakValueDictionary()
+
+    def __init__(self, parent: LayerNode|None, layer: Layer|None) -> None:
+        """
+        Big-O notation: O(1)
+        """
+        self.parent = parent
+        self.layer = layer
+        self.depth = 0 if parent is None else parent.depth + 1
+        if layer is None:
+            self.absorb = -1 #position of the most recent layer that ignores its input colour, -1 if none
+        else:
+            self.absorb = self.depth - 1 if layer.constant else parent.absorb
+        self.program = None
+        self.program_first = None #position the program starts at
+        self.cached_start = None
+        self.cached_color = None
+        self._reversed = None #weak reference to the reversed sequence, see reversed
+
+    def child(self, layer: Layer) -> LayerNode:
+        """
+        Returns the interned node for this sequence followed by layer.
+
+        Big-O notation: O(1)
+        """
+        key = (id(self), layer.index)
+        node = LayerNode._interned.get(key)
+        if node is None:
+            node = LayerNode(self, layer)
+            LayerNode._interned[key] = node
+        return node
+
+    def layers(self, start: int = 0) -> list[Layer]:
+        """
+        Returns the layers of this sequence from position start onwards, first to last.
+
+        Big-O notation: O(n - start) where n is the length of the sequence
+        """
+        layers = []
+        node = self
+        while node.depth > start:
+            layers.append(node.layer)
+            node = node.parent
+        layers.reverse()
+        return layers
+
+    def reversed(self) -> LayerNode:
+        """
+        Returns the interned node for this sequence in reverse order. Remembered both ways while both are alive.
+
+        Big-O notation: O(n) the first time, O(1) after
+        """
+        node = None if self._reversed is None else self._reversed()
+        if node is None:
+            node = EMPTY_SEQUENCE
+            for layer in reversed(self.layers()):
+                node = node.child(layer)
+            self._reversed = ref(node)
+            node._reversed = ref(self)
+        return node
+
+    def get_color(self, start, timestamp, x, y, skip: int = 0) -> tuple[int, int, int]:
+        """
+        Returns the colour of this sequence without its first skip layers applied to start,
+        skipping the layers hidden by the most recent constant layer too.
+
+        Big-O notation: O(p x apply()) where p is the length of the simplified program,
+        O(1) when the composed colour is cached (no time / position dependent layer).
+        """
+        first = max(self.absorb, skip)
+        if self.program_first != first:
+            self.program = simplify(self.layers(first))
+            self.program_first = first
+            self.cached_start = None
+        elif self.cached_start == tuple(start):
+            return self.cached_color
+        color = self.program.apply(start, timestamp, x, y)
+        if not self.program.dynamic:
+            self.cached_start = tuple(start)
+            self.cached_color = color
+        return color
+
+
+EMPTY_SEQUENCE = LayerNode(None, None)
+
+
 class AdditiveLayerStore(LayerStore):
     """
     Additive layer store. Each added layer applies after all previous ones.
     - add: Add a new layer to be added last.
     - erase: Remove the first layer that was added. Ignore what is currently selected.
     - special: Reverse the order of current layers (first becomes last, etc.)
+
+    The layers are held as a pointer into the shared trie of LayerNode,
+    so squares painted alike share one sequence and one composed colour.
+    Erasing only counts the layers to skip at the front of the sequence. They are dropped
+    for good once they make up more than half of it, or before a special.
     """
 
     def __init__(self,max_capacity = 900):
@@ -162,17 +553,54 @@ class AdditiveLayerStore(LayerStore):
         Constructor. inherit from LayerStore.
         - max_capacity = an integer to indicate the maximum of capacity
 
-        Big-O notation: O(max_capacity)
+        Big-O notation: O(1)
         """
-        ## use queue
-        CircularQueue.__init__(self, max_capacity)
-        self.queue = CircularQueue(max_capacity)
-        self.stack = ArrayStack(max_capacity)
+        LayerStore.__init__(self)
+        self.max_capacity = max_capacity
+        self.node = EMPTY_SEQUENCE
+        self.skip = 0 #number of erased layers at the front of node
+
+    @property
+    def absorb(self) -> int:
+        """
+        Position of the most recent layer that ignores its input colour, -1 if none.
+
+        Big-O notation: O(1)
+        """
+        return self.node.absorb - self.skip if self.node.absorb >= self.skip else -1
+
+    def __len__(self) -> int:
+        """
+        Number of layers in the store.
+
+        Big-O notation: O(1)
+        """
+        return self.node.depth - self.skip
+
+    def layers(self) -> list[Layer]:
+        """
+        Returns the layers of the store, first to last.
+
+        Big-O notation: O(n) where n is the length of the sequence
+        """
+        return self.node.layers(self.skip)
+
+    def _drop_skipped(self) -> None:
+        """
+        Moves to the interned sequence of the layers after the skipped ones.
+
+        Big-O notation: O(n) where n is the number of layers
+        """
+        node = EMPTY_SEQUENCE
+        for layer in self.node.layers(self.skip):
+            node = node.child(layer)
+        self.node = node
+        self.skip = 0
 
 
     def add(self, layer: Layer) -> bool:
         """
-        Adding the layer color to the the Queue.
+        Adding the layer color after all previous ones.
 
         Argument:
             - layer: the colour informations --> (index, apply, name, bg=(r, g, b))
@@ -184,8 +612,10 @@ class AdditiveLayerStore(LayerStore):
         """
 
         if layer != None: #O(1), to check whether the layer is None, 
+            if len(self) >= self.max_capacity:
+                raise Exception("Store is full")
             self.color = layer
-            self.queue.append(self.color) #O(1), appending the layer color to the queue
+            self.node = self.node.child(layer) #O(1), move to the interned sequence with the layer appended
             return True
         return False
 
@@ -203,21 +633,16 @@ class AdditiveLayerStore(LayerStore):
         Return:
             - self.color: a tuple of number for its (r,g,b).
 
-        Big-O notation: O(n x apply())
+        Big-O notation: O(p x apply()) where p is the length of the simplified program,
+        O(k) to simplify the k layers from the most recent constant layer onwards, once per distinct sequence,
+        O(1) when the composed colour of the sequence is cached (no time / position dependent layer).
         """
 
-        self.color = start
-        
-        if self.color == None: #check whether the color is None
+        if start == None or len(self) == 0: #check whether the color is None or there is nothing to apply
             return start
-        else:
-            if self.color != None:
-                for i in range (len(self.queue)):
-                    colors = self.queue.serve() #serving the first color in the queue.
-                    self.color = colors.apply(self.color, timestamp, x, y) #apply the color
-                    self.queue.append (colors) #then append the color too the queue.
-                
-                return self.color
+
+        self.color = self.node.get_color(start, timestamp, x, y, self.skip) #shared by every square with the same layers
+        return self.color
 
 
     def erase(self, layer: Layer) -> bool:
@@ -231,12 +656,17 @@ class AdditiveLayerStore(LayerStore):
         Return :
             - Boolean true if its successfully removed / erased , false otherwise.
 
-        Big-O notation: O(1)
+        Big-O notation: O(1) amortised: dropping the skipped layers costs O(n) for the n layers left,
+        fewer than the erases since they were last dropped.
         """
 
         self.color = layer
         if self.color != None: #check whether the layer is None
-            self.queue.serve() #if not, remove the element from the queue (serve it)
+            if len(self) == 0:
+                raise Exception("Store is empty")
+            self.skip += 1 #if not, skip the first layer
+            if 2 * self.skip > self.node.depth:
+                self._drop_skipped()
             return True 
 
         return False
@@ -247,16 +677,22 @@ class AdditiveLayerStore(LayerStore):
         Special mode. Different for each store implementation.
         Reverse the order of the color that has been added, so the last one become the first one and vice versa.
         
-        Big-O notation: O(n) where n is the length of queue
+        Big-O notation: O(n) where n is the number of layers, O(1) if nothing is skipped and the reversed sequence is already known
+        """
+        if self.skip > 0:
+            self._drop_skipped()
+        self.node = self.node.reversed()
+
+    def copy(self) -> AdditiveLayerStore:
         """
-        for i in range (len(self.queue)): #O(n) where n is the length of queue.
-            queue_order = self.queue.serve() 
-            
-            if queue_order != None: #check whether the queue serving None or no.
-                self.stack.push(queue_order) #if no append it to stack
+        Returns an independent store holding the same layers. The sequence itself is shared, it never changes.
 
-        for j in range ((len(self.stack))): #O(n) where n is the length of stack
-            self.queue.append(self.stack.pop()) #pop it from the stack
+        Big-O notation: O(1)
+        """
+        store = AdditiveLayerStore(self.max_capacity)
+        store.node = self.node
+        store.skip = self.skip
+        return store
 
 
 class SequenceLayerStore(LayerStore):
@@ -272,11 +708,13 @@ class SequenceLayerStore(LayerStore):
         """
         Constructor, inherit from the Layerstore.
         self.bset is a bitvector set.
+        self.names holds the same layers sorted by name, kept up to date for special.
 
         Big-O notation: O(max_capacity)
         """
         LayerStore.__init__(self)
         self.bset = BSet(max_capacity)
+        self.names = OrderStatisticTree()
         
 
     def add(self, layer: Layer) -> bool:
@@ -290,11 +728,13 @@ class SequenceLayerStore(LayerStore):
         Return:
             - Boolean true if its successfully added, false otherwise.
 
-        Big-O Notation: O(isinstance) --> O(1) 
+        Big-O Notation: O(log(m)) where m is the number of layers applied
 
         """
         if self.color != layer and ((layer.index+1) not in self.bset):
             self.bset.add(layer.index+1) # adding the layer to the bset if the layer has not been added before.
+            self.names.add(ListItem(layer, layer.name)) #O(log(m))
+            self._invalidate()
             return True
         
         return False
@@ -313,7 +753,8 @@ class SequenceLayerStore(LayerStore):
         Return:
             - self.color: a tuple of number for its colour (r,g,b)
 
-        Big-O notation: O(n x apply()) where n is the length of bitvector in bset.
+        Big-O notation: O(p x apply()) where p is the length of the simplified program,
+        O(n) to simplify after a change where n is the length of bitvector in bset, O(1) when the composed colour is cached.
         """
 
         ## use for loop
@@ -322,13 +763,21 @@ class SequenceLayerStore(LayerStore):
 
         self.color = start
         
-        if self.color == None: #O(1)
+        if self.color == None or self.bset.is_empty(): #O(1)
             return self.color
 
-        for i in range (1, self.bset.elems.bit_length()+ 1): #O(n), range of bit length of the bitvector set.
-            if i in self.bset: #O(n)
-                self.color = get_layers()[i-1].apply(self.color, timestamp, x, y) #O(1), get the layers color and apply it.
+        if self._cached_start == tuple(start): #O(1), nothing changed since the last static composition
+            return self._cached_color
+
+        if self._program == None: #simplify once per state
+            self._program = simplify(
+                get_layers()[i-1] #O(1), get the layers color.
+                for i in range (1, self.bset.elems.bit_length()+ 1) #O(n), range of bit length of the bitvector set.
+                if i in self.bset
+            )
+        self.color = self._program.apply(self.color, timestamp, x, y) #apply the simplified layers
 
+        self._cache(start, self.color, self._program.dynamic)
         return self.color
 
     
@@ -343,13 +792,18 @@ class SequenceLayerStore(LayerStore):
         Return:
             - Boolean true if its successfully removed / erased, false otherwise.
 
-        Big-O notation: O(isinstance) --> O(1)
+        Big-O notation: O(log(m)) where m is the number of layers applied
         """
         
         self.color = layer
 
         if self.color != None: #check whether the self.color is none
             self.bset.remove(layer.index+1) #remove the layer from the bset with index+1.
+            position = self.names.rank(layer.name) #O(log(m))
+            while self.names[position].value is not layer: #only when several layers share a name
+                position += 1
+            self.names.delete_at_index(position) #O(log(m))
+            self._invalidate()
             return True
         
         return False
@@ -363,32 +817,32 @@ class SequenceLayerStore(LayerStore):
         Argument: -
         Return: -
 
-        Big-O notation: O((n * log(len(self.list))) where n is the length of the bit length and m is the complexity of remove --> isinstance.
+        Big-O notation: O(log(m)) where m is the number of layers applied, the median is looked up in self.names.
         """
-        
-        ##bset , clear the sorted list, then go through every single elements in our bset   
-        self.list = ArraySortedList(len(self.bset)) 
-
-        if (len(self.bset)) > 0: 
-            for i in range (1, self.bset.elems.bit_length() + 1): #O(n)
-                if i in self.bset: # to check whether there the color is appear
-                    self.list.add(ListItem(get_layers()[i-1] , get_layers()[i-1].name)) #O(log(n)), if yes, add it to the sorted list.
-            
-            if len(self.list) % 2 == 0: #O(1), to check the middle elements
-                mid = (len(self.list) // 2) - 1 #O(1), when the total number of elements is even then we have to minus it with one
-  
-            else:
-                mid = (len(self.list)) // 2 #O(1) when the total number of elements is odd.
+        if len(self.names) > 0:
+            mid = (len(self.names) - 1) // 2 #O(1), the lower middle when the number of layers is even
+            item = self.names.delete_at_index(mid) #O(log(m))
+            self.bset.remove(item.value.index + 1) #O(1), remove the color from the bset
+            self._invalidate()
+
+    def copy(self) -> SequenceLayerStore:
+        """
+        Returns an independent store with the same layers applied.
 
-            self.bset.remove((self.list[mid].value.index) + 1) #O(1), remove the color from the bset
+        Big-O notation: O(1)
+        """
+        store = SequenceLayerStore()
+        store.bset.elems = self.bset.elems
+        store.names = self.names.copy() #O(1), the tree is persistent
+        store._program = self._program
+        store._cached_start, store._cached_color = self._cached_start, self._cached_color
+        return store
         
         
 if __name__ == "__main__":
     q1 = AdditiveLayerStore(200)
     print (q1.add(black))
     # print (q1.get_color((0,5,0), 0,3,4))
-    # q1.stack.push("red")
-    # q1.stack.push("hello")
     # print (q1.special())
     # s = AdditiveLayerStore()
     # s.add("lighten")
@@ -18,14 +18,23 @@ class Layer:
     apply: function
     name: str = field(init=False)
     bg: tuple[int, int, int] | None = None
-
-    
+    time_dependent: bool = field(init=False, default=False)
+    position_dependent: bool = field(init=False, default=False)
+    pointwise: bool = field(init=False, default=False)
+    constant: bool = field(init=False, default=False)
 
     def __post_init__(self):
         if hasattr(self.apply, "__bg__"):
             self.bg = self.apply.__bg__
+        for flag, value in getattr(self.apply, "__properties__", {}).items():
+            setattr(self, flag, value)
         self.name = self.apply.__name__
 
+    @property
+    def dynamic(self) -> bool:
+        """Whether the output can change with the timestamp or the grid position."""
+        return self.time_dependent or self.position_dependent
+
 
 class background(object):
     """Simple decorator to add a __bg__ property to a layer
@@ -46,6 +55,37 @@ class background(object):
         func.__bg__ = self.val
         return layer
 
+class properties(object):
+    """Simple decorator to declare how a layer behaves, so stores can skip work.
+
+    - time_dependent: the output depends on the timestamp.
+    - position_dependent: the output depends on the x, y position.
+    - pointwise: each channel is mapped independently by the same function of that channel only.
+    - constant: the input colour is ignored entirely.
+
+    Usage:  @register
+            @properties(pointwise=True)
+            def my_special_layer(...):
+    """
+    FLAGS = ("time_dependent", "position_dependent", "pointwise", "constant")
+
+    def __init__(self, **flags):
+        for flag in flags:
+            if flag not in self.FLAGS:
+                raise ValueError(f"Unknown layer property {flag}.")
+        self.val = flags
+
+    def __call__(self, layer: function|Layer):
+        # This could be applied before or after registration
+        if isinstance(layer, Layer):
+            func = layer.apply
+            for flag, value in self.val.items():
+                setattr(layer, flag, value)
+        else:
+            func = layer
+        func.__properties__ = {**getattr(func, "__properties__", {}), **self.val}
+        return layer
+
 def register(func):
     """
     Layer register function.
@@ -66,5 +106,90 @@ def get_layers():
     return LAYERS
 
 
+@dataclass(frozen=True)
+class ChannelMap:
+    """A lookup table standing in for a run of static pointwise layers.
+    Channels are expected to be integers in the range [0, 255]."""
+
+    table: tuple[int, ...]
+    dynamic = False
+
+    def apply(self, color, timestamp, x, y):
+        return tuple(self.table[c] for c in color)
+
+
+@dataclass(frozen=True)
+class Fill:
+    """A fixed colour standing in for a static constant layer and everything after it that folds into it."""
+
+    color: tuple[int, int, int]
+    dynamic = False
+
+    def apply(self, color, timestamp, x, y):
+        return self.color
+
+
+class Program:
+    """A simplified, equivalent replacement for a sequence of layers. See `simplify`."""
+
+    def __init__(self, steps: list) -> None:
+        self.steps = steps
+        self.dynamic = any(step.dynamic for step in steps)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def apply(self, color, timestamp, x, y):
+        if len(self.steps) == 0:
+            return tuple(color)
+        for step in self.steps:
+            color = step.apply(color, timestamp, x, y)
+        return color
+
+
+IDENTITY_TABLE = tuple(range(256))
+_channel_tables = {}
+
+def _channel_table(layer: Layer) -> tuple[int, ...]:
+    """Lookup table of a static pointwise layer, built once per layer."""
+    if layer.index not in _channel_tables:
+        _channel_tables[layer.index] = tuple(layer.apply((v, v, v), 0, 0, 0)[0] for v in range(256))
+    return _channel_tables[layer.index]
+
+def simplify(layers) -> Program:
+    """
+    Optimisation pass rewriting a sequence of layers (applied first to last)
+    into a minimal equivalent program, using the properties declared with @properties.
+
+    - A static constant layer discards everything before it and becomes a Fill.
+    - Runs of static pointwise layers are composed into a single ChannelMap,
+      which is folded into a preceding Fill. Maps that end up as the identity
+      (invert twice, for example) are dropped.
+    - Dynamic layers, and layers without declared properties, are kept as they are.
+
+    Big-O notation: O(n) where n is the number of layers (a table composition costs a constant 256 lookups)
+    """
+    steps = []
+    for layer in layers:
+        if layer.constant and not layer.dynamic:
+            steps = [Fill(layer.apply((0, 0, 0), 0, 0, 0))]
+        elif layer.constant:
+            steps = [layer]
+        elif layer.pointwise and not layer.dynamic:
+            table = _channel_table(layer)
+            last = steps[-1] if len(steps) > 0 else None
+            if isinstance(last, Fill):
+                steps[-1] = Fill(tuple(table[c] for c in last.color))
+            elif isinstance(last, ChannelMap):
+                steps[-1] = ChannelMap(tuple(table[v] for v in last.table))
+            else:
+                steps.append(ChannelMap(table))
+            if steps[-1] == ChannelMap(IDENTITY_TABLE):
+                steps.pop()
+        else:
+            steps.append(layer)
+    return Program(steps)
+
+
 # if __name__ == "__main__":
 #     print (Layer.__name__)
@@ -3,10 +3,11 @@ All layers are defined here.
 """
 
 import colorsys
-from layer_util import background, register
+from layer_util import background, properties, register
 
 @register
 @background(200, 0, 120)
+@properties(time_dependent=True, position_dependent=True, constant=True)
 def rainbow(color, timestamp, x, y):
     return tuple(
         int(255*x)
@@ -15,11 +16,13 @@ def rainbow(color, timestamp, x, y):
 
 @register
 @background(170, 170, 170)
+@properties(constant=True)
 def black(color, timestamp, x, y):
     return (0, 0, 0)
 
 @register
 @background(240, 240, 240)
+@properties(pointwise=True)
 def lighten(color, timestamp, x, y):
     return tuple(
         min(255, x + 40)
@@ -28,6 +31,7 @@ def lighten(color, timestamp, x, y):
 
 @register
 @background(0, 255, 255)
+@properties(pointwise=True)
 def invert(color, timestamp, x, y):
     return tuple(
         255 - c
@@ -36,21 +40,25 @@ def invert(color, timestamp, x, y):
 
 @register
 @background(255, 0, 0)
+@properties(constant=True)
 def red(color, timestamp, x, y):
     return (255, 0, 0)
 
 @register
 @background(0, 255, 0)
+@properties(constant=True)
 def green(color, timestamp, x, y):
     return (0, 255, 0)
 
 @register
 @background(0, 0, 255)
+@properties(constant=True)
 def blue(color, timestamp, x, y):
     return (0, 0, 255)
 
 @register
 @background(100, 170, 255)
+@properties(time_dependent=True, position_dependent=True)
 def sparkle(color, timestamp, x, y):
     ts = int((timestamp + x/3 + y/5) * 3)
     other = x
@@ -67,6 +75,7 @@ def sparkle(color, timestamp, x, y):
 
 @register
 @background(30, 30, 30)
+@properties(pointwise=True)
 def darken(color, timestamp, x, y):
     return tuple(
         max(0, x - 40)
@@ -1,63 +1,30 @@
 import arcade
 import arcade.key as keys
-import math
 from grid import *
-from layer_util import get_layers, Layer
+from layer_util import get_layers
 from layers import lighten
-from undo import *
-from replay import *
-from action import PaintStep
+from commands import CommandChannel, WindowProxy
+from window_logic import WindowLogic
 
-class MyWindow(arcade.Window):
+class MyWindow(WindowLogic, arcade.Window):
     """ Painter Window """
 
-    SCREEN_WIDTH = 800
-    SCREEN_HEIGHT = 700
-    SIDEBAR_WIDTH = 100
-    BUTTONS_HEIGHT = 100
-    SCREEN_TITLE = "Paint"
-
-    REPLAY_TIMER_DELTA = 0.05
-
-    GRID_SIZE_X = 32
-    GRID_SIZE_Y = 32
-
-    BG = [255, 255, 255]
+    KEY_Y = keys.Y
+    KEY_Z = keys.Z
+    MOD_CTRL = keys.MOD_CTRL
 
     # SCAFFOLD PART
     # Unless you're adding new features, you shouldn't need to touch this.
+    # Everything but drawing is in WindowLogic, and the painting logic, the student part, in Painter.
 
     def __init__(self) -> None:
         """Initialise visual and logic variables."""
-        super().__init__(self.SCREEN_WIDTH, self.SCREEN_HEIGHT, self.SCREEN_TITLE)
+        arcade.Window.__init__(self, self.SCREEN_WIDTH, self.SCREEN_HEIGHT, self.SCREEN_TITLE)
         arcade.set_background_color(self.BG)
-        self.grid: Grid = None
-        self.draw_style = Grid.DRAW_STYLE_SET
-        self.z_pressed = False
-        self.y_pressed = False
-        self.z_timer = 0
-        self.y_timer = 0
-        self.enable_ui = True
-        self.replay_timer = 0
-        self.on_init()
-
-    def reset(self) -> None:
-        """Reset the screen."""
-        self.grid = Grid(self.draw_style, self.GRID_SIZE_X, self.GRID_SIZE_Y)
-        self.timestamp = 0
-
-        self.selected_layer_index = -1
-        self.dragging = None
-        self.prev_drawn = None
-        self.prev_pos = None
-        self.draw_size = 2
+        WindowLogic.__init__(self)
 
-        # Visual calculations
-        self.DRAW_PANEL = self.SCREEN_WIDTH - self.SIDEBAR_WIDTH
-        self.GRID_SQ_WIDTH = self.DRAW_PANEL / self.GRID_SIZE_X
-        self.GRID_SQ_HEIGHT = self.SCREEN_HEIGHT / self.GRID_SIZE_Y
-        self.LAYER_BUTTON_SIZE = self.SIDEBAR_WIDTH / 2
-        # Action button sprites
+    def build_ui(self) -> None:
+        """Builds the action button sprites for the current draw style."""
         self.action_buttons = arcade.SpriteList()
         self.draw_mode_button = arcade.Sprite(
             "img/on_off.png" if self.draw_style == Grid.DRAW_STYLE_SET else (
@@ -97,11 +64,10 @@ class MyWindow(arcade.Window):
         self.special_button.center_y = 5 * self.LAYER_BUTTON_SIZE / 2
         self.action_buttons.append(self.special_button)
 
-        self.on_reset()
-
-    def setup(self) -> None:
-        """Set up the game and initialize the variables."""
-        self.reset()
+    def on_close(self) -> None:
+        """Saves whatever the autosave has not written yet before closing."""
+        WindowLogic.on_close(self)
+        arcade.Window.on_close(self)
 
     def on_draw(self) -> None:
         """Draw everything"""
@@ -134,261 +100,6 @@ class MyWindow(arcade.Window):
                     self.grid[x][y].get_color(self.BG[:], self.timestamp, x, y),
                 )
 
-    def on_mouse_press(self, x: int, y: int, button: int, modifiers: int) -> None:
-        """Called when the mouse buttons are pressed."""
-        if x > self.DRAW_PANEL:
-            if not self.enable_ui:
-                return
-            # Buttons
-            for i, layer in enumerate(get_layers()):
-                if layer is None: break
-                xstart = (i % 2) * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-                xend = ((i % 2)+1) * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-                ystart = self.SCREEN_HEIGHT - (i//2) * self.LAYER_BUTTON_SIZE
-                yend = self.SCREEN_HEIGHT - (i//2+1) * self.LAYER_BUTTON_SIZE
-                if xstart <= x < xend and yend <= y < ystart:
-                    self.selected_layer_index = i
-                    break
-            # Actions
-            xstart = self.DRAW_PANEL
-            xend = self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-            ystart = self.LAYER_BUTTON_SIZE
-            yend = 0
-            if xstart <= x < xend and yend <= y < ystart:
-                self.change_draw_mode()
-            xstart = self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-            xend = 2 * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-            ystart = self.LAYER_BUTTON_SIZE
-            yend = 0
-            if xstart <= x < xend and yend <= y < ystart:
-                self.start_replay()
-            xstart = self.DRAW_PANEL
-            xend = self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-            ystart = 2 * self.LAYER_BUTTON_SIZE
-            yend = self.LAYER_BUTTON_SIZE
-            if xstart <= x < xend and yend <= y < ystart:
-                self.on_increase_brush_size()
-            xstart = self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-            xend = 2 * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-            ystart = 2 * self.LAYER_BUTTON_SIZE
-            yend = self.LAYER_BUTTON_SIZE
-            if xstart <= x < xend and yend <= y < ystart:
-                self.on_decrease_brush_size()
-            xstart = self.DRAW_PANEL
-            xend = 1 * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
-            ystart = 3 * self.LAYER_BUTTON_SIZE
-            yend = 2 * self.LAYER_BUTTON_SIZE
-            if xstart <= x < xend and yend <= y < ystart:
-                self.on_special()
-        else:
-            self.dragging = True
-            self.try_draw(x, y)
-
-    def on_mouse_release(self, x: int, y: int, button: int, modifiers: int):
-        """Called when the mouse buttons are released."""
-        self.dragging = False
-        self.prev_drawn = None
-        self.prev_pos = None
-
-    def on_mouse_motion(self, x, y, dx, dy) -> None:
-        """Called when the mouse moves."""
-        if not self.dragging:
-            return
-        if not(0 <= self.selected_layer_index < len(get_layers())):
-            return
-        if x > self.DRAW_PANEL:
-            return
-        self.try_draw(x, y)
-
-    def on_key_press(self, symbol: int, modifiers: int) -> None:
-        """Called when a keyboard key is pressed."""
-        if not self.enable_ui:
-            return
-        self.z_pressed = keys.Z == symbol and (modifiers & keys.MOD_CTRL)
-        self.y_pressed = keys.Y == symbol and (modifiers & keys.MOD_CTRL)
-        if self.z_pressed:
-            self.on_undo()
-            self.z_timer = 0.5
-        if self.y_pressed:
-            self.on_redo()
-            self.y_timer = 0.5
-
-    def on_key_release(self, symbol: int, modifiers: int) -> None:
-        """Called when a keyboard key is released."""
-        self.z_pressed = False
-        self.y_pressed = False
-
-    def try_draw(self, x, y) -> None:
-        """Attempt to draw at a position, but safely fail if an invalid square."""
-        if self.selected_layer_index == -1:
-            return
-        layer = get_layers()[self.selected_layer_index]
-        if self.prev_pos is not None:
-            # Try draw in increments of 0.5 to avoid skipping squares.
-            mhat_dist = abs(x - self.prev_pos[0]) + abs(y - self.prev_pos[1])
-            increment = 0.5
-            points_to_draw = []
-            for d in range(1, math.ceil(mhat_dist/increment)+1):
-                distance = min(d * increment / mhat_dist, 1)
-                nx = distance * (x - self.prev_pos[0]) + self.prev_pos[0]
-                ny = distance * (y - self.prev_pos[1]) + self.prev_pos[1]
-                nx_pos = int(nx // self.GRID_SQ_WIDTH)
-                ny_pos = int(ny // self.GRID_SQ_HEIGHT)
-                points_to_draw.append((nx_pos, ny_pos))
-        else:
-            x_pos = int(x // self.GRID_SQ_WIDTH)
-            y_pos = int(y // self.GRID_SQ_HEIGHT)
-            points_to_draw = [
-                (x_pos, y_pos)
-            ]
-        for px, py in points_to_draw:
-            if self.prev_drawn is None or (px, py) != self.prev_drawn:
-                if 0 <= px < self.GRID_SIZE_X and 0 <= py < self.GRID_SIZE_Y:
-                    self.on_paint(layer, px, py)
-                    self.prev_drawn = (px, py)
-        self.prev_pos = (x, y)
-
-    def start_replay(self) -> None:
-        """Begin the replay mode."""
-        self.enable_ui = False
-        self.grid = Grid(self.draw_style, self.GRID_SIZE_X, self.GRID_SIZE_Y)
-        self.replay_timer = self.REPLAY_TIMER_DELTA
-        self.on_replay_start()
-
-    def on_update(self, delta_time) -> None:
-        """Movement and game logic."""
-        self.timestamp += delta_time
-        if self.z_pressed:
-            self.z_timer -= delta_time
-            if self.z_timer <= 0:
-                self.on_undo()
-                self.z_timer += 0.05
-        if self.y_pressed:
-            self.y_timer -= delta_time
-            if self.y_timer <= 0:
-                self.on_redo()
-                self.y_timer += 0.05
-        if not self.enable_ui:
-            self.replay_timer -= delta_time
-            if self.replay_timer <= 0:
-                self.replay_timer += self.REPLAY_TIMER_DELTA
-                finished = self.on_replay_next_step()
-                if finished:
-                    self.enable_ui = True
-
-    def change_draw_mode(self) -> None:
-        """Changes the draw mode of the application, and resets the window."""
-        if self.draw_style == Grid.DRAW_STYLE_SET:
-            self.draw_style = Grid.DRAW_STYLE_ADD
-        elif self.draw_style == Grid.DRAW_STYLE_ADD:
-            self.draw_style = Grid.DRAW_STYLE_SEQUENCE
-        elif self.draw_style == Grid.DRAW_STYLE_SEQUENCE:
-            self.draw_style = Grid.DRAW_STYLE_SET
-        self.reset()
-
-    # STUDENT PART
-
-    def on_init(self):
-        """Initialisation that occurs after the system initialisation.
-        Big-O notation: O(n+m) where n is the initialization of self.undo_aciton with UndoTracker() and m is the initialization of self.replay_action with ReplayTracker()
-        """
-        self.undo_action = UndoTracker() #instantiate the UndoTracker object.
-
-        self.replay_action = ReplayTracker() #instantiate the ReplayTracker object.
-
-    def on_reset(self):
-        """Called when a window reset is requested.
-        Big-O notation: O(n+m)
-        """
-
-        self.undo_action = UndoTracker() #instantiate the UndoTracker object.
-        self.replay_action = ReplayTracker() #instantiate the ReplayTracker object.
-
-    def on_paint(self, layer: Layer, px, py):
-        """
-        Called when a grid square is clicked on, which should trigger painting in the vicinity.
-        Vicinity squares outside of the range [0, GRID_SIZE_X) or [0, GRID_SIZE_Y) can be safely ignored.
-
-        layer: The layer being applied.
-        px: x position of the brush.
-        py: y position of the brush.
-
-        Big-O notation: O(nm) where n is the range of grid x, and m is the range of grid y
-        """
-        
-        p = PaintAction()
-        d = self.grid.brush_size
-
-        for i in range (self.grid.x): #O(n)
-            for j in range (self.grid.y): #O(m)
-                if (abs(px-i) + abs(py-j)) <= d: #using the manhatan distance to find the coordinate of the brush (as a diamond)
-                    indicator = self.grid[i][j].add(layer)
-
-                    if indicator == True: #to check whether the grid is adding the layer colour
-                        p.add_step(PaintStep((i,j),layer)) #if true, add it to the add_step
-        
-        self.undo_action.stack_redo.clear()
-        self.undo_action.add_action(p) #O(1)
-        self.replay_action.add_action(p) #O(1)
-        
-
-    def on_undo(self):
-        """Called when an undo is requested.
-
-        Big-O notation: O(nm * special) where nm is the complexity of grid special, and special is depend on which LayerStore in use. 
-        """
-        undos = self.undo_action.undo(self.grid) # assign the undo action from self.undo_action that happen in self.grid to the undos
-
-        if undos != None: #check whether the undos is happen, if not none then add the action.
-            self.replay_action.add_action(undos, is_undo=True)
-        
-
-    def on_redo(self):
-        """Called when a redo is requested.
-
-        Big-O notation: O(nm * special) where nm is the complexity of grid special, and special is depend on which LayerStore in use. 
-        """
-        redos = self.undo_action.redo(self.grid) # assign the redo action hfrom self.undo_action that happen in self.grid to redos.
-        
-        if redos != None: #check whether the redos is happen, if not none then add the action.
-            self.replay_action.add_action(redos) 
-
-    def on_special(self):
-        """Called when the special action is requested based on which LayerStore are in use.
-    
-        Big-O notation: O(nm * special) where nm is the complexity of grid special, and special is depend on which LayerStore in use. 
-        """
-        self.grid.special() #O(nm)
-        self.undo_action.add_action(PaintAction(is_special=True)) #O(1)
-        self.replay_action.add_action(PaintAction(is_special=True)) #O(1)
-
-    def on_replay_start(self):
-        """Called when the replay starting is requested.
-        Big-O notation: -
-        """
-        self.replay_action.start_replay()
-
-    def on_replay_next_step(self) -> bool:
-        """
-        Called when the next step of the replay is requested.
-        Returns whether the replay is finished.
-
-        Big-O notation: O(play_next_action) --> O(n) where n is the number of total step from PaintStep
-        """
-        return self.replay_action.play_next_action(self.grid)
-        
-
-    def on_increase_brush_size(self):
-        """Called when an increase to the brush size is requested.
-        Big-O notation: O(1)
-        """
-        self.grid.increase_brush_size()
-
-    def on_decrease_brush_size(self):
-        """Called when a decrease to the brush size is requested.
-        Big-O notation: O(1)
-        """
-        self.grid.decrease_brush_size()
 
 def main():
     """ Main function """
@@ -397,12 +108,14 @@ def main():
     arcade.run()
 
 def run_with_func(func, pause=False):
+    """Runs func on another thread with a proxy of the window, whose commands are applied between frames."""
     from threading import Thread
     window = MyWindow()
     window.setup()
+    window.commands = CommandChannel()
     if pause:
         _ = input("Press enter to begin test.")
-    t = Thread(target=func, args=(window,))
+    t = Thread(target=func, args=(WindowProxy(window, window.commands),))
     t.start()
     arcade.run()
 
@@ -0,0 +1,161 @@
+"""
+Painting logic of the window, separate from arcade.
+
+Painter holds everything MyWindow does to the grid and its history when painting, undoing, redoing,
+replaying and changing the brush: the student part of the window, along with try_draw which turns mouse
+positions into squares to paint. It never draws or reads input, so it runs without a window, e.g. to
+benchmark or test the painting logic headlessly.
+"""
+
+import math
+from layer_util import get_layers, Layer
+from undo import UndoTracker
+from replay import ReplayTracker
+from action import PaintAction, StampAction, stencil
+
+
+class Painter:
+    """
+    Mixin with the painting logic of MyWindow.
+
+    Expects the class using it to provide:
+        - grid: the Grid being painted
+        - GRID_SIZE_X, GRID_SIZE_Y: the size of the grid in squares
+        - GRID_SQ_WIDTH, GRID_SQ_HEIGHT: the size of a square in pixels
+        - selected_layer_index, prev_pos, prev_drawn: the state of the current stroke
+    """
+
+    def try_draw(self, x, y) -> None:
+        """Attempt to draw at a position, but safely fail if an invalid square."""
+        if self.selected_layer_index == -1:
+            return
+        layer = get_layers()[self.selected_layer_index]
+        if self.prev_pos is not None:
+            # Try draw in increments of 0.5 to avoid skipping squares.
+            mhat_dist = abs(x - self.prev_pos[0]) + abs(y - self.prev_pos[1])
+            increment = 0.5
+            points_to_draw = []
+            for d in range(1, math.ceil(mhat_dist/increment)+1):
+                distance = min(d * increment / mhat_dist, 1)
+                nx = distance * (x - self.prev_pos[0]) + self.prev_pos[0]
+                ny = distance * (y - self.prev_pos[1]) + self.prev_pos[1]
+                nx_pos = int(nx // self.GRID_SQ_WIDTH)
+                ny_pos = int(ny // self.GRID_SQ_HEIGHT)
+                points_to_draw.append((nx_pos, ny_pos))
+        else:
+            x_pos = int(x // self.GRID_SQ_WIDTH)
+            y_pos = int(y // self.GRID_SQ_HEIGHT)
+            points_to_draw = [
+                (x_pos, y_pos)
+            ]
+        for px, py in points_to_draw:
+            if self.prev_drawn is None or (px, py) != self.prev_drawn:
+                if 0 <= px < self.GRID_SIZE_X and 0 <= py < self.GRID_SIZE_Y:
+                    self.on_paint(layer, px, py)
+                    self.prev_drawn = (px, py)
+        self.prev_pos = (x, y)
+
+    # STUDENT PART
+
+    def on_init(self):
+        """Initialisation that occurs after the system initialisation.
+        Big-O notation: O(n+m) where n is the initialization of self.undo_aciton with UndoTracker() and m is the initialization of self.replay_action with ReplayTracker()
+        """
+        self.undo_action = UndoTracker() #instantiate the UndoTracker object.
+
+        self.replay_action = ReplayTracker() #instantiate the ReplayTracker object.
+        self.replay_speed = 1 #number of actions played per replay step
+
+    def on_reset(self):
+        """Called when a window reset is requested.
+        Big-O notation: O(n+m)
+        """
+
+        self.undo_action = UndoTracker() #instantiate the UndoTracker object.
+        self.replay_action = ReplayTracker() #instantiate the ReplayTracker object.
+
+    def on_paint(self, layer: Layer, px, py):
+        """
+        Called when a grid square is clicked on, which should trigger painting in the vicinity.
+        Vicinity squares outside of the range [0, GRID_SIZE_X) or [0, GRID_SIZE_Y) can be safely ignored.
+
+        layer: The layer being applied.
+        px: x position of the brush.
+        py: y position of the brush.
+
+        Big-O notation: O(d^2 * add) where d is the brush size
+        """
+        d = self.grid.brush_size
+        mask = 0 #bit i is set when the i-th square of the stencil changed
+
+        for bit, (dx, dy) in enumerate(stencil(d)): #O(d^2), only the diamond around the brush
+            i, j = px + dx, py + dy
+            if 0 <= i < self.grid.x and 0 <= j < self.grid.y and self.grid[i][j].add(layer):
+                mask |= 1 << bit
+
+        p = StampAction((px, py), d, layer, mask)
+
+        self.undo_action.stack_redo.clear()
+        self.undo_action.add_action(p, self.grid) #O(1), O(snapshot) on a keyframe
+        self.replay_action.add_action(p, grid=self.grid) #O(1)
+        
+
+    def on_undo(self, n: int = 1):
+        """Called when an undo is requested, n times in a row when the key is held.
+
+        Big-O notation: O(nm * special) where nm is the complexity of grid special, and special is depend on which LayerStore in use. 
+        """
+        undos = self.undo_action.undo(self.grid, n) # assign the undo action from self.undo_action that happen in self.grid to the undos
+
+        if undos != None: #check whether the undos is happen, if not none then add the action.
+            self.replay_action.add_action(undos, is_undo=True, grid=self.grid)
+        
+
+    def on_redo(self, n: int = 1):
+        """Called when a redo is requested, n times in a row when the key is held.
+
+        Big-O notation: O(nm * special) where nm is the complexity of grid special, and special is depend on which LayerStore in use. 
+        """
+        redos = self.undo_action.redo(self.grid, n) # assign the redo action hfrom self.undo_action that happen in self.grid to redos.
+        
+        if redos != None: #check whether the redos is happen, if not none then add the action.
+            self.replay_action.add_action(redos, grid=self.grid) 
+
+    def on_special(self):
+        """Called when the special action is requested based on which LayerStore are in use.
+    
+        Big-O notation: O(nm * special) where nm is the complexity of grid special, and special is depend on which LayerStore in use. 
+        """
+        self.grid.special() #O(nm)
+        self.undo_action.add_action(PaintAction(is_special=True), self.grid) #O(1), O(snapshot) on a keyframe
+        self.replay_action.add_action(PaintAction(is_special=True), grid=self.grid) #O(1)
+
+    def on_replay_start(self):
+        """Called when the replay starting is requested.
+        Replays the whole session from the beginning.
+        Big-O notation: O(1)
+        """
+        self.replay_action.start_replay()
+        self.replay_action.seek(self.grid, 0)
+
+    def on_replay_next_step(self) -> bool:
+        """
+        Called when the next step of the replay is requested.
+        Returns whether the replay is finished.
+
+        Big-O notation: O(replay_speed * play_next_action) --> O(n) where n is the number of total step from PaintStep
+        """
+        return self.replay_action.play_actions(self.grid, self.replay_speed)
+        
+
+    def on_increase_brush_size(self):
+        """Called when an increase to the brush size is requested.
+        Big-O notation: O(1)
+        """
+        self.grid.increase_brush_size()
+
+    def on_decrease_brush_size(self):
+        """Called when a decrease to the brush size is requested.
+        Big-O notation: O(1)
+        """
+        self.grid.decrease_brush_size()
@@ -1,39 +1,148 @@
 from __future__ import annotations
-from action import PaintAction
+from time import perf_counter
+from action import BatchAction, PaintAction
+from autosave import encode_snapshot
 from grid import Grid
-from data_structures.queue_adt import CircularQueue
+from data_structures.ring_buffer import RingBuffer
+from journal import JournalReader, JournalWriter
+
+
+def _cancels(first: tuple[PaintAction, bool], second: tuple[PaintAction, bool], draw_style: str) -> bool:
+    """
+    Whether playing first then second leaves every square as it was.
+        - Two specials cancel for SET (invert twice) and ADD (reverse twice), not for SEQUENCE.
+        - An action followed by its own undo, or an undo followed by its redo, cancels for SEQUENCE only,
+          where a square holds a set of layers. In ADD, erase removes the oldest copy of a layer rather than
+          the one add just put on top, and in SET erase clears the square.
+    """
+    (action1, undo1), (action2, undo2) = first, second
+    if action1.is_special or action2.is_special:
+        return action1.is_special and action2.is_special and draw_style != Grid.DRAW_STYLE_SEQUENCE
+    return action1 is action2 and undo1 != undo2 and draw_style == Grid.DRAW_STYLE_SEQUENCE
+
+def _merge(first: tuple[PaintAction, bool], second: tuple[PaintAction, bool]) -> tuple[PaintAction, bool]|None:
+    """
+    Returns a single entry playing first then second, if both paint (or both undo) the same single layer.
+    """
+    (action1, undo1), (action2, undo2) = first, second
+    if action1.is_special or action2.is_special or undo1 != undo2:
+        return None
+    if isinstance(action1, BatchAction) or isinstance(action2, BatchAction): #may hold specials
+        return None
+    steps = action1.steps + action2.steps
+    if any(step.affected_layer is not steps[0].affected_layer for step in steps):
+        return None
+    return (PaintAction(steps), undo1)
+
+def compact_actions(actions, draw_style: str) -> list[tuple[PaintAction, bool]]:
+    """
+    Returns a shorter list of (action, is_undo) entries with the same effect on a grid of draw_style:
+    cancelling pairs are removed, including nested ones, then adjacent paints of the same layer are merged.
+    The result is not checked, see ReplayTracker.compact.
+
+    Big-O notation: O(s) where s is the total number of steps
+    """
+    kept = []
+    for entry in actions: #O(n), each entry is pushed and popped at most once
+        if len(kept) > 0 and _cancels(kept[-1], entry, draw_style):
+            kept.pop()
+        else:
+            kept.append(entry)
+    merged = []
+    for entry in kept:
+        joined = _merge(merged[-1], entry) if len(merged) > 0 else None
+        if joined != None:
+            merged[-1] = joined
+        else:
+            merged.append(entry)
+    return merged
+
+def _play(grid: Grid, actions) -> None:
+    for action, is_undo in actions:
+        if is_undo:
+            action.undo_apply(grid)
+        else:
+            action.redo_apply(grid)
+
+def _same_layers(grid1: Grid, grid2: Grid) -> bool:
+    """
+    Whether every square of both grids stores the same layers, in the same order for ADD.
+    Equal colours are not enough: later erases and specials act on the stored layers.
+    """
+    return (encode_snapshot(grid1.snapshot(), grid1.draw_style, grid1.x, grid1.y, grid1.flyweight, 0, 0)
+            == encode_snapshot(grid2.snapshot(), grid2.draw_style, grid2.x, grid2.y, grid2.flyweight, 0, 0))
 
 
 class ReplayTracker:
+    KEYFRAME_INTERVAL = 50
 
-    def __init__(self) -> None:
+    def __init__(self, max_capacity = 10000, keyframe_interval = KEYFRAME_INTERVAL, journal: JournalWriter|None = None) -> None:
         """
-        Big-O notation: O(capacity)
+        - max_capacity: the number of actions kept, later actions are not recorded.
+        - keyframe_interval: a grid snapshot is kept every this many actions, see seek.
+        - journal: when given, every action is also appended to it, including those past max_capacity.
+
+        Big-O notation: O(1)
+        """
+        self.actions = RingBuffer(max_capacity) #(action, is_undo) tuples, grown on demand
+        self.cursor = 0 #number of actions played so far
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = {} #action count --> snapshot of the grid after that many actions, 0 if not from an empty grid
+        self.journal = journal
+        self.synced = None #grid known to hold the state after the first cursor actions, see seek
+
+    @classmethod
+    def from_journal(cls, path: str, keyframe_interval = KEYFRAME_INTERVAL) -> ReplayTracker:
         """
-        self.queue = CircularQueue(10000) #instantiate circular queue with capacity of 10000
+        Returns a tracker that plays the journal at path, decoding actions as they are played
+        instead of loading them all. Nothing more can be recorded on it.
+        Keyframes are taken while playing after a seek, so seeking back stays cheap.
+
+        Big-O notation: O(r / JournalReader.INDEX_INTERVAL) in memory where r is the number of recorded actions
+        """
+        tracker = cls(keyframe_interval=keyframe_interval)
+        tracker.actions = JournalReader(path)
+        return tracker
         
         
+    def start_from(self, grid: Grid) -> None:
+        """
+        Records that the actions are played from the grid as it is now, rather than from an empty grid,
+        as for a session recovered from its autosave. Call before recording any action.
+
+        Big-O notation: O(1)
+        """
+        self.keyframes[0] = grid.snapshot()
+
     def start_replay(self) -> None:
         """
         Called whenever we should stop taking actions, and start playing them back.
 
         Useful if you have any setup to do before `play_next_action` should be called.
+        Playback continues from the cursor, use seek to start somewhere else.
         
         Big-O notation: O(1)
         """
         pass
 
-    def add_action(self, action: PaintAction, is_undo: bool=False) -> None:
+    def add_action(self, action: PaintAction, is_undo: bool=False, grid: Grid|None=None) -> None:
         """
         Adds an action to the replay.
 
         `is_undo` specifies whether the action was an undo action or not.
         Special, Redo, and Draw all have this is False.
 
-        Big-O notation: O(1)
+        `grid` is the grid the action was just applied to. When given, keyframes are taken from it,
+        so it should have started out empty when the first action was recorded.
+
+        Big-O notation: O(1) amortised, O(snapshot) = O(1) on a keyframe, O(s) when journaled
         """
-        if not self.queue.is_full(): #check whether the queue is full
-            self.queue.append((action,is_undo)) #appending a tuple
+        if self.journal != None:
+            self.journal.append(action, is_undo)
+        if not self.actions.is_full(): #check whether the log is full
+            self.actions.append((action,is_undo)) #appending a tuple
+            if grid != None and len(self.actions) % self.keyframe_interval == 0:
+                self.keyframes[len(self.actions)] = grid.snapshot()
 
        
     def play_next_action(self, grid: Grid) -> bool:
@@ -46,18 +155,111 @@ class ReplayTracker:
         Big-O notation: O(n) where n is the complexity of undo_apply or redo_apply from the PaintAction.
         """
       
-        # if len(self.queue) > 0: 
-        if  not self.queue.is_empty(): #check whether the length of queue is more than 0 or is not empty.
-            thing = self.queue.serve() # remove the element (tuple) from queue to thing.
+        if self.cursor < len(self.actions): #check whether there is an action left to play
+            thing = self.actions[self.cursor] # the next (action, is_undo) tuple
+            self.cursor += 1
             if thing[1] == True: #O(comp), check if the index 1 (is_undo) is true.
                 thing[0].undo_apply(grid) #O(n), if yes, the undo is on
             else:
                 thing[0].redo_apply(grid) #O(n), if no, do the redo_apply.
+            if self.synced is grid and self.cursor % self.keyframe_interval == 0 and self.cursor not in self.keyframes:
+                self.keyframes[self.cursor] = grid.snapshot() #O(1)
 
             return False
 
         return True
 
+    def play_actions(self, grid: Grid, k: int) -> bool:
+        """
+        Plays up to the next k actions on the grid.
+        Returns whether the replay is finished, i.e. there is nothing left to play.
+
+        Big-O notation: O(k * apply)
+        """
+        for _ in range(k):
+            if self.play_next_action(grid):
+                break
+        return self.cursor >= len(self.actions)
+
+    def play_for(self, grid: Grid, ms: float) -> bool:
+        """
+        Plays actions on the grid until ms milliseconds have been spent, or there is nothing left to play.
+        At least one action is played if there is one.
+        Returns whether the replay is finished.
+
+        Big-O notation: O(ms) in time
+        """
+        deadline = perf_counter() + ms / 1000
+        while not self.play_next_action(grid):
+            if perf_counter() >= deadline:
+                break
+        return self.cursor >= len(self.actions)
+
+    def seek(self, grid: Grid, n: int) -> None:
+        """
+        Puts the grid in the state it had after the first n recorded actions, and plays on from there.
+        Restores the nearest keyframe at or before n and only plays the actions after it,
+        unless playing on from the cursor is shorter. Seeking before every keyframe clears the grid,
+        or restores the grid given to start_from.
+
+        Big-O notation: O(d * apply) where d is the distance from n to the nearest keyframe or the cursor,
+        at most O(keyframe_interval * apply) when the replay was recorded with keyframes.
+        Afterwards, playing on the same grid takes any keyframes that are missing.
+        """
+        if not 0 <= n <= len(self.actions):
+            raise IndexError('No such point in the replay')
+        keyframe = 0
+        for count in self.keyframes: #O(k) where k is the number of keyframes
+            if keyframe < count <= n:
+                keyframe = count
+        if not (self.synced is grid and self.cursor <= n and n - self.cursor <= n - keyframe):
+            if keyframe in self.keyframes:
+                grid.restore(self.keyframes[keyframe])
+            else:
+                grid.clear()
+            self.cursor = keyframe
+        self.synced = grid
+        self.play_actions(grid, n - self.cursor)
+
+    def compact(self, draw_style: str, x: int, y: int) -> int:
+        """
+        Shortens the actions after the cursor, see compact_actions, for a grid of draw_style and size x by y.
+        The result is checked by playing both versions on fresh grids and comparing the layers stored in every square,
+        and is only kept when they agree. Keyframes after the cursor no longer line up and are dropped.
+        A tracker playing a journal keeps the compacted actions in memory instead.
+
+        Returns the number of actions removed, 0 if the compacted version was rejected.
+
+        Big-O notation: O(n * apply + xy * (log(xy) + l)) where n is the number of actions and l the number of layers in a square
+        """
+        actions = [self.actions[i] for i in range(len(self.actions))]
+        played, remaining = actions[:self.cursor], actions[self.cursor:]
+        compacted = compact_actions(remaining, draw_style)
+        if len(compacted) == len(remaining):
+            return 0
+
+        original_grid = Grid(draw_style, x, y)
+        compacted_grid = Grid(draw_style, x, y)
+        if 0 in self.keyframes:
+            original_grid.restore(self.keyframes[0])
+            compacted_grid.restore(self.keyframes[0])
+        try:
+            _play(original_grid, played)
+            _play(compacted_grid, played)
+            _play(original_grid, remaining)
+            _play(compacted_grid, compacted)
+        except Exception: #the log does not replay cleanly on this grid, leave it alone
+            return 0
+        if not _same_layers(original_grid, compacted_grid):
+            return 0
+
+        capacity = self.actions.max_capacity if isinstance(self.actions, RingBuffer) else len(actions)
+        self.actions = RingBuffer(capacity)
+        for entry in played + compacted:
+            self.actions.append(entry)
+        self.keyframes = {count: snap for count, snap in self.keyframes.items() if count <= self.cursor}
+        return len(remaining) - len(compacted)
+
 if __name__ == "__main__":
     action1 = PaintAction([], is_special=True)
     action2 = PaintAction([])
@@ -76,4 +278,3 @@ if __name__ == "__main__":
     f3 = r.play_next_action(g) # action 2, undo
     t = r.play_next_action(g)  # True, nothing to do.
     assert (f1, f2, f3, t) == (False, False, False, True)
-
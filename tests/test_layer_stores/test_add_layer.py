@@ -1,8 +1,12 @@
+import gc
+import random
+import weakref
 import unittest
 from ed_utils.decorators import number
 
 from layer_store import AdditiveLayerStore
-from layers import black, lighten, rainbow, invert
+from layer_util import get_layers
+from layers import black, lighten, rainbow, invert, red
 
 class TestAddLayer(unittest.TestCase):
 
@@ -62,3 +66,105 @@ class TestAddLayer(unittest.TestCase):
         s.erase(black)
         s.add(invert)
         self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (255-91, 255-214, 255-104))
+
+    @number("2.6")
+    def test_cached_color(self):
+        s = AdditiveLayerStore()
+        s.add(black)
+        s.add(lighten)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (40, 40, 40))
+        # Cached, but must be forgotten on every change.
+        self.assertEqual(s.get_color((100, 100, 100), 3, 5, 5), (40, 40, 40))
+        s.add(lighten)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (80, 80, 80))
+        s.special()
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (0, 0, 0))
+        s.erase(lighten)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (0, 0, 0))
+        # Time dependent layers are never cached.
+        s.add(rainbow)
+        self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (91, 214, 104))
+        self.assertNotEqual(s.get_color((100, 100, 100), 7.5, 0, 0), (91, 214, 104))
+
+    @number("2.7")
+    def test_constant_layer_short_circuit(self):
+        s = AdditiveLayerStore()
+        s.add(lighten)
+        s.add(black)
+        s.add(lighten)
+        s.add(red)
+        s.add(invert)
+        self.assertEqual(s.absorb, 3)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (0, 255, 255))
+        s.special() # invert, red, lighten, black, lighten
+        self.assertEqual(s.absorb, 3)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (40, 40, 40))
+        for expected in [2, 1, 0, -1]:
+            s.erase(lighten)
+            self.assertEqual(s.absorb, expected)
+        self.assertEqual(s.get_color((100, 100, 100), 0, 0, 0), (140, 140, 140))
+
+    @number("2.8")
+    def test_shared_sequences(self):
+        rng = random.Random(1008)
+        layers = [layer for layer in get_layers() if layer is not None]
+        stores = [AdditiveLayerStore() for _ in range(4)]
+        expected = [[] for _ in stores]
+        for _ in range(400):
+            i = rng.randrange(len(stores))
+            action = rng.random()
+            if action < 0.6:
+                layer = rng.choice(layers)
+                stores[i].add(layer)
+                expected[i].append(layer)
+            elif action < 0.8 and expected[i]:
+                stores[i].erase(black)
+                expected[i].pop(0)
+            else:
+                stores[i].special()
+                expected[i].reverse()
+            self.assertEqual(stores[i].layers(), expected[i])
+            color = (100, 100, 100)
+            for layer in expected[i]:
+                color = layer.apply(color, 3, 1, 2)
+            self.assertEqual(tuple(stores[i].get_color((100, 100, 100), 3, 1, 2)), tuple(color))
+        # Squares holding the same layers point at the same sequence.
+        a, b = AdditiveLayerStore(), AdditiveLayerStore()
+        for s in (a, b):
+            s.add(lighten)
+            s.add(invert)
+            s.special()
+        self.assertIs(a.node, b.node)
+
+    @number("2.9")
+    def test_erase_skips(self):
+        s = AdditiveLayerStore()
+        for _ in range(30):
+            s.add(lighten)
+            s.add(red)
+        node = s.node
+        for erased in range(1, 31):
+            s.erase(black)
+            self.assertIs(s.node, node) # nothing rebuilt, the first layers are only skipped
+            self.assertEqual(len(s), 60 - erased)
+        s.erase(black)
+        self.assertEqual((s.node.depth, s.skip), (29, 0))
+        self.assertEqual(s.layers(), [red] + [lighten, red] * 14)
+
+    @number("2.10")
+    def test_unused_sequences_freed(self):
+        s = AdditiveLayerStore()
+        for _ in range(30):
+            s.add(lighten)
+            s.add(red)
+        forward = weakref.ref(s.node)
+        s.special()
+        backward = weakref.ref(s.node)
+        gc.disable()
+        try:
+            # Only the remembered reversals point at these sequences now, which must not keep them.
+            s = None
+            self.assertIsNone(forward())
+            self.assertIsNone(backward())
+        finally:
+            gc.enable()
@@ -1,7 +1,9 @@
+import random
 import unittest
 from ed_utils.decorators import number
 
 from layer_store import SequenceLayerStore
+from layer_util import get_layers
 from layers import black, lighten, rainbow, invert
 
 class TestSeqLayer(unittest.TestCase):
@@ -69,3 +71,29 @@ class TestSeqLayer(unittest.TestCase):
         self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (0, 0, 0))
         s.erase(black)
         self.assertEqual(s.get_color((100, 100, 100), 7, 0, 0), (91, 214, 104))
+
+    @number("3.6")
+    def test_special_median(self):
+        rng = random.Random(3)
+        layers = [layer for layer in get_layers() if layer is not None]
+        store = SequenceLayerStore()
+        applied = {} # name --> layer
+        for step in range(300):
+            store.get_color((0, 0, 0), 0, 0, 0) # drawn between changes, as in the app
+            choice = rng.random()
+            if choice < 0.5:
+                layer = rng.choice(layers)
+                self.assertEqual(store.add(layer), layer.name not in applied)
+                applied[layer.name] = layer
+            elif choice < 0.75 and len(applied) > 0:
+                name = rng.choice(sorted(applied))
+                store.erase(applied.pop(name))
+            else:
+                copy = store.copy()
+                before = sorted(applied)
+                store.special()
+                if len(before) > 0:
+                    del applied[before[(len(before) - 1) // 2]]
+                self.assertEqual([item.key for item in copy.names], before) # the copy keeps its layers
+            self.assertEqual([item.key for item in store.names], sorted(applied))
+            self.assertEqual([item.value for item in store.names], [applied[name] for name in sorted(applied)])
@@ -1,7 +1,10 @@
+import random
 import unittest
 from ed_utils.decorators import number
 
-from layer_store import SetLayerStore
+from grid import Grid
+from layer_store import SetLayerState, SetLayerStore
+from layer_util import get_layers
 from layers import black, lighten, rainbow, invert
 
 class TestSetLayer(unittest.TestCase):
@@ -53,3 +56,29 @@ class TestSetLayer(unittest.TestCase):
         self.assertEqual(s.get_color((0, 0, 0), 7, 0, 0), (0, 0, 0))
         s.add(invert)
         self.assertEqual(s.get_color((0, 0, 0), 7, 0, 0), (255, 255, 255))
+
+    @number("1.6")
+    def test_flyweight_grid(self):
+        rng = random.Random(1008)
+        layers = [layer for layer in get_layers() if layer is not None]
+        grid = Grid(Grid.DRAW_STYLE_SET, 4, 4)
+        control_grid = Grid(Grid.DRAW_STYLE_SET, 4, 4, flyweight=False)
+        for _ in range(300):
+            x, y = rng.randrange(4), rng.randrange(4)
+            action = rng.random()
+            if action < 0.6:
+                layer = rng.choice(layers)
+                self.assertEqual(grid[x][y].add(layer), control_grid[x][y].add(layer))
+            elif action < 0.9:
+                self.assertEqual(grid[x][y].erase(black), control_grid[x][y].erase(black))
+            else:
+                grid.special()
+                control_grid.special()
+            for i in range(4):
+                for j in range(4):
+                    self.assertEqual(
+                        grid[i][j].get_color((100, 100, 100), 3, i, j),
+                        control_grid[i][j].get_color((100, 100, 100), 3, i, j),
+                    )
+        # At most one state per (layer or None, invert flag).
+        self.assertLessEqual(len(SetLayerState.STATES), 2 * (len(layers) + 1))
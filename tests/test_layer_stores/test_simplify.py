@@ -0,0 +1,32 @@
+import random
+import unittest
+from ed_utils.decorators import number
+
+from layer_util import ChannelMap, Fill, get_layers, simplify
+from layers import black, darken, invert, lighten, rainbow, red, sparkle
+
+class TestSimplify(unittest.TestCase):
+
+    @number("7.1")
+    def test_rewrites(self):
+        self.assertEqual(len(simplify([invert, invert])), 0)
+        self.assertEqual(simplify([lighten] * 7).apply((0, 0, 0), 0, 0, 0), (255, 255, 255))
+        program = simplify([lighten, rainbow, invert, lighten, black, lighten, darken, red, invert])
+        self.assertEqual(program.steps, [Fill((0, 255, 255))])
+        program = simplify([lighten, sparkle, lighten, darken])
+        self.assertEqual(len(program), 3)
+        self.assertIsInstance(program.steps[0], ChannelMap)
+        self.assertTrue(program.dynamic)
+
+    @number("7.2")
+    def test_equivalent(self):
+        rng = random.Random(1008)
+        layers = [layer for layer in get_layers() if layer is not None]
+        for _ in range(200):
+            sequence = [rng.choice(layers) for _ in range(rng.randint(0, 12))]
+            start = tuple(rng.randint(0, 255) for _ in range(3))
+            timestamp, x, y = rng.random() * 10, rng.randint(0, 31), rng.randint(0, 31)
+            expected = start
+            for layer in sequence:
+                expected = layer.apply(expected, timestamp, x, y)
+            self.assertEqual(simplify(sequence).apply(start, timestamp, x, y), tuple(expected))
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+from ed_utils.decorators import number
+
+from action import PaintAction, PaintStep, StampAction, stencil
+from autosave import Autosave, JOURNAL_NAME, recover
+from replay import ReplayTracker
+from layers import green, red, blue, invert, lighten
+from grid import Grid
+from headless import HeadlessWindow, VirtualClock
+
+class TestAutosave(unittest.TestCase):
+
+    def paint(self, grid: Grid, replay: ReplayTracker, i: int):
+        layers = [green, red, blue, invert, lighten]
+        if i % 9 == 8:
+            grid.special()
+            replay.add_action(PaintAction(is_special=True), grid=grid)
+            return
+        mask = 0
+        for bit, (dx, dy) in enumerate(stencil(1)):
+            x, y = (i * 3 + dx) % grid.x, (i * 5 + dy) % grid.y
+            if (x, y) == ((i * 3) % grid.x + dx, (i * 5) % grid.y + dy) and grid[x][y].add(layers[i % 5]):
+                mask |= 1 << bit
+        replay.add_action(StampAction(((i * 3) % grid.x, (i * 5) % grid.y), 1, layers[i % 5], mask), grid=grid)
+
+    @number("9.1")
+    def test_recover(self):
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            directory = tempfile.mkdtemp()
+            self.assertIsNone(recover(directory))
+            grid = Grid(style, 9, 7)
+            replay = ReplayTracker()
+            replay.journal = Autosave(directory, grid, snapshot_interval=10)
+            for i in range(47):
+                self.paint(grid, replay, i)
+            replay.journal.close()
+
+            recovered, count, offset = recover(directory)
+            self.assertEqual(count, 47)
+            self.assertEqual((recovered.draw_style, recovered.x, recovered.y), (style, 9, 7))
+            self.assertGridEqual(recovered, grid)
+            self.assertLessEqual(len(os.listdir(directory)), Autosave.KEEP_SNAPSHOTS + 1)
+
+            # Carry on after a crash that cut the last record short.
+            path = os.path.join(directory, JOURNAL_NAME)
+            with open(path, "ab") as file:
+                file.write(b"\x40\x01")
+            recovered, count, offset = recover(directory)
+            self.assertEqual(count, 47)
+            replay = ReplayTracker()
+            replay.journal = Autosave(directory, recovered, snapshot_interval=10, resume=(count, offset))
+            for i in range(47, 60):
+                self.paint(recovered, replay, i)
+                self.paint(grid, ReplayTracker(), i)
+            replay.journal.close()
+            self.assertGridEqual(recovered, grid)
+            recovered, count, offset = recover(directory)
+            self.assertEqual(count, 60)
+            self.assertGridEqual(recovered, grid)
+
+    @number("9.2")
+    def test_reset(self):
+        directory = tempfile.mkdtemp()
+        grid = Grid(Grid.DRAW_STYLE_ADD, 4, 4)
+        autosave = Autosave(directory, grid)
+        grid[1][1].add(red)
+        autosave.append(PaintAction([PaintStep((1, 1), red)]))
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 4, 4)
+        autosave.reset(grid)
+        grid[2][3].add(blue)
+        autosave.append(PaintAction([PaintStep((2, 3), blue)]))
+        autosave.close()
+        recovered, count, _ = recover(directory)
+        self.assertEqual((recovered.draw_style, count), (Grid.DRAW_STYLE_SEQUENCE, 1))
+        self.assertGridEqual(recovered, grid)
+
+    @number("9.3")
+    def test_window(self):
+        directory = tempfile.mkdtemp()
+
+        class Window(HeadlessWindow):
+            AUTOSAVE_DIR = directory
+
+        window = Window()
+        window.setup()
+        window.autosave.snapshot_interval = 5
+        clock = VirtualClock(window)
+        for i in range(3):
+            window.on_paint(red, i, i)
+        window.start_replay()
+        clock.advance(1.0)
+        self.assertTrue(window.enable_ui)
+        for i in range(8):
+            window.on_paint(blue, 2 * i, i)
+        window.on_close()
+        recovered, count, _ = recover(directory)
+        self.assertEqual(count, 11)
+        self.assertGridEqual(recovered, window.grid)
+
+        # Replaying a recovered session starts from the recovered canvas.
+        window2 = Window()
+        window2.setup()
+        self.assertGridEqual(window2.grid, window.grid)
+        window2.start_replay()
+        VirtualClock(window2).advance(1.0)
+        self.assertGridEqual(window2.grid, window.grid)
+        window2.on_close()
+
+    @number("9.4")
+    def test_writer_errors(self):
+        directory = tempfile.mkdtemp()
+        grid = Grid(Grid.DRAW_STYLE_SET, 4, 4)
+        grid[1][2].add(red)
+        # The journal is gone, so the session is started again from the grid.
+        autosave = Autosave(directory, grid, resume=(20, 300))
+        grid[0][0].add(blue)
+        autosave.append(PaintAction([PaintStep((0, 0), blue)]))
+        autosave.close()
+        recovered, count, _ = recover(directory)
+        self.assertEqual(count, 1)
+        self.assertGridEqual(recovered, grid)
+
+        self.assertEqual(autosave.count, 1)
+
+        autosave = Autosave(directory, grid)
+        with self.assertWarns(RuntimeWarning):
+            autosave.append(None) # cannot be written
+            autosave.thread.join()
+        self.assertIsNotNone(autosave.error)
+        autosave.append(PaintAction([PaintStep((0, 0), blue)])) # autosave has stopped, drawing carries on
+        self.assertEqual(autosave.count, 1)
+        autosave.close()
+
+    def assertGridEqual(self, grid1: Grid, grid2: Grid):
+        for x in range(len(grid1.grid)):
+            for y in range(len(grid1[x])):
+                for timestamp in [0, 17]:
+                    self.assertEqual(
+                        grid1[x][y].get_color((0, 0, 0), timestamp, x, y),
+                        grid2[x][y].get_color((0, 0, 0), timestamp, x, y),
+                        "Grid not the same after recovery."
+                    )
@@ -0,0 +1,84 @@
+import unittest
+from threading import Thread
+from ed_utils.decorators import number
+
+from commands import CommandChannel, WindowProxy
+from layers import green, red, blue, invert
+from grid import Grid
+from painter import Painter
+
+class FakeWindow:
+    def __init__(self, grid: Grid):
+        self.grid = grid
+
+FakeWindow.on_init = Painter.on_init
+FakeWindow.on_reset = Painter.on_reset
+FakeWindow.on_paint = Painter.on_paint
+FakeWindow.on_undo = Painter.on_undo
+FakeWindow.on_redo = Painter.on_redo
+FakeWindow.on_special = Painter.on_special
+FakeWindow.on_increase_brush_size = Painter.on_increase_brush_size
+FakeWindow.on_decrease_brush_size = Painter.on_decrease_brush_size
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+class TestCommands(unittest.TestCase):
+
+    def script(self, window):
+        layers = [green, red, blue, invert]
+        for i in range(300):
+            if i % 50 == 49:
+                window.on_special()
+            elif i % 20 == 19:
+                window.on_undo()
+                window.on_undo()
+                window.on_redo()
+            elif i % 30 == 29:
+                window.on_increase_brush_size()
+            else:
+                window.on_paint(layers[i % 4], (i * 7) % 10, (i * 3) % 10)
+
+    @number("11.1")
+    def test_cross_thread(self):
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            direct = FakeWindow(Grid(style, 10, 10))
+            direct.on_init()
+            direct.on_reset()
+            self.script(direct)
+
+            queued = FakeWindow(Grid(style, 10, 10))
+            queued.on_init()
+            queued.on_reset()
+            channel = CommandChannel(16)
+            producer = Thread(target=self.script, args=(WindowProxy(queued, channel),))
+            producer.start()
+            while producer.is_alive() or not channel.queue.is_empty():
+                channel.drain(queued)
+            producer.join()
+
+            for x in range(10):
+                for y in range(10):
+                    self.assertEqual(
+                        queued.grid[x][y].get_color((0, 0, 0), 0, x, y),
+                        direct.grid[x][y].get_color((0, 0, 0), 0, x, y),
+                    )
+
+    @number("11.2")
+    def test_batched(self):
+        channel = CommandChannel()
+        proxy = WindowProxy(Recorder(), channel)
+        proxy.on_undo()
+        proxy.on_undo(3)
+        proxy.on_redo()
+        proxy.on_special()
+        proxy.on_undo()
+        self.assertRaises(ValueError, channel.send, "reset")
+        window = Recorder()
+        self.assertEqual(channel.drain(window), 5)
+        self.assertEqual(window.calls, [("on_undo", (4,)), ("on_redo", (1,)), ("on_special", ()), ("on_undo", (1,))])
+        self.assertEqual(channel.drain(window), 0)
@@ -0,0 +1,38 @@
+import unittest
+from ed_utils.decorators import number
+
+from layers import green, red, lighten
+from grid import Grid
+
+class TestGridSnapshot(unittest.TestCase):
+
+    @number("8.1")
+    def test_snapshot(self):
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            grid = Grid(style, 7, 5)
+            self.assertEqual((len(grid.grid), len(grid[0])), (7, 5))
+            self.assertRaises(IndexError, grid[0].__getitem__, 5)
+            grid[1][2].add(red)
+            grid[6][4].add(lighten)
+            snapshot = grid.snapshot()
+            grid[1][2].add(green)
+            grid[3][3].add(green)
+            grid.special()
+            self.assertNotEqual(self.colors(grid), self.colors(Grid(style, 7, 5)))
+
+            grid.restore(snapshot)
+            control_grid = Grid(style, 7, 5)
+            control_grid[1][2].add(red)
+            control_grid[6][4].add(lighten)
+            self.assertEqual(self.colors(grid), self.colors(control_grid))
+            # The snapshot is still intact after the restored grid changes.
+            grid[1][2].erase(red)
+            grid.restore(snapshot)
+            self.assertEqual(self.colors(grid), self.colors(control_grid))
+
+    def colors(self, grid: Grid):
+        return [
+            tuple(grid[x][y].get_color((100, 100, 100), 0, x, y))
+            for x in range(grid.x)
+            for y in range(grid.y)
+        ]
@@ -0,0 +1,71 @@
+import unittest
+from ed_utils.decorators import number
+
+from headless import HeadlessWindow, VirtualClock, run_headless
+from layers import red, blue
+from visuals import basic, complex, styles
+
+class TestHeadless(unittest.TestCase):
+
+    SCENARIOS = [basic.test_basics, styles.test_styles, complex.test_styles]
+    SETTLE = 5.0
+
+    @number("12.1")
+    def test_visuals(self):
+        for scenario in self.SCENARIOS:
+            window = run_headless(scenario, settle=self.SETTLE)
+            # every sleep of the scenario went to the virtual clock, which played each frame once
+            self.assertGreater(window.clock.now, self.SETTLE, f"{scenario.__module__} did not sleep on the virtual clock")
+            self.assertEqual(window.clock.ticks, int(window.clock.now * 60 + 1e-9))
+            self.assertEqual(window.frames, window.clock.ticks)
+            self.assertTrue(window.enable_ui, "replay did not finish")
+
+    @number("12.2")
+    def test_deterministic(self):
+        frames = []
+        for _ in range(2):
+            window = run_headless(complex.test_styles, settle=5.0)
+            window.render = True
+            window.on_draw()
+            frames.append(window.frame)
+        self.assertEqual(frames[0], frames[1])
+
+    @number("12.3")
+    def test_key_repeat(self):
+        window = HeadlessWindow()
+        window.setup()
+        clock = VirtualClock(window)
+        for i in range(30):
+            window.on_paint(red if i % 2 else blue, i, i)
+        window.on_key_press(window.KEY_Z, window.MOD_CTRL)
+        self.assertEqual(30 - window.undo_action.position, 1)
+        clock.advance(0.6)
+        self.assertEqual(30 - window.undo_action.position, 3) # the repeats show as they happen
+        clock.advance(0.4)
+        window.on_key_release(window.KEY_Z, 0)
+        clock.advance(1.0)
+        # one undo on the press, then after 0.5 s one every 0.05 s
+        self.assertAlmostEqual(30 - window.undo_action.position, 2 + 0.5 / 0.05, delta=1)
+
+    @number("12.4")
+    def test_replay(self):
+        window = HeadlessWindow()
+        window.setup()
+        clock = VirtualClock(window)
+        window.on_mouse_press(window.DRAW_PANEL + 1, window.SCREEN_HEIGHT - 1, 0, 0) # the first layer button
+        window.on_mouse_press(100, 100, 0, 0)
+        for step in range(20):
+            window.on_mouse_motion(100 + 10 * step, 100 + 5 * step, 10, 5)
+        window.on_mouse_release(300, 200, 0, 0)
+        painted = self.colours(window)
+        actions = window.undo_action.position
+        self.assertGreater(actions, 0)
+
+        window.start_replay()
+        self.assertFalse(window.enable_ui)
+        clock.advance((actions + 2) * window.REPLAY_TIMER_DELTA)
+        self.assertTrue(window.enable_ui)
+        self.assertEqual(self.colours(window), painted)
+
+    def colours(self, window: HeadlessWindow) -> list:
+        return [window.grid[x][y].get_color((0, 0, 0), 0, x, y) for x in range(window.grid.x) for y in range(window.grid.y)]
@@ -1,9 +1,12 @@
+import os
+import tempfile
 import unittest
 from ed_utils.decorators import number
 
-from action import PaintAction, PaintStep
+from action import PaintAction, PaintStep, StampAction, stencil
 from replay import ReplayTracker
-from layers import blue, green, red, invert
+from journal import JournalReader, JournalWriter
+from layers import black, blue, darken, green, red, invert
 from grid import Grid
 
 class TestReplay(unittest.TestCase):
@@ -102,6 +105,202 @@ class TestReplay(unittest.TestCase):
         self.assertGridEqual(grid, control_grid)
         self.assertEqual(replay.play_next_action(grid), True) # Finished.
 
+    @number("5.4")
+    def test_seek(self):
+        layers = [blue, green, red, invert]
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 6, 6)
+        replay = ReplayTracker(keyframe_interval=5)
+        actions = []
+        for i in range(40):
+            if i % 9 == 8:
+                action = PaintAction([], is_special=True)
+            else:
+                action = PaintAction([PaintStep((i % 6, j), layers[i % 4]) for j in range(i % 3 + 1)])
+            is_undo = i % 11 == 10 and not action.is_special
+            if is_undo:
+                action = actions[-1][0]
+            actions.append((action, is_undo))
+            if is_undo:
+                action.undo_apply(grid)
+            else:
+                action.redo_apply(grid)
+            replay.add_action(action, is_undo, grid)
+
+        replay_grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 6, 6)
+        for n in [23, 7, 40, 0, 31, 32, 12]:
+            replay.seek(replay_grid, n)
+            control_grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 6, 6)
+            for action, is_undo in actions[:n]:
+                if is_undo:
+                    action.undo_apply(control_grid)
+                else:
+                    action.redo_apply(control_grid)
+            self.assertGridEqual(replay_grid, control_grid)
+            self.assertEqual(replay.cursor, n)
+
+        replay.seek(replay_grid, 0)
+        self.assertFalse(replay.play_actions(replay_grid, 39))
+        self.assertTrue(replay.play_actions(replay_grid, 39))
+        self.assertGridEqual(replay_grid, grid)
+        replay.seek(replay_grid, 0)
+        self.assertTrue(replay.play_for(replay_grid, 1000))
+        self.assertGridEqual(replay_grid, grid)
+
+    @number("5.5")
+    def test_journal(self):
+        layers = [blue, green, red, invert]
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 40, 40)
+        path = os.path.join(tempfile.mkdtemp(), "replay.journal")
+        actions = []
+        with JournalWriter(path) as journal:
+            replay = ReplayTracker(max_capacity=10, journal=journal)
+            for i in range(150):
+                if i % 13 == 12:
+                    action = PaintAction([], is_special=True)
+                elif i % 2:
+                    action = PaintAction([PaintStep((i % 40, (i * 7 + j) % 40), layers[i % 4]) for j in range(i % 5)])
+                else:
+                    action = PaintAction([PaintStep((j, 39 - j), layers[j % 4]) for j in range(i % 40)])
+                is_undo = i % 11 == 10 and not action.is_special
+                if is_undo:
+                    action = actions[-1][0]
+                actions.append((action, is_undo))
+                if is_undo:
+                    action.undo_apply(grid)
+                else:
+                    action.redo_apply(grid)
+                replay.add_action(action, is_undo, grid)
+        self.assertEqual(len(replay.actions), 10)
+
+        with JournalReader(path) as reader:
+            self.assertEqual(len(reader), 150)
+            for (action, is_undo), (read, read_undo) in zip(actions, reader):
+                self.assertEqual(is_undo, read_undo)
+                self.assertEqual(action.is_special, read.is_special)
+                self.assertEqual(
+                    [(step.affected_grid_square, step.affected_layer) for step in action.steps],
+                    [(tuple(step.affected_grid_square), step.affected_layer) for step in read.steps],
+                )
+            self.assertEqual(reader[149][1], actions[149][1])
+            self.assertEqual(reader[3][0].steps[0].affected_grid_square, (3, 21))
+
+        replay = ReplayTracker.from_journal(path, keyframe_interval=20)
+        replay_grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 40, 40)
+        replay.seek(replay_grid, 0)
+        self.assertTrue(replay.play_actions(replay_grid, 200))
+        self.assertGridEqual(replay_grid, grid)
+        self.assertEqual(len(replay.keyframes), 7)
+        replay.seek(replay_grid, 61)
+        control_grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 40, 40)
+        for action, is_undo in actions[:61]:
+            if is_undo:
+                action.undo_apply(control_grid)
+            else:
+                action.redo_apply(control_grid)
+        self.assertGridEqual(replay_grid, control_grid)
+
+        empty = os.path.join(tempfile.mkdtemp(), "empty.journal")
+        open(empty, "wb").close()
+        replay = ReplayTracker.from_journal(empty)
+        self.assertEqual(len(replay.actions), 0)
+        self.assertTrue(replay.play_actions(Grid(Grid.DRAW_STYLE_SEQUENCE, 40, 40), 1))
+        replay.actions.close()
+        replay.actions.close()
+
+    @number("5.6")
+    def test_stamps(self):
+        self.assertEqual(len(stencil(5)), 61)
+        self.assertIs(stencil(5), stencil(5))
+        grid = Grid(Grid.DRAW_STYLE_ADD, 8, 8)
+        control_grid = Grid(Grid.DRAW_STYLE_ADD, 8, 8)
+        stamps = []
+        for i, (layer, centre, size) in enumerate([(red, (0, 0), 2), (blue, (7, 6), 5), (invert, (3, 4), 1), (green, (4, 4), 0)]):
+            mask = 0
+            for bit, (dx, dy) in enumerate(stencil(size)):
+                x, y = centre[0] + dx, centre[1] + dy
+                if 0 <= x < 8 and 0 <= y < 8 and (x + y + i) % 3:
+                    mask |= 1 << bit
+            stamp = StampAction(centre, size, layer, mask)
+            stamps.append(stamp)
+            self.assertEqual(len(stamp.steps), bin(mask).count("1"))
+            stamp.redo_apply(grid)
+            PaintAction(stamp.steps).redo_apply(control_grid)
+        self.assertGridEqual(grid, control_grid)
+        self.assertLess(stamps[1].nbytes(), PaintAction(stamps[1].steps).nbytes() / 10)
+
+        path = os.path.join(tempfile.mkdtemp(), "stamps.journal")
+        with JournalWriter(path) as journal:
+            for stamp in stamps:
+                journal.append(stamp, is_undo=True)
+        with JournalReader(path) as reader:
+            self.assertEqual([action for action, _ in reader], stamps)
+        for stamp in reversed(stamps):
+            stamp.undo_apply(grid)
+        self.assertGridEqual(grid, Grid(Grid.DRAW_STYLE_ADD, 8, 8))
+
+    @number("5.7")
+    def test_compact(self):
+        layers = [blue, green, red, invert]
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            grid = Grid(style, 6, 6)
+            replay = ReplayTracker()
+            done = []
+            for i in range(60):
+                if i % 10 == 9:
+                    entries = [(PaintAction(is_special=True), False), (PaintAction(is_special=True), True)]
+                elif i % 4 == 3 and len(done) > 0:
+                    action = done[-1]
+                    entries = [(action, True), (action, False), (action, True), (action, False)]
+                else:
+                    action = PaintAction([PaintStep((i % 6, j), layers[i // 8 % 4]) for j in range(i % 4 + 1)])
+                    done.append(action)
+                    entries = [(action, False)]
+                for action, is_undo in entries:
+                    if is_undo:
+                        action.undo_apply(grid)
+                    else:
+                        action.redo_apply(grid)
+                    replay.add_action(action, is_undo, grid)
+
+            replay.seek(Grid(style, 6, 6), 10)
+            length = len(replay.actions)
+            removed = replay.compact(style, 6, 6)
+            self.assertEqual(len(replay.actions), length - removed)
+            if style != Grid.DRAW_STYLE_SEQUENCE: #only SEQUENCE drops an action with its own undo
+                self.assertGreater(removed, 10)
+            else:
+                self.assertGreater(removed, length // 2)
+            self.assertTrue(all(count <= 10 for count in replay.keyframes))
+
+            replay_grid = Grid(style, 6, 6)
+            replay.seek(replay_grid, 0)
+            self.assertTrue(replay.play_actions(replay_grid, len(replay.actions)))
+            self.assertGridEqual(replay_grid, grid)
+            self.assertEqual(replay.compact(style, 6, 6), 0)
+
+    @number("5.8")
+    def test_compact_add_undo(self):
+        # erase in ADD removes the oldest black, so dropping the last redo and undo would reorder the square,
+        # which shows the same colour but does not hold the same layers
+        style = Grid.DRAW_STYLE_ADD
+        grid = Grid(style, 2, 2)
+        replay = ReplayTracker()
+        paint_black = PaintAction([PaintStep((0, 0), black)])
+        paint_darken = PaintAction([PaintStep((0, 0), darken)])
+        for action, is_undo in [(paint_black, False), (paint_darken, False), (paint_black, False), (paint_black, True)]:
+            if is_undo:
+                action.undo_apply(grid)
+            else:
+                action.redo_apply(grid)
+            replay.add_action(action, is_undo, grid)
+
+        replay.compact(style, 2, 2)
+        replay_grid = Grid(style, 2, 2)
+        replay.seek(replay_grid, 0)
+        self.assertTrue(replay.play_actions(replay_grid, len(replay.actions)))
+        self.assertEqual(replay_grid[0][0].get_color((255, 255, 255), 0, 0, 0), (0, 0, 0))
+        self.assertEqual(replay_grid.snapshot().get(0, 0).layers(), grid.snapshot().get(0, 0).layers())
+
     def assertGridEqual(self, grid1: Grid, grid2: Grid):
         for x in range(len(grid1.grid)):
             for y in range(len(grid1[x])):
@@ -0,0 +1,43 @@
+import random
+import unittest
+from ed_utils.decorators import number
+
+from data_structures.array_sorted_list import ArraySortedList
+from data_structures.sorted_list_adt import ListItem
+
+class TestArraySortedList(unittest.TestCase):
+
+    @number("10.1")
+    def test_bulk_add(self):
+        rng = random.Random(7)
+        for trial in range(50):
+            sorted_list = ArraySortedList(1)
+            expected = []
+            for _ in range(5):
+                if rng.random() < 0.5:
+                    items = [ListItem(i, rng.randrange(20)) for i in range(rng.randrange(30))]
+                    sorted_list.bulk_add(items)
+                    expected.extend(items)
+                else:
+                    item = ListItem(-1, rng.randrange(20))
+                    sorted_list.add(item)
+                    expected.append(item)
+                expected.sort(key=lambda item: item.key)
+                self.assertEqual([sorted_list[i].key for i in range(len(sorted_list))], [item.key for item in expected])
+                self.assertLessEqual(len(sorted_list), len(sorted_list.array))
+            for item in rng.sample(expected, len(expected) // 2):
+                sorted_list.remove(item)
+                expected.remove(item)
+            self.assertEqual([sorted_list[i] for i in range(len(sorted_list))], expected)
+
+    @number("10.2")
+    def test_bisect(self):
+        sorted_list = ArraySortedList(4)
+        sorted_list.bulk_add(ListItem(key, key) for key in [5, 1, 3, 3, 9, 3])
+        self.assertEqual([sorted_list[i].key for i in range(6)], [1, 3, 3, 3, 5, 9])
+        self.assertEqual((sorted_list.bisect_left(3), sorted_list.bisect_right(3)), (1, 4))
+        self.assertEqual((sorted_list.bisect_left(0), sorted_list.bisect_right(10)), (0, 6))
+        self.assertEqual(sorted_list.bisect_left(6), 5)
+        item = sorted_list[2]
+        self.assertEqual(sorted_list.index(item), 2)
+        self.assertRaises(ValueError, sorted_list.index, ListItem(3, 3))
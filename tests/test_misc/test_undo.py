@@ -1,9 +1,13 @@
+import os
+import tempfile
 import unittest
 from ed_utils.decorators import number
 
-from action import PaintAction, PaintStep
+from action import BatchAction, PaintAction, PaintStep
 from undo import UndoTracker
-from layers import green, red, blue
+from replay import ReplayTracker
+from journal import JournalWriter
+from layers import green, red, blue, lighten, darken, invert
 from grid import Grid
 
 class TestUndo(unittest.TestCase):
@@ -65,6 +69,175 @@ class TestUndo(unittest.TestCase):
         action = undo.undo(grid)
         self.assertEqual(action, None)
 
+    @number("4.2")
+    def test_evicts_oldest(self):
+        grid = Grid(Grid.DRAW_STYLE_SEQUENCE, 10, 10)
+        undo = UndoTracker(3)
+        actions = [PaintAction([PaintStep((i, i), green)]) for i in range(5)]
+        for action in actions:
+            action.redo_apply(grid)
+            undo.add_action(action)
+        # The newest actions are kept, the two oldest are forgotten.
+        self.assertEqual([undo.undo(grid) for _ in range(4)], actions[:1:-1] + [None])
+        self.assertEqual(grid[0][0].get_color((0, 0, 0), 0, 0, 0), (0, 255, 0))
+        self.assertEqual(grid[2][2].get_color((0, 0, 0), 0, 0, 0), (0, 0, 0))
+
+    @number("4.3")
+    def test_byte_budget(self):
+        grid = Grid(Grid.DRAW_STYLE_SET, 10, 10)
+        small = PaintAction([PaintStep((0, 0), red)])
+        large = PaintAction([PaintStep((i, j), blue) for i in range(10) for j in range(10)])
+        undo = UndoTracker(max_bytes=large.nbytes() + small.nbytes())
+        undo.add_action(small)
+        undo.add_action(small)
+        undo.add_action(large)
+        self.assertEqual(len(undo.stack_undo), 2)
+        self.assertLessEqual(undo.undo_bytes, undo.max_bytes)
+        self.assertIs(undo.undo(grid), large)
+        self.assertIs(undo.redo(grid), large)
+        self.assertEqual(undo.undo_bytes, large.nbytes() + small.nbytes())
+
+    @number("4.4")
+    def test_jump(self):
+        layers = [green, red, blue, lighten, darken, invert]
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            grid = Grid(style, 6, 6)
+            control_grid = Grid(style, 6, 6)
+            undo = UndoTracker(keyframe_interval=4)
+            control = UndoTracker()
+            for i in range(30):
+                if i % 7 == 6 and style != Grid.DRAW_STYLE_SEQUENCE: #SEQUENCE specials cannot be undone
+                    action = PaintAction([], is_special=True)
+                    action.redo_apply(grid)
+                else: #only record the squares that change, like painting does
+                    action = PaintAction()
+                    for j in range(i % 4 + 1):
+                        layer = layers[(i + j) % len(layers)]
+                        if grid[i % 6][j].add(layer):
+                            action.add_step(PaintStep((i % 6, j), layer))
+                action.redo_apply(control_grid)
+                undo.add_action(action, grid)
+                control.add_action(action)
+
+            for index in [21, 3, 0, 17, 30, 9, 12, 25, 2]:
+                if index < undo.position:
+                    actions = undo.undo_to(grid, index)
+                    expected = [control.undo(control_grid) for _ in range(len(actions))]
+                else:
+                    actions = undo.redo_to(grid, index)
+                    expected = [control.redo(control_grid) for _ in range(len(actions))]
+                self.assertEqual(actions, expected)
+                self.assertEqual(undo.position, index)
+                self.assertGridEqual(grid, control_grid)
+
+        # One ADD square: restoring the keyframe after red, lighten would not bring back what erasing leaves.
+        grid = Grid(Grid.DRAW_STYLE_ADD, 1, 1)
+        control_grid = Grid(Grid.DRAW_STYLE_ADD, 1, 1)
+        undo = UndoTracker(keyframe_interval=2)
+        control = UndoTracker()
+        for layer in [red, lighten, blue, invert, darken]:
+            action = PaintAction([PaintStep((0, 0), layer)])
+            action.redo_apply(grid)
+            action.redo_apply(control_grid)
+            undo.add_action(action, grid)
+            control.add_action(action)
+        undo.undo_to(grid, 2)
+        control.undo(control_grid, 3)
+        self.assertEqual(grid[0][0].get_color((100, 100, 100), 0, 0, 0), control_grid[0][0].get_color((100, 100, 100), 0, 0, 0))
+
+    @number("4.5")
+    def test_batched(self):
+        layers = [green, red, blue]
+        for style in Grid.DRAW_STYLE_OPTIONS:
+            grid = Grid(style, 6, 6)
+            control_grid = Grid(style, 6, 6)
+            undo = UndoTracker()
+            control = UndoTracker()
+            replay = ReplayTracker()
+            for i in range(30):
+                if i % 7 == 6 and style != Grid.DRAW_STYLE_SEQUENCE: #SEQUENCE specials cannot be undone
+                    action = PaintAction([], is_special=True)
+                else: #only record the squares that change, like painting does
+                    action = PaintAction()
+                    for j in range(i % 4 + 1):
+                        if grid[j][i % 6].add(layers[(i + j) % 3]):
+                            action.add_step(PaintStep((j, i % 6), layers[(i + j) % 3]))
+                    PaintAction(action.steps).redo_apply(control_grid)
+                if action.is_special:
+                    action.redo_apply(grid)
+                    action.redo_apply(control_grid)
+                undo.add_action(action)
+                control.add_action(action)
+                replay.add_action(action)
+
+            for n, forward in [(4, False), (9, False), (1, False), (6, True), (30, False), (2, True), (40, True), (3, False)]:
+                if forward:
+                    batch = undo.redo(grid, n)
+                    expected = [control.redo(control_grid) for _ in range(n)]
+                else:
+                    batch = undo.undo(grid, n)
+                    expected = [control.undo(control_grid) for _ in range(n)]
+                    expected.reverse()
+                expected = [action for action in expected if action != None]
+                replay.add_action(batch, is_undo=not forward)
+                if len(expected) > 1:
+                    self.assertIsInstance(batch, BatchAction)
+                    self.assertEqual(batch.actions, expected)
+                else:
+                    self.assertIs(batch, expected[0])
+                self.assertEqual(undo.position, control.position)
+                self.assertGridEqual(grid, control_grid)
+
+            path = os.path.join(tempfile.mkdtemp(), "batches.journal")
+            with JournalWriter(path) as journal:
+                for action, is_undo in replay.actions:
+                    journal.append(action, is_undo)
+            replay = ReplayTracker.from_journal(path)
+            replay_grid = Grid(style, 6, 6)
+            self.assertTrue(replay.play_actions(replay_grid, 100))
+            self.assertGridEqual(replay_grid, grid)
+            replay.actions.close()
+
+    @number("4.6")
+    def test_spill(self):
+        layers = [green, red, blue]
+        for max_capacity, max_bytes in [(7, None), (1000, 3000), (1, None)]:
+            grid = Grid(Grid.DRAW_STYLE_ADD, 6, 6)
+            control_grid = Grid(Grid.DRAW_STYLE_ADD, 6, 6)
+            undo = UndoTracker(max_capacity, max_bytes, keyframe_interval=8, spill=True, segment_size=5)
+            control = UndoTracker()
+            for i in range(60):
+                if i % 7 == 6:
+                    action = PaintAction([], is_special=True)
+                else:
+                    action = PaintAction([PaintStep((i % 6, j), layers[i % 3]) for j in range(i % 4 + 1)])
+                action.redo_apply(grid)
+                action.redo_apply(control_grid)
+                undo.add_action(action, grid)
+                control.add_action(action)
+            self.assertEqual(undo.position, 60)
+            self.assertGreater(undo.spilled, 0)
+            self.assertLessEqual(len(undo.stack_undo), max_capacity)
+            if max_bytes != None:
+                self.assertLessEqual(undo.undo_bytes, max_bytes)
+
+            for n in [3, 20, 1, 30]:
+                undo.undo(grid, n)
+                control.undo(control_grid, n)
+                self.assertEqual(undo.position, control.position)
+                self.assertGridEqual(grid, control_grid)
+            target = min(40, undo.position + len(undo.stack_redo)) #the redo history is still bounded
+            undo.redo_to(grid, target)
+            control.redo_to(control_grid, target)
+            undo.undo_to(grid, 2)
+            control.undo_to(control_grid, 2)
+            self.assertGridEqual(grid, control_grid)
+            for _ in range(3):
+                self.assertEqual(undo.undo(grid) == None, control.undo(control_grid) == None)
+            self.assertEqual((undo.position, undo.spilled, len(undo.segments)), (0, 0, 0))
+            self.assertEqual(undo.spill_file.seek(0, 2), 0)
+            self.assertGridEqual(grid, control_grid)
+
     def assertGridEqual(self, grid1: Grid, grid2: Grid):
         for x in range(len(grid1.grid)):
             for y in range(len(grid1[x])):
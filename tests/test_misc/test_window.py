@@ -3,17 +3,17 @@ from ed_utils.decorators import number
 
 from layers import green, red, blue
 from grid import Grid
-from main import MyWindow
+from painter import Painter
 
 class FakeWindow:
     def __init__(self, grid: Grid):
         self.grid = grid
 
-FakeWindow.on_init = MyWindow.on_init
-FakeWindow.on_reset = MyWindow.on_reset
-FakeWindow.on_paint = MyWindow.on_paint
-FakeWindow.on_increase_brush_size = MyWindow.on_increase_brush_size
-FakeWindow.on_decrease_brush_size = MyWindow.on_decrease_brush_size
+FakeWindow.on_init = Painter.on_init
+FakeWindow.on_reset = Painter.on_reset
+FakeWindow.on_paint = Painter.on_paint
+FakeWindow.on_increase_brush_size = Painter.on_increase_brush_size
+FakeWindow.on_decrease_brush_size = Painter.on_decrease_brush_size
 
 class TestGrid(unittest.TestCase):
 
@@ -1,61 +1,317 @@
 from __future__ import annotations
-from action import PaintAction
+import os
+import tempfile
+import zlib
+from action import BatchAction, PaintAction
+from journal import encode, records, write_varint
 from grid import Grid
-from data_structures.stack_adt import ArrayStack
-from data_structures.queue_adt import CircularQueue
+from data_structures.ring_buffer import RingBuffer
 
 class UndoTracker:
     MIN_CAPACITY = 1
+    KEYFRAME_INTERVAL = 50
+    SEGMENT_SIZE = 256
     
-    def __init__(self, max_capacity = 10000) -> None:
-        self.stack_undo = ArrayStack(max(self.MIN_CAPACITY, max_capacity))
-        # self.queue = CircularQueue(max(self.MIN_CAPACITY, max_capacity))
-        self.stack_redo = ArrayStack(max(self.MIN_CAPACITY, max_capacity))
+    def __init__(self, max_capacity = 10000, max_bytes = None, keyframe_interval = KEYFRAME_INTERVAL, spill = False, segment_size = SEGMENT_SIZE) -> None:
+        """
+        - max_capacity: the number of actions kept in the history.
+        - max_bytes: optionally, a budget on the approximate memory held by the undo history.
+        - keyframe_interval: a grid snapshot is kept every this many actions, see undo_to / redo_to.
+        - spill: keep the oldest actions in a temporary file instead of forgetting them.
+        - segment_size: the number of actions spilled together.
+
+        Once either bound is reached, the oldest actions are forgotten to make room for new ones,
+        or with spill, compressed segment_size at a time into a temporary file.
+        Spilled segments are read back, newest first, when undo reaches them.
+        The histories grow on demand, nothing is allocated up front for max_capacity.
+
+        Big-O notation: O(1)
+        """
+        self.stack_undo = RingBuffer(max(self.MIN_CAPACITY, max_capacity))
+        self.stack_redo = RingBuffer(max(self.MIN_CAPACITY, max_capacity))
+        self.max_bytes = max_bytes
+        self.undo_bytes = 0 #approximate memory held by stack_undo, only tracked with a byte budget
+        self.keyframe_interval = keyframe_interval
+        self.evicted = 0 #number of actions forgotten from the front of stack_undo
+        self.keyframes = {} #action count since the start --> grid snapshot after that many actions
+        self.spill = spill
+        self.segment_size = max(1, min(segment_size, self.stack_undo.max_capacity))
+        self.spill_file = None #temporary file holding the spilled segments, oldest first
+        self.segments = [] #(offset, size, count) of each spilled segment, oldest first
+        self.spilled = 0 #number of actions in the spilled segments
+
+    @property
+    def position(self) -> int:
+        """
+        Number of actions that can be undone, i.e. the current point of the history.
 
-    def add_action(self, action: PaintAction) -> None:
+        Big-O notation: O(1)
+        """
+        return self.spilled + len(self.stack_undo)
+
+    def add_action(self, action: PaintAction, grid: Grid|None = None) -> None:
         """
         Adds an action to the undo tracker.
 
         If your collection is already full,
-        feel free to exit early and not add the action.
+        the oldest action is forgotten to make room for this one.
+
+        - grid: the grid the action was just applied to. When given, keyframes are taken from it.
+
+        Big-O notation: O(1) amortised, O(snapshot) on a keyframe
+        """
+        for count in [count for count in self.keyframes if count > self.evicted + self.position]:
+            del self.keyframes[count] #O(k), these described a future that this action replaces
+        self._push_undo(action)
+        self._keyframe(grid)
+
+    def _keyframe(self, grid: Grid|None) -> None:
+        """
+        Snapshots the grid if the current point of the history falls on a keyframe.
+
+        Big-O notation: O(1), O(snapshot) on a keyframe
+        """
+        count = self.evicted + self.position
+        if grid != None and count % self.keyframe_interval == 0 and count not in self.keyframes:
+            self.keyframes[count] = grid.snapshot()
+
+    def _push_undo(self, action: PaintAction) -> None:
+        """
+        Pushes an action onto stack_undo, evicting or spilling the oldest actions while over a bound.
+
+        Big-O notation: O(1) amortised, O(segment_size * s) when spilling where s is the number of steps per action
+        """
+        if self.spill and self.stack_undo.is_full():
+            self._spill(keep=0)
+        evicted = self.stack_undo.append(action) #O(1), evicts the front once max_capacity is reached
+        if evicted != None:
+            self.evicted += 1
+        if self.max_bytes != None:
+            self.undo_bytes += action.nbytes()
+            if evicted != None:
+                self.undo_bytes -= evicted.nbytes()
+            while self.undo_bytes > self.max_bytes and len(self.stack_undo) > 1: #always keep the newest action
+                if self.spill:
+                    self._spill(keep=1)
+                else:
+                    self.undo_bytes -= self.stack_undo.serve().nbytes()
+                    self.evicted += 1
+
+    def _spill(self, keep: int) -> None:
+        """
+        Compresses up to segment_size of the oldest actions in stack_undo into the spill file,
+        keeping at least the newest keep in memory.
+
+        Big-O notation: O(segment_size * s) where s is the number of steps per action
+        """
+        data = bytearray()
+        count = min(self.segment_size, len(self.stack_undo) - keep)
+        for _ in range(count):
+            action = self.stack_undo.serve()
+            if self.max_bytes != None:
+                self.undo_bytes -= action.nbytes()
+            record = encode(action)
+            write_varint(data, len(record))
+            data += record
+        compressed = zlib.compress(bytes(data))
+        if self.spill_file == None:
+            self.spill_file = tempfile.TemporaryFile()
+        offset = self.spill_file.seek(0, os.SEEK_END)
+        self.spill_file.write(compressed)
+        self.segments.append((offset, len(compressed), count))
+        self.spilled += count
+
+    def _page_in(self) -> None:
+        """
+        Moves the newest spilled segment back to the front of stack_undo, which should have room for it.
+        The file shrinks back since segments are read back newest first.
+
+        Big-O notation: O(segment_size * s) where s is the number of steps per action
+        """
+        offset, size, count = self.segments.pop()
+        self.spill_file.seek(offset)
+        data = zlib.decompress(self.spill_file.read(size))
+        self.spill_file.truncate(offset)
+        actions = [action for action, _, _ in records(data, 0)]
+        for action in reversed(actions):
+            self.stack_undo.append_left(action)
+            if self.max_bytes != None:
+                self.undo_bytes += action.nbytes()
+        self.spilled -= count
+
+    def _pop_undo(self) -> PaintAction:
+        """
+        Pops the most recent action from stack_undo, reading back a spilled segment first if it is empty.
+
+        Big-O notation: O(1), O(segment_size * s) when reading back
+        """
+        if len(self.stack_undo) == 0 and len(self.segments) > 0:
+            self._page_in()
+        action = self.stack_undo.pop()
+        if self.max_bytes != None:
+            self.undo_bytes -= action.nbytes()
+        return action
+
+    @staticmethod
+    def _exact(grid: Grid, action: PaintAction) -> bool:
+        """
+        Whether undoing action puts the grid back exactly as it was before the action.
+        Only so in SEQUENCE, where erase removes what add put there since painting only records
+        the squares it changed, and not for specials. In ADD erase removes the oldest layer,
+        and in SET it clears the square.
 
         Big-O notation: O(1)
         """
-        if not self.stack_undo.is_full(): #check whether the stack_undo is full
-            self.stack_undo.push(action) #O(1), if not full add the action to the stack_undo.
-        
+        return grid.draw_style == Grid.DRAW_STYLE_SEQUENCE and not action.is_special
+
+    def _undone(self, grid: Grid, actions: list[PaintAction]) -> None:
+        """
+        Drops every keyframe once an action is undone inexactly: the grid is now in a state that
+        playing forward from a keyframe would not reproduce, see undo_to.
 
-    def undo(self, grid: Grid) -> PaintAction|None:
+        Big-O notation: O(a) where a is the number of actions
+        """
+        if any(not self._exact(grid, action) for action in actions):
+            self.keyframes.clear()
+
+    def undo(self, grid: Grid, n: int = 1) -> PaintAction|BatchAction|None:
         """
         Undo an operation, and apply the relevant action to the grid.
         If there are no actions to undo, simply do nothing.
 
-        :return: The action that was undone, or None.
+        With n > 1, undo up to n operations at once. Their changes are applied as one BatchAction,
+        visiting each affected square once between specials.
+
+        :return: The action that was undone, a BatchAction of the actions undone if more than one, or None.
 
         Big-O notation: O(nm * special) where nm is the complexity of grid special, and special is depend on which LayerStore in use. 
         """
+        if n > 1:
+            undone = []
+            while len(undone) < n and self.position > 0:
+                action = self._pop_undo()
+                self.stack_redo.append(action)
+                undone.append(action)
+            if len(undone) == 0:
+                return None
+            batch = undone[0] if len(undone) == 1 else BatchAction(undone[::-1])
+            batch.undo_apply(grid)
+            self._undone(grid, undone)
+            return batch
 
-        if len(self.stack_undo) > 0: # make sure that the length of stack_undo is more than 0
-            undo_thing = self.stack_undo.pop() # assign the undo_thing with the removed element from stack_undo
+        if self.position > 0: # make sure that there is something to undo
+            undo_thing = self._pop_undo() # assign the undo_thing with the removed element from stack_undo
             undo_thing.undo_apply(grid) # apply the removed element  with undo_apply
-            self.stack_redo.push(undo_thing) # push the stack_redo with undo_thing
+            self.stack_redo.append(undo_thing) # push the stack_redo with undo_thing
+            self._undone(grid, [undo_thing])
             return undo_thing
             
         return None
 
 
-    def redo(self, grid: Grid) -> PaintAction|None:
+    def redo(self, grid: Grid, n: int = 1) -> PaintAction|BatchAction|None:
         """
         Redo an operation that was previously undone.
         If there are no actions to redo, simply do nothing.
 
-        :return: The action that was redone, or None.
+        With n > 1, redo up to n operations at once, applied as one BatchAction like undo.
+
+        :return: The action that was redone, a BatchAction of the actions redone if more than one, or None.
 
         Big-O notation: O(nm * special) where nm is the complexity of grid special, and special is depend on which LayerStore in use. 
         """
+        if n > 1:
+            redone = []
+            while len(redone) < n and len(self.stack_redo) > 0:
+                action = self.stack_redo.pop()
+                self._push_undo(action)
+                redone.append(action)
+            if len(redone) == 0:
+                return None
+            batch = redone[0] if len(redone) == 1 else BatchAction(redone)
+            batch.redo_apply(grid)
+            self._keyframe(grid)
+            return batch
+
         if len(self.stack_redo) > 0: #O(1)
             redo_thing = self.stack_redo.pop() # assign redo_thing with an element that removed from stack_redo
             redo_thing.redo_apply(grid) # applying the the redo_thing to the grid
-            self.stack_undo.push(redo_thing) #add the removed element that assigned to redo_thing to the stack_undo
+            self._push_undo(redo_thing) #add the removed element that assigned to redo_thing to the stack_undo
+            self._keyframe(grid)
             return redo_thing
         return None
+
+    def _nearest_keyframe(self, low: int, high: int) -> int|None:
+        """
+        Returns the latest keyframe count in [low, high] that can still be replayed from, or None.
+
+        Big-O notation: O(k) where k is the number of keyframes
+        """
+        for count in [count for count in self.keyframes if count < self.evicted]:
+            del self.keyframes[count] #the actions after it were forgotten
+        best = None
+        for count in self.keyframes:
+            if low <= count <= high and (best == None or count > best):
+                best = count
+        return best
+
+    def undo_to(self, grid: Grid, index: int) -> list[PaintAction]:
+        """
+        Undo operations until only index actions remain undoable (see position), leaving the grid
+        as undoing them one at a time would.
+        When every action undone is undone exactly (see _exact), restores the nearest keyframe at or
+        before index and replays the few actions after it instead, whenever that is shorter.
+
+        :return: The actions that were undone, most recent first.
+
+        Big-O notation: O(snapshot + d * apply) where d is the distance from index to the nearest keyframe,
+        at most O((position - index) * apply).
+        """
+        if not 0 <= index <= self.position:
+            raise IndexError('No such point in the history')
+        target = self.evicted + index
+        keyframe = self._nearest_keyframe(self.evicted, target)
+        if keyframe == None or target - keyframe >= self.position - index or keyframe - self.evicted < self.spilled:
+            return [self.undo(grid) for _ in range(self.position - index)]
+        first = index - self.spilled
+        if not all(self._exact(grid, self.stack_undo[i]) for i in range(first, len(self.stack_undo))): #O(position - index)
+            return [self.undo(grid) for _ in range(self.position - index)]
+
+        replay = [self.stack_undo[i - self.spilled] for i in range(keyframe - self.evicted, index)] #O(d)
+        undone = []
+        while self.position > index:
+            action = self._pop_undo()
+            self.stack_redo.append(action)
+            undone.append(action)
+        grid.restore(self.keyframes[keyframe])
+        for action in replay:
+            action.redo_apply(grid)
+        return undone
+
+    def redo_to(self, grid: Grid, index: int) -> list[PaintAction]:
+        """
+        Redo operations until index actions are undoable (see position).
+        Restores the nearest keyframe at or before index and replays the few actions after it,
+        instead of redoing every action one at a time, whenever that is shorter.
+        Keyframes always match the grid redoing would reach, since an inexact undo drops them all.
+
+        :return: The actions that were redone, in order.
+
+        Big-O notation: O(snapshot + d * apply) where d is the distance from index to the nearest keyframe,
+        at most O((index - position) * apply).
+        """
+        if not self.position <= index <= self.position + len(self.stack_redo):
+            raise IndexError('No such point in the history')
+        start = self.evicted + self.position
+        target = self.evicted + index
+        keyframe = self._nearest_keyframe(start + 1, target)
+        if keyframe == None or target - keyframe >= index - self.position:
+            return [self.redo(grid) for _ in range(index - self.position)]
+
+        redone = [self.stack_redo.pop() for _ in range(index - self.position)]
+        grid.restore(self.keyframes[keyframe])
+        for action in redone[keyframe - start:]:
+            action.redo_apply(grid)
+        for action in redone:
+            self._push_undo(action)
+        return redone
@@ -1,6 +1,6 @@
-from main import MyWindow, run_with_func
+from window_logic import WindowLogic
 
-def test_basics(window: MyWindow):
+def test_basics(window: WindowLogic):
     import time
     from layers import rainbow, lighten, black
     window.on_increase_brush_size()
@@ -31,4 +31,5 @@ def test_basics(window: MyWindow):
     window.on_paint(rainbow, 0, 0)
 
 if __name__ == "__main__":
+    from main import run_with_func
     run_with_func(test_basics)
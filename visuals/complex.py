@@ -1,6 +1,6 @@
-from main import MyWindow, run_with_func
+from window_logic import WindowLogic
 
-def test_styles(window: MyWindow):
+def test_styles(window: WindowLogic):
     import time
     from layers import rainbow, lighten, black, invert
     # Set draw mode
@@ -89,4 +89,5 @@ def test_styles(window: MyWindow):
 
 
 if __name__ == "__main__":
+    from main import run_with_func
     run_with_func(test_styles, True)
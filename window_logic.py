@@ -0,0 +1,247 @@
+"""
+The window's logic, without arcade.
+
+WindowLogic is everything MyWindow does apart from drawing: its state, resetting, autosave, turning
+mouse and key events into painting, undos and redos, and the timers advanced by on_update. MyWindow
+adds the arcade window, the button sprites and on_draw on top, while headless.HeadlessWindow runs the
+same logic with no window at all.
+"""
+
+from grid import Grid
+from layer_util import get_layers
+from autosave import Autosave, recover
+from commands import CommandChannel
+from painter import Painter
+
+
+class WindowLogic(Painter):
+    """ Painter window logic, see MyWindow """
+
+    SCREEN_WIDTH = 800
+    SCREEN_HEIGHT = 700
+    SIDEBAR_WIDTH = 100
+    BUTTONS_HEIGHT = 100
+    SCREEN_TITLE = "Paint"
+
+    REPLAY_TIMER_DELTA = 0.05
+
+    GRID_SIZE_X = 32
+    GRID_SIZE_Y = 32
+
+    BG = [255, 255, 255]
+
+    AUTOSAVE_DIR = None # directory to save the session to and recover it from, None to disable
+
+    # Key codes, the same as arcade.key
+    KEY_Y = 121
+    KEY_Z = 122
+    MOD_CTRL = 2
+
+    # SCAFFOLD PART
+    # Unless you're adding new features, you shouldn't need to touch this.
+    # The painting logic, the student part, is in Painter.
+
+    def __init__(self) -> None:
+        """Initialise logic variables."""
+        self.grid: Grid = None
+        self.draw_style = Grid.DRAW_STYLE_SET
+        self.z_pressed = False
+        self.y_pressed = False
+        self.z_timer = 0
+        self.y_timer = 0
+        self.enable_ui = True
+        self.replay_timer = 0
+        self.autosave = None
+        self.commands: CommandChannel = None # calls queued by another thread, see run_with_func
+        self.on_init()
+
+    def reset(self) -> None:
+        """Reset the screen."""
+        self.grid = Grid(self.draw_style, self.GRID_SIZE_X, self.GRID_SIZE_Y)
+        self.timestamp = 0
+
+        self.selected_layer_index = -1
+        self.dragging = None
+        self.prev_drawn = None
+        self.prev_pos = None
+        self.draw_size = 2
+
+        # Visual calculations
+        self.DRAW_PANEL = self.SCREEN_WIDTH - self.SIDEBAR_WIDTH
+        self.GRID_SQ_WIDTH = self.DRAW_PANEL / self.GRID_SIZE_X
+        self.GRID_SQ_HEIGHT = self.SCREEN_HEIGHT / self.GRID_SIZE_Y
+        self.LAYER_BUTTON_SIZE = self.SIDEBAR_WIDTH / 2
+        self.build_ui()
+
+        self.on_reset()
+        self.start_autosave()
+
+    def build_ui(self) -> None:
+        """Builds whatever the window needs to show the controls, called on every reset."""
+        pass
+
+    def start_autosave(self) -> None:
+        """
+        With AUTOSAVE_DIR set, recovers the saved session the first time, then saves every recorded action.
+        """
+        if self.AUTOSAVE_DIR is None:
+            return
+        if self.autosave is None:
+            recovered = recover(self.AUTOSAVE_DIR)
+            if recovered is not None:
+                grid, count, offset = recovered
+                if grid.x != self.GRID_SIZE_X or grid.y != self.GRID_SIZE_Y:
+                    recovered = None
+                elif grid.draw_style != self.draw_style:
+                    self.draw_style = grid.draw_style
+                    self.reset() # rebuilds the buttons for the recovered style, and recovers again
+                    return
+                else:
+                    self.grid = grid
+                    self.replay_action.start_from(grid) # the replay shows the recovered canvas, not an empty one
+            self.autosave = Autosave(self.AUTOSAVE_DIR, self.grid, resume=None if recovered is None else (count, offset))
+        else:
+            self.autosave.reset(self.grid)
+        self.replay_action.journal = self.autosave
+
+    def on_close(self) -> None:
+        """Saves whatever the autosave has not written yet before closing."""
+        if self.autosave is not None:
+            self.autosave.close()
+            self.autosave = None
+
+    def setup(self) -> None:
+        """Set up the game and initialize the variables."""
+        self.reset()
+
+    def on_mouse_press(self, x: int, y: int, button: int, modifiers: int) -> None:
+        """Called when the mouse buttons are pressed."""
+        if x > self.DRAW_PANEL:
+            if not self.enable_ui:
+                return
+            # Buttons
+            for i, layer in enumerate(get_layers()):
+                if layer is None: break
+                xstart = (i % 2) * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+                xend = ((i % 2)+1) * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+                ystart = self.SCREEN_HEIGHT - (i//2) * self.LAYER_BUTTON_SIZE
+                yend = self.SCREEN_HEIGHT - (i//2+1) * self.LAYER_BUTTON_SIZE
+                if xstart <= x < xend and yend <= y < ystart:
+                    self.selected_layer_index = i
+                    break
+            # Actions
+            xstart = self.DRAW_PANEL
+            xend = self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+            ystart = self.LAYER_BUTTON_SIZE
+            yend = 0
+            if xstart <= x < xend and yend <= y < ystart:
+                self.change_draw_mode()
+            xstart = self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+            xend = 2 * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+            ystart = self.LAYER_BUTTON_SIZE
+            yend = 0
+            if xstart <= x < xend and yend <= y < ystart:
+                self.start_replay()
+            xstart = self.DRAW_PANEL
+            xend = self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+            ystart = 2 * self.LAYER_BUTTON_SIZE
+            yend = self.LAYER_BUTTON_SIZE
+            if xstart <= x < xend and yend <= y < ystart:
+                self.on_increase_brush_size()
+            xstart = self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+            xend = 2 * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+            ystart = 2 * self.LAYER_BUTTON_SIZE
+            yend = self.LAYER_BUTTON_SIZE
+            if xstart <= x < xend and yend <= y < ystart:
+                self.on_decrease_brush_size()
+            xstart = self.DRAW_PANEL
+            xend = 1 * self.LAYER_BUTTON_SIZE + self.DRAW_PANEL
+            ystart = 3 * self.LAYER_BUTTON_SIZE
+            yend = 2 * self.LAYER_BUTTON_SIZE
+            if xstart <= x < xend and yend <= y < ystart:
+                self.on_special()
+        else:
+            self.dragging = True
+            self.try_draw(x, y)
+
+    def on_mouse_release(self, x: int, y: int, button: int, modifiers: int):
+        """Called when the mouse buttons are released."""
+        self.dragging = False
+        self.prev_drawn = None
+        self.prev_pos = None
+
+    def on_mouse_motion(self, x, y, dx, dy) -> None:
+        """Called when the mouse moves."""
+        if not self.dragging:
+            return
+        if not(0 <= self.selected_layer_index < len(get_layers())):
+            return
+        if x > self.DRAW_PANEL:
+            return
+        self.try_draw(x, y)
+
+    def on_key_press(self, symbol: int, modifiers: int) -> None:
+        """Called when a keyboard key is pressed."""
+        if not self.enable_ui:
+            return
+        self.z_pressed = self.KEY_Z == symbol and (modifiers & self.MOD_CTRL)
+        self.y_pressed = self.KEY_Y == symbol and (modifiers & self.MOD_CTRL)
+        if self.z_pressed:
+            self.on_undo()
+            self.z_timer = 0.5
+        if self.y_pressed:
+            self.on_redo()
+            self.y_timer = 0.5
+
+    def on_key_release(self, symbol: int, modifiers: int) -> None:
+        """Called when a keyboard key is released."""
+        self.z_pressed = False
+        self.y_pressed = False
+
+    def start_replay(self) -> None:
+        """Begin the replay mode."""
+        self.enable_ui = False
+        self.grid = Grid(self.draw_style, self.GRID_SIZE_X, self.GRID_SIZE_Y)
+        if self.autosave is not None:
+            self.autosave.grid = self.grid # painting carries on on the replayed grid
+        self.replay_timer = self.REPLAY_TIMER_DELTA
+        self.on_replay_start()
+
+    def on_update(self, delta_time) -> None:
+        """Movement and game logic."""
+        if self.commands is not None:
+            self.commands.drain(self) # everything queued since the last frame, on this thread
+        self.timestamp += delta_time
+        if self.z_pressed:
+            self.z_timer -= delta_time
+            repeats = 0
+            while self.z_timer <= 0: #every autorepeat due this frame is undone in one batch
+                repeats += 1
+                self.z_timer += 0.05
+            if repeats > 0:
+                self.on_undo(repeats)
+        if self.y_pressed:
+            self.y_timer -= delta_time
+            repeats = 0
+            while self.y_timer <= 0:
+                repeats += 1
+                self.y_timer += 0.05
+            if repeats > 0:
+                self.on_redo(repeats)
+        if not self.enable_ui:
+            self.replay_timer -= delta_time
+            if self.replay_timer <= 0:
+                self.replay_timer += self.REPLAY_TIMER_DELTA
+                finished = self.on_replay_next_step()
+                if finished:
+                    self.enable_ui = True
+
+    def change_draw_mode(self) -> None:
+        """Changes the draw mode of the application, and resets the window."""
+        if self.draw_style == Grid.DRAW_STYLE_SET:
+            self.draw_style = Grid.DRAW_STYLE_ADD
+        elif self.draw_style == Grid.DRAW_STYLE_ADD:
+            self.draw_style = Grid.DRAW_STYLE_SEQUENCE
+        elif self.draw_style == Grid.DRAW_STYLE_SEQUENCE:
+            self.draw_style = Grid.DRAW_STYLE_SET
+        self.reset()